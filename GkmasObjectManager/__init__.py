@@ -11,9 +11,10 @@ in the mobile game Gakuen Idolm@ster (https://gakuen.idolmaster-official.jp/).
 
 Features
 --------
-- Decrypt and export octocache as raw ProtoDB, JSON, or CSV
+- Decrypt and export octocache as raw ProtoDB, JSON, CSV, Parquet, or Arrow IPC
 - Differentiate between octocache versions
 - Download and deobfuscate objects in parallel
+- Verify downloaded objects against the manifest, and repair them
 
 Example Usage
 -------------
@@ -34,4 +35,5 @@ mdiff.export('DecryptedCache/diff/')
 
 from .manifest import GkmasManifest
 from .object import GkmasAssetBundle, GkmasResource
+from .metrics import MetricsCollector
 from .const import ALL_ASSETBUNDLES, ALL_RESOURCES, VERSION, LATEST
@@ -19,6 +19,7 @@ LATEST = VERSION(0)
 # argument type hints
 PATH_ARGTYPE = Union[str, Path]
 IMG_RESIZE_ARGTYPE = Union[None, str, Tuple[int, int]]
+NWORKER_ARGTYPE = Union[None, int, str, Tuple[int, int]]
 
 # manifest request
 GKMAS_APPID = 400
@@ -43,13 +44,55 @@ DICLIST_IGNORED_FIELDS = ["dependencies", "uploadVersionId"]
 
 # manifest export
 CSV_COLUMNS = ["objectName", "md5", "name", "size", "state"]
+COLUMNAR_KIND_COLUMN = "kind"  # Parquet/Arrow IPC only, tells entry lists apart
+COLUMNAR_KINDS = ["assetbundle", "resource"]
+COLUMNAR_METADATA_KEY = b"gkmas_manifest"
 
 # manifest download dispatcher
 DEFAULT_DOWNLOAD_PATH = "objects/"
 DEFAULT_DOWNLOAD_NWORKER = multiprocessing.cpu_count()
+DEFAULT_ASYNC_NWORKER = 256  # in-flight transfers on a single event loop
+DEFAULT_DOWNLOAD_MAX_BYTES = 1 << 30  # in-flight bytes, judged by object size
+DEFAULT_DOWNLOAD_RETRIES = 3  # further attempts at an object after its first failure
+DEFAULT_VERIFY_NWORKER = multiprocessing.cpu_count()  # hashing threads
+
+# download retry backoff, see utils.DownloadSchedule
+RETRY_BACKOFF_BASE = 0.5  # seconds before the first retry, doubled with each attempt
+RETRY_BACKOFF_MAX = 30.0  # cap of a single backoff in seconds
+
+# download ledger, see ledger.DownloadLedger
+LEDGER_FILENAME = ".gkmas_ledger.sqlite3"  # default location, inside the download path
+LEDGER_SCHEMA_VERSION = 1  # bump whenever the schema changes (old ledgers are reset)
+LEDGER_COMMIT_INTERVAL = 1000  # records per transaction
+
+# adaptive download concurrency (AIMD), see utils.AdaptiveConcurrency
+ADAPTIVE_NWORKER = "auto"  # nworker value that enables adaptive mode
+ADAPTIVE_NWORKER_RANGE = (2, 256)  # default (min, max) in-flight requests
+ADAPTIVE_INITIAL_NWORKER = 8  # starting point of slow start, within the range
+ADAPTIVE_EPOCH_SECONDS = 0.25  # minimum duration of a measurement epoch
+ADAPTIVE_DECREASE = 0.5  # multiplicative decrease on 429/5xx/connection errors
+ADAPTIVE_SOFT_DECREASE = 0.9  # multiplicative decrease on latency inflation
+ADAPTIVE_GAIN = 0.05  # relative throughput gain that justifies more concurrency
+ADAPTIVE_LATENCY_TOLERANCE = 2.0  # latency inflation (vs. best seen) deemed queueing
+ADAPTIVE_BEST_DECAY = 0.95  # per-epoch decay of the best throughput seen
+
+# hedged requests, see utils.HedgePolicy
+HEDGE_MIN_SAMPLES = 20  # fetches of a size class observed before hedging any in it
+HEDGE_WINDOW = 512  # most recent fetches per size class to learn latency from
+HEDGE_MIN_DELAY = 0.05  # seconds, floor of the delay before a duplicate request
+
+# download metrics
+METRICS_PREFIX = "gkmas"
+# stage durations in seconds, as Prometheus-style bucket upper bounds (0.1ms to 50s)
+METRICS_BUCKETS = tuple(
+    round(m * 10**e, 6) for e in range(-4, 2) for m in (1.0, 2.5, 5.0)
+)
+METRICS_QUANTILES = (0.5, 0.9, 0.99)
 
 # object download
 GKMAS_OBJECT_SERVER = "https://object.asset.game-gakuen-idolmaster.jp/"
+DOWNLOAD_CHUNK_SIZE = 1 << 20  # bytes read at a time in streaming mode
+DOWNLOAD_TIMEOUT = (10.0, 60.0)  # (connect, read) seconds, the latter between bytes
 CHARACTER_ABBREVS = [
     "hski",  # Hanami SaKI
     "ttmr",  # Tsukimura TeMaRi
@@ -72,3 +115,4 @@ CHARACTER_ABBREVS = [
 # object deobfuscate
 GKMAS_UNITY_VERSION = "2022.3.21f1"
 UNITY_SIGNATURE = b"UnityFS"
+OBFUSCATE_HEADER_LEN = 256
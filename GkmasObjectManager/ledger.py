@@ -0,0 +1,212 @@
+"""
+ledger.py
+Local SQLite ledger of completed downloads, for incremental sync.
+"""
+
+from .const import (
+    PATH_ARGTYPE,
+    IMG_RESIZE_ARGTYPE,
+    LEDGER_SCHEMA_VERSION,
+    LEDGER_COMMIT_INTERVAL,
+)
+
+import json
+import time
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, Tuple
+
+
+LEDGER_SCHEMA = """
+CREATE TABLE IF NOT EXISTS downloads (
+    root TEXT NOT NULL,         -- resolved download directory
+    name TEXT NOT NULL,
+    md5 TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    paths TEXT NOT NULL,        -- JSON list of output paths, relative to root
+    params TEXT NOT NULL,       -- JSON of output options affecting this object
+    completed REAL NOT NULL,    -- UNIX timestamp
+    PRIMARY KEY (root, name)
+) WITHOUT ROWID
+"""
+
+
+class DownloadLedger:
+    """
+    A record of objects downloaded into a directory with given output options,
+    kept in an SQLite database (which can be shared by several directories).
+    Each completed download is recorded with its name, MD5 hash, size, output path(s),
+    output options, and timestamp, so that a repeated sync can tell what is missing
+    or stale with a single indexed query, instead of inspecting every file on disk.
+
+    Output options are recorded per object, and only those affecting it count,
+    e.g. changing 'img_format' makes image assetbundles stale, but not resources.
+    The ledger trusts the download tree; files removed or altered behind its back
+    are not noticed (see GkmasManifest.verify() for that).
+
+    Attributes:
+        path (Path): Location of the database file.
+        root (str): Resolved download directory this ledger is scoped to.
+
+    Methods:
+        partition(objects: Iterable) -> Tuple[list, list, list]:
+            Splits objects into those never recorded, those stale (recorded with
+            another MD5 hash or other options), and those up to date.
+        has(obj) -> bool:
+            Returns whether an object is recorded with its current MD5 hash.
+        recorded() -> Dict[str, str]:
+            Returns the MD5 hash recorded for each object, keyed by name.
+        record(obj):
+            Records an object as completed, as of now.
+        forget(obj):
+            Removes the record of an object.
+        commit():
+            Commits pending records (also done every LEDGER_COMMIT_INTERVAL records).
+        close():
+            Commits pending records and closes the database.
+
+    Not thread-safe; meant to be used by a single dispatcher thread (or event loop).
+    """
+
+    def __init__(
+        self,
+        path: PATH_ARGTYPE,
+        root: PATH_ARGTYPE,
+        categorize: bool = True,
+        extract_img: bool = True,
+        img_format: str = "png",
+        img_resize: IMG_RESIZE_ARGTYPE = None,
+    ):
+        """
+        Opens (or creates) a ledger database, scoped to the given directory and options.
+
+        Args:
+            path (Union[str, Path]): Location of the database file.
+            root (Union[str, Path]): Download directory, as passed to download().
+            categorize (bool) = True: As passed to download().
+            extract_img (bool) = True: As passed to download().
+            img_format (str) = 'png': As passed to download().
+            img_resize (Union[None, str, Tuple[int, int]]) = None: As passed to download().
+        """
+
+        self.path = Path(path)
+        self.root = str(Path(root).resolve())
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._categorize = categorize
+        self._extract_img = extract_img
+        self._img_format = img_format.lower()
+        self._params = (  # for objects without and with image extraction
+            json.dumps({"categorize": categorize}),
+            json.dumps(
+                {
+                    "categorize": categorize,
+                    "img_format": self._img_format,
+                    "img_resize": img_resize,
+                }
+            ),
+        )
+
+        self._db = sqlite3.connect(self.path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")  # durable enough with WAL
+        version = self._db.execute("PRAGMA user_version").fetchone()[0]
+        if version != LEDGER_SCHEMA_VERSION:
+            # a ledger only saves work, so an outdated one is simply reset
+            self._db.execute("DROP TABLE IF EXISTS downloads")
+            self._db.execute(f"PRAGMA user_version = {LEDGER_SCHEMA_VERSION}")
+        self._db.execute(LEDGER_SCHEMA)
+        self._db.commit()
+        self._uncommitted = 0
+
+    def __repr__(self):
+        return f"<DownloadLedger {self.path} for '{self.root}'>"
+
+    def __enter__(self) -> "DownloadLedger":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def partition(self, objects: Iterable) -> Tuple[list, list, list]:
+        done = {
+            name: (md5, params)
+            for name, md5, params in self._db.execute(
+                "SELECT name, md5, params FROM downloads WHERE root = ?", (self.root,)
+            )
+        }
+        missing, stale, uptodate = [], [], []
+        for obj in objects:
+            recorded = done.get(obj.name)
+            if recorded is None:
+                missing.append(obj)
+            elif recorded == (obj.md5, self._params_of(obj)):
+                uptodate.append(obj)
+            else:
+                stale.append(obj)
+        return missing, stale, uptodate
+
+    def has(self, obj) -> bool:
+        return (
+            self._db.execute(
+                "SELECT 1 FROM downloads WHERE root = ? AND name = ? AND md5 = ?",
+                (self.root, obj.name, obj.md5),
+            ).fetchone()
+            is not None
+        )
+
+    def recorded(self) -> Dict[str, str]:
+        return dict(
+            self._db.execute(
+                "SELECT name, md5 FROM downloads WHERE root = ?", (self.root,)
+            )
+        )
+
+    def record(self, obj):
+        self._db.execute(
+            "INSERT OR REPLACE INTO downloads VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                self.root,
+                obj.name,
+                obj.md5,
+                obj.size,
+                json.dumps([self._output_path(obj)]),
+                self._params_of(obj),
+                time.time(),
+            ),
+        )
+        self._uncommitted += 1
+        if self._uncommitted >= LEDGER_COMMIT_INTERVAL:
+            self.commit()
+
+    def forget(self, obj):
+        self._db.execute(
+            "DELETE FROM downloads WHERE root = ? AND name = ?", (self.root, obj.name)
+        )
+        self._uncommitted += 1
+
+    def commit(self):
+        self._db.commit()
+        self._uncommitted = 0
+
+    def close(self):
+        self.commit()
+        self._db.close()
+
+    def _params_of(self, obj) -> str:
+        """
+        [INTERNAL] Returns the JSON of output options affecting the given object.
+        """
+        return self._params[obj._will_extract(self._extract_img)]
+
+    def _output_path(self, obj) -> str:
+        """
+        [INTERNAL] Returns the output path of an object relative to root,
+        as determined by _download_path() and image extraction.
+        """
+        path = Path(obj.name)
+        if self._categorize:
+            path = obj._determine_subdir(obj.name) / path
+        if obj._will_extract(self._extract_img):
+            path = path.with_suffix(f".{self._img_format}")
+        return path.as_posix()
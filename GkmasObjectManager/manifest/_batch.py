@@ -0,0 +1,188 @@
+"""
+_batch.py
+[CLASS SPLIT] GkmasManifest batch downloading of multiple jobs in a single run.
+"""
+
+from ..utils import Logger, DownloadResult
+from ..object import GkmasResource
+from ..metrics import MetricsCollector
+from ..const import (
+    PATH_ARGTYPE,
+    NWORKER_ARGTYPE,
+    DEFAULT_DOWNLOAD_PATH,
+    DEFAULT_DOWNLOAD_MAX_BYTES,
+    DEFAULT_DOWNLOAD_RETRIES,
+)
+from ._download import _report_metrics
+
+import tempfile
+from pathlib import Path
+from typing import List
+
+
+logger = Logger()
+
+
+# options of a job, with their defaults as in download()
+JOB_DEFAULTS = {
+    "path": DEFAULT_DOWNLOAD_PATH,
+    "categorize": True,
+    "extract_img": True,
+    "img_format": "png",
+    "img_resize": None,
+    "subdir": None,
+}
+
+
+def download_batch(
+    self,
+    jobs: List[dict],
+    nworker: NWORKER_ARGTYPE = None,
+    stream: bool = False,
+    backend: str = "thread",
+    cache: PATH_ARGTYPE = None,
+    nprocess: int = 0,
+    max_bytes: int = DEFAULT_DOWNLOAD_MAX_BYTES,
+    retries: int = DEFAULT_DOWNLOAD_RETRIES,
+    hedge: float = None,
+    metrics: MetricsCollector = None,
+) -> DownloadResult:
+    """
+    Downloads the objects of several jobs, each with its own destination and image options,
+    in a single run. Criteria of all jobs are resolved together in one pass over the manifest,
+    and all objects are scheduled onto one shared pool of download workers (and extraction
+    processes), so that workers stay busy across jobs instead of idling between small batches.
+    Each object is routed to its job's destination as it is written.
+
+    Args:
+        jobs (List[dict]): Jobs to run, each a dictionary with the following keys:
+            criteria (Union[str, GkmasResource, list]): A criterion or a list of criteria, as in download().
+            path (Union[str, Path]) = DEFAULT_DOWNLOAD_PATH: As passed to download().
+            categorize (bool) = True: As passed to download().
+            extract_img (bool) = True: As passed to download().
+            img_format (str) = 'png': As passed to download().
+            img_resize (Union[None, str, Tuple[int, int]]) = None: As passed to download().
+            subdir (Callable[[str], str]) = None: A function mapping an object name to a subdirectory
+                of 'path', overriding 'categorize', e.g. lambda s: s.split("_")[-2].
+            An object matched by several jobs is written to each of their destinations
+            (as with separate download() calls), but fetched only once: it is downloaded for
+            the first of them, and served to the others from 'cache' (or a temporary one).
+        nworker, stream, backend, cache, nprocess, max_bytes, retries, hedge, metrics:
+            As passed to download(), and shared by all jobs.
+
+    Returns a utils.DownloadResult over all jobs, listing an object once per job it was
+    written for. Failed objects can be tried again with a job of their own,
+    i.e. {'criteria': result.failed, ...}.
+
+    Raises:
+        ValueError: If a job has no criteria, or an unrecognized option.
+    """
+
+    criteria = []
+    owners = []  # index of the job that each criterion belongs to
+    for i, job in enumerate(jobs):
+        unknown = set(job) - set(JOB_DEFAULTS) - {"criteria"}
+        if unknown:
+            raise ValueError(f"Unrecognized option(s) {sorted(unknown)} in job {i}")
+        if not job.get("criteria"):
+            raise ValueError(f"Job {i} has no criteria")
+        job_criteria = job["criteria"]
+        if isinstance(job_criteria, (str, GkmasResource)):
+            job_criteria = [job_criteria]
+        criteria.extend(job_criteria)
+        owners.extend([i] * len(job_criteria))
+
+    assigned = {}  # rank -> indices of the jobs it belongs to, in dispatch order
+    for i, ranks in zip(owners, self._match(*criteria)):
+        for r in ranks:
+            targets = assigned.setdefault(r, [])
+            if i not in targets:
+                targets.append(i)
+
+    rounds = []  # (object, job index) pairs, each object at most once per round
+    counts = [0] * len(jobs)
+    for r, targets in assigned.items():
+        obj = self._object(r)
+        for depth, i in enumerate(targets):
+            if depth == len(rounds):
+                rounds.append([])
+            rounds[depth].append((obj, i))
+            counts[i] += 1
+
+    for job, count in zip(jobs, counts):
+        logger.info(f"{count} objects to '{job.get('path', DEFAULT_DOWNLOAD_PATH)}'")
+
+    # objects of several jobs are relayed to later rounds through a cache,
+    # where they are materialized with each job's own output options
+    shared = {obj.name for obj, _ in rounds[1]} if len(rounds) > 1 else set()
+    if shared:
+        logger.info(f"{len(shared)} objects shared by several jobs, fetched once")
+    scratch = tempfile.TemporaryDirectory() if shared and not cache else None
+    relay = cache or (scratch and scratch.name)
+
+    downloader = self._get_downloader(nworker, backend)
+    result = DownloadResult()
+    try:
+        for depth, pairs in enumerate(rounds):
+            if depth:  # not tried again for later jobs once failed
+                failed = {obj.name for obj in result.failed}
+                pairs = [(obj, i) for obj, i in pairs if obj.name not in failed]
+            routes = {}  # object name -> download() arguments of its job
+            for obj, i in pairs:
+                routes[obj.name] = _route(obj, {**JOB_DEFAULTS, **jobs[i]})
+                if obj.name in shared:
+                    routes[obj.name]["cache"] = relay
+            part = downloader.dispatch(
+                [obj for obj, _ in pairs],
+                stream=stream,
+                cache=cache,
+                nprocess=nprocess,
+                max_bytes=max_bytes,
+                retries=retries,
+                hedge=hedge,
+                metrics=metrics,
+                route=lambda obj, routes=routes: routes[obj.name],
+            )
+            result.succeeded.extend(part.succeeded)
+            result.skipped.extend(part.skipped)
+            result.failed.extend(part.failed)
+            result.errors.update(part.errors)
+            result.retries += part.retries
+    finally:
+        if scratch:
+            scratch.cleanup()
+        if metrics:
+            _report_metrics(metrics)
+        controller = downloader.controller
+        if controller:
+            logger.info(
+                f"Concurrency adapted to {controller.limit} "
+                f"(within {controller.min_limit}-{controller.max_limit})"
+            )
+
+    if result.failed:
+        logger.warning(f"Batch download finished with failures: {result.summary()}")
+    else:
+        logger.success(
+            f"Batch download of {len(jobs)} jobs finished: {result.summary()}"
+        )
+    return result
+
+
+def _route(obj, job: dict) -> dict:
+    """
+    [INTERNAL] Returns the download() arguments that route an object
+    to the destination of the given job (with defaults filled in).
+    """
+
+    path, categorize = job["path"], job["categorize"]
+    if job["subdir"]:
+        path, categorize = Path(path) / job["subdir"](obj.name), False
+
+    return {
+        "path": path,
+        "categorize": categorize,
+        "extract_img": job["extract_img"],
+        "img_format": job["img_format"],
+        "img_resize": job["img_resize"],
+    }
@@ -3,37 +3,69 @@ _download.py
 [CLASS SPLIT] GkmasManifest-managed object downloading.
 """
 
-from ..utils import ConcurrentDownloader
+from ..utils import Logger, ConcurrentDownloader, AsyncDownloader, DownloadResult
+from ..object import GkmasResource
+from ..metrics import MetricsCollector
+from ..ledger import DownloadLedger
 from ..const import (
-    ALL_ASSETBUNDLES,
-    ALL_RESOURCES,
     PATH_ARGTYPE,
     IMG_RESIZE_ARGTYPE,
+    NWORKER_ARGTYPE,
     DEFAULT_DOWNLOAD_PATH,
     DEFAULT_DOWNLOAD_NWORKER,
+    DEFAULT_ASYNC_NWORKER,
+    DEFAULT_DOWNLOAD_MAX_BYTES,
+    DEFAULT_DOWNLOAD_RETRIES,
+    ADAPTIVE_NWORKER,
+    ADAPTIVE_NWORKER_RANGE,
+    LEDGER_FILENAME,
 )
 
-import re
+from pathlib import Path
+from typing import Union
+
+
+logger = Logger()
 
 
 def download(
     self,
-    *criteria: str,
-    nworker: int = DEFAULT_DOWNLOAD_NWORKER,
+    *criteria: Union[str, GkmasResource],
+    nworker: NWORKER_ARGTYPE = None,
     path: PATH_ARGTYPE = DEFAULT_DOWNLOAD_PATH,
     categorize: bool = True,
     extract_img: bool = True,
     img_format: str = "png",
     img_resize: IMG_RESIZE_ARGTYPE = None,
-):
+    stream: bool = False,
+    backend: str = "thread",
+    cache: PATH_ARGTYPE = None,
+    nprocess: int = 0,
+    max_bytes: int = DEFAULT_DOWNLOAD_MAX_BYTES,
+    retries: int = DEFAULT_DOWNLOAD_RETRIES,
+    hedge: float = None,
+    incremental: bool = False,
+    ledger: PATH_ARGTYPE = None,
+    metrics: MetricsCollector = None,
+) -> DownloadResult:
     """
     Downloads the regex-specified assetbundles/resources to the specified path.
 
     Args:
-        *criteria (str): Regex patterns of assetbundle/resource names.
+        *criteria (Union[str, GkmasResource]): Regex patterns of assetbundle/resource names.
             Allowed special tokens are const.ALL_ASSETBUNDLES and const.ALL_RESOURCES.
-        nworker (int) = DEFAULT_DOWNLOAD_NWORKER: Number of concurrent download workers.
-            Defaults to multiprocessing.cpu_count().
+            Objects of this manifest are also accepted, e.g. those failed in a previous call.
+            An object matched by several criteria is downloaded only once.
+        nworker (Union[None, int, str, Tuple[int, int]]) = None: Number of concurrent download workers.
+            Defaults to DEFAULT_DOWNLOAD_NWORKER (multiprocessing.cpu_count()) for the 'thread' backend,
+            and DEFAULT_ASYNC_NWORKER for the 'async' backend. For the former, also sizes the keep-alive
+            connection pool, which is owned by this manifest and reused across download() calls.
+            If 'auto' (const.ADAPTIVE_NWORKER) or a (min, max) tuple, the number of in-flight requests
+            adapts at runtime within const.ADAPTIVE_NWORKER_RANGE or the given bounds, reacting to
+            throughput, latency, and HTTP 429/5xx responses (see utils.AdaptiveConcurrency).
+            What is learned carries over to later download() calls with the same setting.
+            Threads and pooled connections are only created as the limit grows,
+            so an upper bound of 256 costs nothing unless the link sustains it.
         path (Union[str, Path]) = DEFAULT_DOWNLOAD_PATH: A directory to which the objects are downloaded.
             *WARNING: Behavior is undefined if the path points to an definite file (with extension).*
         categorize (bool) = True: Whether to categorize the downloaded objects into subdirectories.
@@ -47,29 +79,206 @@ def download(
             If None, images are downloaded as is.
             If str, string must contain exactly one ':' and images are resized to the specified ratio.
             If Tuple[int, int], images are resized to the specified exact dimensions.
+        stream (bool) = False: Whether to stream objects to disk in fixed-size chunks.
+            If True, memory usage per worker is bounded regardless of object size.
+            Images to be extracted are still downloaded into memory as a whole.
+            Effective only with the 'thread' backend.
+            *NOTE: Only streamed transfers are resumable; interrupted transfers are kept
+            as '.part' files and continued with an HTTP Range request on the next attempt.
+            Buffered (default) transfers that are interrupted start over from byte 0,
+            so pass stream=True for very large objects on flaky links.*
+        backend (str) = 'thread': Download engine to use.
+            'thread' runs one blocking download per worker thread (utils.ConcurrentDownloader);
+            'async' runs all transfers on a single asyncio event loop (utils.AsyncDownloader),
+            which scales to hundreds of in-flight transfers. The latter requires 'aiohttp'.
+        cache (Union[str, Path]) = None: A content-addressed cache directory for raw payloads.
+            If given, objects whose MD5 hash is already cached (e.g. from downloading another revision,
+            or into another 'path') are served without network access, regardless of 'path',
+            'categorize', or image options; newly downloaded objects are added to the cache.
+            Raw outputs are hardlinked to cache entries where possible, and downloads always
+            replace (never rewrite) existing files, so entries stay intact across revisions.
+            *NOTE: Editing downloaded files in place also edits the cache; edit copies instead.*
+        nprocess (int) = 0: Number of processes for image extraction.
+            If positive, download workers only fetch and verify, and hand images over to
+            a process pool through a bounded queue, so that extraction scales across cores.
+            If 0, extraction runs inside download workers.
+            *NOTE: Worker processes are spawned, so the calling script needs an
+            'if __name__ == "__main__"' guard.*
+        max_bytes (int) = DEFAULT_DOWNLOAD_MAX_BYTES: Maximum number of bytes in flight,
+            judged by object sizes in the manifest. Objects are submitted lazily through
+            a sliding window, so that a burst of large objects cannot spike memory usage.
+            A single object larger than this is downloaded alone. If None, only the
+            number of in-flight objects is bounded.
+        retries (int) = DEFAULT_DOWNLOAD_RETRIES: Maximum number of retries per object
+            on transient failures, i.e. HTTP 408/429/5xx, connection errors, timeouts,
+            and size or MD5 mismatches. Retries wait for a jittered exponential backoff
+            (see utils.DownloadSchedule), while other objects keep downloading.
+            Objects failing otherwise (e.g. HTTP 404) are not retried.
+            Every request is also bounded by const.DOWNLOAD_TIMEOUT (connect, read),
+            so that a stalled connection fails (and is retried) instead of pinning a worker.
+        hedge (float) = None: Latency quantile (e.g. 0.95) beyond which a download is hedged.
+            If given, a transfer still running after the given quantile of latencies
+            learned so far (for objects of similar size) is raced by a duplicate request,
+            and whichever finishes first is kept (see utils.HedgePolicy). This cuts the
+            long tail of large batches at the cost of a few redundant requests.
+            Streamed transfers are never hedged.
+        incremental (bool) = False: Whether to download only what has changed since the last
+            incremental download into 'path' (with the same output options), as told by a
+            local SQLite ledger (see ledger.DownloadLedger) with a single indexed query,
+            rather than by inspecting files on disk. Objects whose MD5 hash has changed
+            are downloaded again (replacing their previous files, even if intact);
+            every completed object is recorded into the ledger.
+            *NOTE: Files removed or altered behind the ledger's back are not noticed.*
+        ledger (Union[str, Path]) = None: Location of the ledger database.
+            Defaults to const.LEDGER_FILENAME inside 'path'. If given, completed objects
+            are recorded into it even when 'incremental' is False.
+        metrics (metrics.MetricsCollector) = None: A collector for download metrics,
+            i.e. object/byte counters and per-stage duration histograms (network, MD5 verification,
+            deobfuscation, UnityPy extraction, resize, encode, and disk write). If given,
+            a summary is logged at the end, and a snapshot is written to 'metrics.path' (if set).
+            The same collector can be passed to several download() calls to accumulate.
+
+    Objects already present at their destination with the expected size are skipped
+    without being read, so that a repeated download is cheap; to check their content,
+    use verify() (with redownload=True to replace altered files).
+
+    Returns a utils.DownloadResult listing succeeded, skipped, and failed objects.
+    A failed object doesn't abort the others; to try the failed ones again,
+    pass them back as criteria, i.e. manifest.download(*result.failed, ...).
     """
 
-    objects = []
-
-    for criterion in criteria:
-        if criterion == ALL_ASSETBUNDLES:  # special tokens, enclosed in <>
-            objects.extend(self.abs)
-        elif criterion == ALL_RESOURCES:
-            objects.extend(self.reses)
-        else:
-            objects.extend(
-                [
-                    self._name2object[file]
-                    for file in self._name2object
-                    if re.match(criterion, file)
-                ]
+    objects = self._select(*criteria)
+    downloader = self._get_downloader(nworker, backend)
+
+    recorder = None
+    uptodate = []
+    if incremental or ledger:
+        recorder = DownloadLedger(
+            ledger or Path(path) / LEDGER_FILENAME,
+            path,
+            categorize,
+            extract_img,
+            img_format,
+            img_resize,
+        )
+    route = None
+    if incremental:
+        missing, stale, uptodate = recorder.partition(objects)
+        objects = stale + missing
+        logger.info(
+            f"{len(uptodate)} objects up to date, {len(stale)} stale, "
+            f"{len(missing)} never downloaded"
+        )
+        if metrics:
+            metrics.count("objects_skipped", len(uptodate))
+        if stale:
+            # what's on disk is known to be of a previous revision (or other options),
+            # so it must not be taken as complete, however intact it looks
+            forced = {obj.name for obj in stale}
+            route = lambda obj: {"force": True} if obj.name in forced else {}
+
+    try:
+        result = downloader.dispatch(
+            objects,
+            path=path,
+            categorize=categorize,
+            extract_img=extract_img,
+            img_format=img_format,
+            img_resize=img_resize,
+            stream=stream,
+            cache=cache,
+            nprocess=nprocess,
+            max_bytes=max_bytes,
+            retries=retries,
+            hedge=hedge,
+            ledger=recorder,
+            metrics=metrics,
+            route=route,
+        )
+        result.skipped.extend(uptodate)
+    finally:
+        if recorder:
+            recorder.close()
+        if metrics:
+            _report_metrics(metrics)
+        controller = downloader.controller
+        if controller:
+            logger.info(
+                f"Concurrency adapted to {controller.limit} "
+                f"(within {controller.min_limit}-{controller.max_limit})"
             )
 
-    ConcurrentDownloader(nworker).dispatch(
-        objects,
-        path=path,
-        categorize=categorize,
-        extract_img=extract_img,
-        img_format=img_format,
-        img_resize=img_resize,
+    if result.failed:
+        logger.warning(
+            f"Download finished with failures: {result.summary()}; "
+            "pass 'result.failed' back to download() to retry"
+        )
+    else:
+        logger.success(f"Download finished: {result.summary()}")
+    return result
+
+
+def _report_metrics(metrics: MetricsCollector):
+    """
+    [INTERNAL] Logs a summary of download metrics, and writes a snapshot if configured.
+    """
+
+    snapshot = metrics.snapshot()
+    counters, stages = snapshot["counters"], snapshot["stages"]
+    nobject = sum(counters.get(f"objects_{k}", 0) for k in ("downloaded", "cached"))
+    mbps = snapshot["rates"].get("bytes_received_per_second", 0) / (1 << 20)
+    logger.info(
+        f"{nobject} objects in {snapshot['elapsed']:.1f}s "
+        f"({snapshot['rates'].get('objects_downloaded_per_second', 0):.1f} objects/s, "
+        f"{mbps:.1f} MiB/s received)"
     )
+    if stages:
+        busiest = max(stages, key=lambda stage: stages[stage]["sum"])
+        logger.info(
+            "Time by stage: "
+            + ", ".join(f"{stage} {s['sum']:.1f}s" for stage, s in stages.items())
+            + f" (most in '{busiest}')"
+        )
+
+    if metrics.path:
+        metrics.export(metrics.path)
+
+
+def _get_downloader(self, nworker: NWORKER_ARGTYPE, backend: str):
+    """
+    [INTERNAL] Returns the downloader owned by this manifest, so that its
+    connection pool (and, in adaptive mode, its concurrency controller) is reused
+    across download() calls. A new downloader is created only when the backend
+    or number of workers changes.
+    """
+
+    if backend == "thread":
+        downloader_class = ConcurrentDownloader
+        default = DEFAULT_DOWNLOAD_NWORKER
+    elif backend == "async":
+        downloader_class = AsyncDownloader
+        default = DEFAULT_ASYNC_NWORKER
+    else:
+        raise ValueError(f"Unrecognized download backend '{backend}'")
+
+    min_nworker = None
+    if nworker == ADAPTIVE_NWORKER:
+        min_nworker, nworker = ADAPTIVE_NWORKER_RANGE
+    elif isinstance(nworker, tuple):
+        min_nworker, nworker = nworker
+    elif isinstance(nworker, str):
+        raise ValueError(f"Unrecognized number of workers '{nworker}'")
+    nworker = nworker or default
+
+    downloader = getattr(self, "_downloader", None)
+    if not (
+        isinstance(downloader, downloader_class)
+        and downloader.nworker == nworker
+        and downloader.min_nworker == min_nworker
+    ):
+        if downloader is not None:
+            downloader.close()
+        downloader = downloader_class(nworker, min_nworker=min_nworker)
+        self._downloader = downloader
+
+    return downloader
@@ -4,30 +4,41 @@ _export.py
 """
 
 from ..utils import Logger
-from ..const import PATH_ARGTYPE, CSV_COLUMNS
+from ..const import (
+    PATH_ARGTYPE,
+    CSV_COLUMNS,
+    COLUMNAR_KIND_COLUMN,
+    COLUMNAR_KINDS,
+    COLUMNAR_METADATA_KEY,
+)
 
 from .octodb_pb2 import Database as ProtoDB
 
+import csv
 import json
-import pandas as pd
 from pathlib import Path
+from typing import BinaryIO
 from google.protobuf.json_format import ParseDict
 
 
 logger = Logger()
 
+# entries serialized at a time by _export_json(), bounding memory usage
+JSON_CHUNK_ROWS = 1024
+
 
 def export(self, path: PATH_ARGTYPE):
     """
-    Exports the manifest as ProtoDB, JSON, and/or CSV to the specified path.
+    Exports the manifest as ProtoDB, JSON, CSV, Parquet, and/or Arrow IPC to the specified path.
     This is a dispatcher method.
 
     Args:
         path (Union[str, Path]): A directory or a file path.
-            If a directory, all three formats are exported.
+            If a directory, ProtoDB, JSON, and CSV are exported.
             If a file path, the format is determined by the extension
-            (all extensions other than .json and .csv are treated as raw binary
-            and therefore exported as ProtoDB).
+            (.pdb, .json, .csv, .parquet, or .arrow).
+            Parquet and Arrow IPC require the optional 'pyarrow' dependency,
+            and can be loaded back with GkmasManifest(path).
     """
 
     path = Path(path)
@@ -47,6 +58,10 @@ def export(self, path: PATH_ARGTYPE):
             self._export_json(path)
         elif path.suffix == ".csv":
             self._export_csv(path)
+        elif path.suffix == ".parquet":
+            self._export_parquet(path)
+        elif path.suffix == ".arrow":
+            self._export_arrow(path)
         else:
             logger.warning("Unrecognized file extension, abort")
 
@@ -54,20 +69,66 @@ def export(self, path: PATH_ARGTYPE):
 def _export_pdb(self, path: Path):
     """
     [INTERNAL] Writes raw protobuf bytes into the specified path.
+    The original decrypted bytes are written as is, if available;
+    otherwise (e.g. for manifest from diff), entries are serialized one at a time.
     """
     try:
-        path.write_bytes(ParseDict(self.jdict, ProtoDB()).SerializeToString())
+        with path.open("wb") as f:
+            if self.raw is not None:
+                f.write(self.raw)
+            else:
+                self._write_pdb(f)
         logger.success(f"ProtoDB has been written into {path}")
     except:
         logger.warning(f"Failed to write ProtoDB into {path}")
 
 
+def _write_pdb(self, f: BinaryIO):
+    """
+    [INTERNAL] Streams the manifest into a binary file handle in protobuf wire format.
+    Each entry is written as a length-delimited field on its own, which is exactly
+    how protobuf serializes repeated messages, so the whole Database is never built.
+    """
+    tables = {"assetBundleList": self._abt, "resourceList": self._rest}
+    for fd in sorted(ProtoDB.DESCRIPTOR.fields, key=lambda fd: fd.number):
+        if fd.json_name in tables:
+            tag = _varint(fd.number << 3 | 2)  # wire type 2 (length-delimited)
+            table = tables[fd.json_name]
+            for i in range(len(table)):
+                data = table.message(i).SerializeToString()
+                f.write(tag + _varint(len(data)) + data)
+        elif self._skeleton.get(fd.json_name) is not None:
+            pdb = ParseDict({fd.json_name: self._skeleton[fd.json_name]}, ProtoDB())
+            f.write(pdb.SerializeToString())
+
+
 def _export_json(self, path: Path):
     """
     [INTERNAL] Writes JSON-serialized dictionary into the specified path.
+    Entries are serialized and written in chunks of JSON_CHUNK_ROWS, without building
+    the dictionary, while output is identical to json.dumps(self.jdict, indent=4).
     """
+    tables = {"assetBundleList": self._abt, "resourceList": self._rest}
+    encode = json.JSONEncoder(indent=4).encode
     try:
-        path.write_text(json.dumps(self.jdict, indent=4))
+        with path.open("w") as f:
+            f.write("{")
+            for n, (key, value) in enumerate(self._skeleton.items()):
+                f.write(f"{',' if n else ''}\n    {encode(key)}: ")
+                if value is not None:
+                    f.write(_indent(encode(value), 1))
+                elif not len(tables[key]):
+                    f.write("[]")
+                else:
+                    table = tables[key]
+                    f.write("[")
+                    for start in range(0, len(table), JSON_CHUNK_ROWS):
+                        stop = min(start + JSON_CHUNK_ROWS, len(table))
+                        chunk = encode([table.row(i) for i in range(start, stop)])
+                        # strip '[' and '\n]', and nest entries one level deeper
+                        f.write(("," if start else "") + _indent(chunk[1:-2], 1))
+                    f.write("\n    ]")
+            f.write("\n}" if self._skeleton else "}")
         logger.success(f"JSON has been written into {path}")
     except:
         logger.warning(f"Failed to write JSON into {path}")
@@ -78,14 +139,103 @@ def _export_csv(self, path: Path):
     [INTERNAL] Writes CSV-serialized data into the specified path.
     Assetbundles and resources are concatenated into a single table and sorted by name.
     Assetbundles can be distinguished by their '.unity3d' suffix.
+    Rows are written one at a time from the tables; only ranks are held for sorting.
     """
-    dfa = pd.DataFrame(self._abl, columns=CSV_COLUMNS)
-    dfa["name"] = dfa["name"].apply(lambda x: x + ".unity3d")
-    dfr = pd.DataFrame(self._resl, columns=CSV_COLUMNS)
-    df = pd.concat([dfa, dfr], ignore_index=True)
-    df.sort_values("name", inplace=True)
+    nab = len(self._abt)
     try:
-        df.to_csv(path, index=False)
+        with path.open("w", newline="") as f:
+            writer = csv.writer(f, lineterminator="\n")
+            writer.writerow(CSV_COLUMNS)
+            for rank in sorted(range(len(self._names)), key=self._names.__getitem__):
+                if rank < nab:
+                    table, i = self._abt, rank
+                else:
+                    table, i = self._rest, rank - nab
+                writer.writerow(
+                    [
+                        self._names[rank] if col == "name" else table.value(col, i)
+                        for col in CSV_COLUMNS
+                    ]
+                )
         logger.success(f"CSV has been written into {path}")
     except:
         logger.warning(f"Failed to write CSV into {path}")
+
+
+def _export_parquet(self, path: Path):
+    """
+    [INTERNAL] Writes all entries into the specified path as a Parquet file.
+    """
+    table = self._to_arrow()
+    import pyarrow.parquet as pq
+
+    try:
+        pq.write_table(table, path)
+        logger.success(f"Parquet has been written into {path}")
+    except:
+        logger.warning(f"Failed to write Parquet into {path}")
+
+
+def _export_arrow(self, path: Path):
+    """
+    [INTERNAL] Writes all entries into the specified path as an Arrow IPC file.
+    """
+    table = self._to_arrow()
+    import pyarrow as pa
+
+    try:
+        with pa.OSFile(str(path), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        logger.success(f"Arrow IPC has been written into {path}")
+    except:
+        logger.warning(f"Failed to write Arrow IPC into {path}")
+
+
+def _to_arrow(self):
+    """
+    [INTERNAL] Concatenates assetbundles and resources into a single Arrow table,
+    holding every Data field with its protobuf type (see table.ARROW_INT_TYPES),
+    plus a categorical COLUMNAR_KIND_COLUMN telling them apart.
+    Unlike CSV, entries are kept in manifest order and names are kept as is
+    (i.e. without '.unity3d'), so that the manifest can be restored exactly;
+    revision and other top-level fields are stored in schema metadata.
+    """
+
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ImportError("Columnar export requires 'pyarrow' to be installed")
+
+    tables = []
+    for i, table in enumerate([self._abt, self._rest]):
+        table = table.to_arrow()
+        kind = pa.DictionaryArray.from_arrays(
+            pa.array([i] * len(table), pa.int8()), COLUMNAR_KINDS
+        )
+        tables.append(table.append_column(COLUMNAR_KIND_COLUMN, kind))
+
+    metadata = {"revision": self.revision, "skeleton": self._skeleton}
+    return pa.concat_tables(tables).replace_schema_metadata(
+        {COLUMNAR_METADATA_KEY: json.dumps(metadata)}
+    )
+
+
+def _indent(text: str, level: int) -> str:
+    """
+    [INTERNAL] Indents all but the first line of a json.dumps(..., indent=4) output,
+    so that it can be nested at the given level. JSON strings never contain raw newlines.
+    """
+    return text.replace("\n", "\n" + " " * 4 * level)
+
+
+def _varint(n: int) -> bytes:
+    """
+    [INTERNAL] Encodes a non-negative integer as a protobuf varint.
+    """
+    out = bytearray()
+    while n > 0x7F:
+        out.append(n & 0x7F | 0x80)
+        n >>= 7
+    out.append(n)
+    return bytes(out)
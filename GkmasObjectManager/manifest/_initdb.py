@@ -3,28 +3,34 @@ _initdb.py
 [CLASS SPLIT] GkmasManifest protobuf initialization.
 """
 
-from ..utils import Diclist, Logger
+from ..utils import Logger, make_session
 from ..const import (
     PATH_ARGTYPE,
+    COLUMNAR_KIND_COLUMN,
+    COLUMNAR_KINDS,
+    COLUMNAR_METADATA_KEY,
     GKMAS_API_URL,
     GKMAS_API_HEADER,
     GKMAS_ONLINEPDB_KEY,
     GKMAS_OCTOCACHE_KEY,
     GKMAS_OCTOCACHE_IV,
+    DOWNLOAD_TIMEOUT,
 )
 
 from .crypt import AESCBCDecryptor
+from .table import GkmasObjectTable
 from .octodb_pb2 import Database as ProtoDB
-from ..object import GkmasAssetBundle, GkmasResource
 
-import requests
+import json
 from pathlib import Path
 from urllib.parse import urljoin
-from google.protobuf.json_format import MessageToDict
 
 
 logger = Logger()
 
+# top-level JSON fields holding manifest entries
+JDICT_LISTS = ["assetBundleList", "resourceList"]
+
 
 def _online_init(self, revision: int = 0):
     """
@@ -32,11 +38,21 @@ def _online_init(self, revision: int = 0):
     Algorithm courtesy of github.com/DreamGallery/HatsuboshiToolkit
     """
     url = urljoin(GKMAS_API_URL, str(revision))
-    enc = requests.get(url, headers=GKMAS_API_HEADER).content
+    with make_session() as session:
+        enc = session.get(
+            url, headers=GKMAS_API_HEADER, timeout=DOWNLOAD_TIMEOUT
+        ).content
+
+    key = self._snapshot_key(enc)
+    if self._load_snapshot(key):
+        logger.info("Manifest created from snapshot of online ProtoDB")
+        return
+
     cipher = AESCBCDecryptor(GKMAS_ONLINEPDB_KEY, enc[:16])
     dec = cipher.decrypt(enc[16:])
     self._parse_raw(dec)
     logger.info("Manifest created from online ProtoDB")
+    self._save_snapshot(key)
 
 
 def _offline_init(self, src: PATH_ARGTYPE):
@@ -45,6 +61,12 @@ def _offline_init(self, src: PATH_ARGTYPE):
     The protobuf referred to can be either encrypted or not.
     """
     enc = Path(src).read_bytes()
+
+    key = self._snapshot_key(enc)
+    if self._load_snapshot(key):
+        logger.info("Manifest created from snapshot")
+        return
+
     try:
         self._parse_raw(enc)
         logger.info("Manifest created from unencrypted ProtoDB")
@@ -53,19 +75,70 @@ def _offline_init(self, src: PATH_ARGTYPE):
         dec = cipher.decrypt(enc)
         self._parse_raw(dec[16:])  # trim md5 hash
         logger.info("Manifest created from encrypted ProtoDB")
+    self._save_snapshot(key)
+
+
+def _columnar_init(self, src: PATH_ARGTYPE):
+    """
+    [INTERNAL] Initializes a manifest from a Parquet or Arrow IPC file,
+    as written by GkmasManifest.export(). Requires the optional 'pyarrow' dependency.
+    """
+
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Columnar manifest requires 'pyarrow' to be installed")
+
+    src = Path(src)
+    if src.suffix == ".parquet":
+        table = pq.read_table(src)
+    else:
+        with pa.memory_map(str(src)) as source:
+            table = pa.ipc.open_file(source).read_all()
+
+    metadata = json.loads(table.schema.metadata[COLUMNAR_METADATA_KEY])
+    self.revision = metadata["revision"]
+    kinds = table.column(COLUMNAR_KIND_COLUMN).cast(pa.string())
+    abt, rest = (
+        GkmasObjectTable.from_arrow(table.filter(pc.equal(kinds, kind)).sort_by("id"))
+        for kind in COLUMNAR_KINDS
+    )
+    self._parse_tables(abt, rest, metadata["skeleton"])
+    logger.info(f"Manifest created from {src.suffix[1:].capitalize()} file")
 
 
 def _parse_raw(self, raw: bytes):
     """
-    [INTERNAL] Records raw protobuf bytes, converts to JSON,
-    and calls "secondary backend" JSON parser.
+    [INTERNAL] Records raw protobuf bytes, and reads entries straight from
+    the repeated Data messages into column tables, bypassing MessageToDict().
+    The JSON dictionary is only built on demand (see GkmasManifest.jdict).
     """
     pdb = ProtoDB()
     pdb.ParseFromString(raw)
     self.revision = pdb.revision
-    # Not moved to _parse_jdict(), since manifest from diff
+    # Not moved to _parse_tables(), since manifest from diff
     # (__sub__ magic method) manually records revision before calling it.
-    self._parse_jdict(MessageToDict(pdb))
+    self.raw = raw
+
+    # Top-level fields other than entry lists are few and small,
+    # so they are converted right away (in MessageToDict() key order);
+    # entry lists are left as placeholders, to be filled in by _build_jdict().
+    skeleton = {}
+    for fd, value in pdb.ListFields():
+        if fd.json_name in JDICT_LISTS:
+            skeleton[fd.json_name] = None
+        else:  # repeated scalars come as containers
+            skeleton[fd.json_name] = (
+                value if isinstance(value, (str, int)) else list(value)
+            )
+
+    self._parse_tables(
+        GkmasObjectTable.from_proto(sorted(pdb.assetBundleList, key=_by_id)),
+        GkmasObjectTable.from_proto(sorted(pdb.resourceList, key=_by_id)),
+        skeleton,
+    )
 
 
 def _parse_jdict(self, jdict: dict):
@@ -73,23 +146,63 @@ def _parse_jdict(self, jdict: dict):
     [INTERNAL] Parses the JSON dictionary into internal structures.
     Also *directly* called from _make_diff_manifest(),
     without handling raw protobuf in advance.
+    """
+    jdict["assetBundleList"] = sorted(jdict["assetBundleList"], key=lambda x: x["id"])
+    jdict["resourceList"] = sorted(jdict["resourceList"], key=lambda x: x["id"])
+    self._parse_tables(
+        GkmasObjectTable.from_dicts(jdict["assetBundleList"]),
+        GkmasObjectTable.from_dicts(jdict["resourceList"]),
+        {k: (None if k in JDICT_LISTS else v) for k, v in jdict.items()},
+    )
+    self._jdict = jdict  # already at hand, no need to rebuild
+
+
+def _parse_tables(
+    self,
+    abt: GkmasObjectTable,
+    rest: GkmasObjectTable,
+    skeleton: dict,
+):
+    """
+    [INTERNAL] Sets up internal structures from column tables of entries (sorted by ID).
+    This is the common backend of _parse_raw(), _parse_jdict(), and snapshot loading.
 
     Internal attributes:
-        _abl (Diclist): List of assetbundle *info dictionaries*.
-        _resl (Diclist): List of resource *info dictionaries*.
-        _name2object (dict): Mapping from object name to GkmasAssetBundle/GkmasResource.
+        _abt (GkmasObjectTable): Table of assetbundle entries.
+        _rest (GkmasObjectTable): Table of resource entries.
+        _skeleton (dict): Top-level JSON fields, with entry lists left as None.
+        _jdict (dict): Cached JSON dictionary, or None if not yet built.
+        _names (list): Object names, assetbundles first and then resources
+            (i.e. in manifest order); the index of a name is its *rank*.
+        _name2rank (dict): Mapping from object name to rank.
 
-    Documentation for Diclist can be found in utils.py.
+    Documentation for GkmasObjectTable can be found in table.py.
+    Objects (GkmasAssetBundle/GkmasResource) are not created here, but on demand
+    by GkmasManifest._object(), as lightweight handles into these tables.
     """
-    jdict["assetBundleList"] = sorted(jdict["assetBundleList"], key=lambda x: x["id"])
-    jdict["resourceList"] = sorted(jdict["resourceList"], key=lambda x: x["id"])
-    self.jdict = jdict
-    self._abl = Diclist(self.jdict["assetBundleList"])
-    self._resl = Diclist(self.jdict["resourceList"])
-    self.abs = [GkmasAssetBundle(ab) for ab in self._abl]
-    self.reses = [GkmasResource(res) for res in self._resl]
-    self._name2object = {ab.name: ab for ab in self.abs}  # quick lookup
-    self._name2object.update({res.name: res for res in self.reses})
-    logger.info(f"Found {len(self.abs)} assetbundles")
-    logger.info(f"Found {len(self.reses)} resources")
+    self._abt = abt
+    self._rest = rest
+    self._skeleton = skeleton
+    self._jdict = None
+    self._names = [name + ".unity3d" for name in abt.columns["name"]]
+    self._names.extend(rest.columns["name"])
+    self._name2rank = {name: r for r, name in enumerate(self._names)}  # quick lookup
+    self._name_index_cache = None  # see _select.py
+    logger.info(f"Found {len(abt)} assetbundles")
+    logger.info(f"Found {len(rest)} resources")
     logger.info(f"Detected revision: {self.revision}")
+
+
+def _build_jdict(self) -> dict:
+    """
+    [INTERNAL] Builds the JSON dictionary from column tables,
+    identical to what MessageToDict() would have produced from protobuf.
+    """
+    jdict = dict(self._skeleton)
+    jdict["assetBundleList"] = self._abt.to_dicts()
+    jdict["resourceList"] = self._rest.to_dicts()
+    return jdict
+
+
+def _by_id(entry) -> int:
+    return entry.id
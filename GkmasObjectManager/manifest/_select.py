@@ -0,0 +1,165 @@
+"""
+_select.py
+[CLASS SPLIT] GkmasManifest object selection by criteria.
+"""
+
+from ..const import ALL_ASSETBUNDLES, ALL_RESOURCES
+
+import re
+from bisect import bisect_left
+from itertools import islice
+from typing import Union
+
+
+# regex metacharacters that end a literal prefix
+REGEX_METACHARS = set(".^$*+?{}[]()|\\")
+
+
+def _select(self, *criteria: Union[str, "GkmasResource"]) -> list:
+    """
+    [INTERNAL] Resolves regex patterns of assetbundle/resource names into objects.
+    Allowed special tokens are const.ALL_ASSETBUNDLES and const.ALL_RESOURCES.
+    Objects (e.g. from a previous utils.DownloadResult) are resolved by name.
+
+    All patterns are compiled up front. Each pattern's literal prefix
+    (e.g. 'img_general_' for 'img_general_.*') narrows its candidates down to
+    a contiguous range of the sorted name index, found by binary search;
+    patterns without a literal prefix share a single scan over all names.
+
+    Returns a deduplicated list of objects, ordered by the first criterion that
+    matches them, and by manifest order (assetbundles, then resources) within each.
+    """
+
+    selected = dict.fromkeys(r for ranks in self._match(*criteria) for r in ranks)
+    return [self._object(r) for r in selected]
+
+
+def _match(self, *criteria: Union[str, "GkmasResource"]) -> list:
+    """
+    [INTERNAL] Resolves each criterion into the ranks of the names it matches
+    (in manifest order), as described in _select(), without deduplicating across criteria.
+    Returns a list of rank sequences, one per criterion.
+    """
+
+    names, sorted_names, rank = self._name_index()
+    nab = len(self._abt)
+    matches = [[] for _ in criteria]  # ranks of matched names, per criterion
+    unanchored = []  # (criterion index, compiled pattern)
+
+    for i, criterion in enumerate(criteria):
+        if criterion == ALL_ASSETBUNDLES:  # special tokens, enclosed in <>
+            matches[i] = range(nab)
+            continue
+        if criterion == ALL_RESOURCES:
+            matches[i] = range(nab, len(names))
+            continue
+        if not isinstance(criterion, str):
+            if criterion.name not in rank:
+                raise ValueError(f"{criterion._idname} is not in this manifest")
+            matches[i] = [rank[criterion.name]]
+            continue
+
+        pattern = re.compile(criterion)
+        prefix = _literal_prefix(criterion)
+        if not prefix:
+            unanchored.append((i, pattern))
+            continue
+
+        for name in islice(sorted_names, bisect_left(sorted_names, prefix), None):
+            if not name.startswith(prefix):
+                break
+            if pattern.match(name):
+                matches[i].append(rank[name])
+        matches[i].sort()
+
+    if unanchored:
+        for r, name in enumerate(names):
+            for i, pattern in unanchored:
+                if pattern.match(name):
+                    matches[i].append(r)
+
+    return matches
+
+
+def _name_index(self) -> tuple:
+    """
+    [INTERNAL] Lazily builds (and caches) the name index used by _select():
+    names in manifest order, the same names sorted, and a name-to-rank mapping.
+    """
+
+    if getattr(self, "_name_index_cache", None) is None:
+        self._name_index_cache = (
+            self._names,
+            sorted(self._names),
+            self._name2rank,
+        )
+
+    return self._name_index_cache
+
+
+def _literal_prefix(pattern: str) -> str:
+    """
+    [INTERNAL] Extracts the literal prefix that every string
+    matched by re.match(pattern, ...) must start with.
+    Conservatively returns an empty string if unsure.
+
+    Example:
+        'img_general_cidol.*full\\..*' -> 'img_general_cidol'
+        'sud_vo.*fktn.*' -> 'sud_vo'
+        'adv_?x' -> 'adv' (since '_' is optional)
+    """
+
+    if _has_toplevel_alternation(pattern):
+        return ""
+
+    prefix = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            # escaped metacharacters are literal, while classes like \d are not
+            if i + 1 >= len(pattern) or pattern[i + 1].isalnum():
+                break
+            char = pattern[i + 1]
+            step = 2
+        elif char in REGEX_METACHARS:
+            break
+        else:
+            step = 1
+        if pattern[i + step : i + step + 1] in ("*", "?", "{"):
+            break  # this character is optional
+        prefix.append(char)
+        i += step
+
+    return "".join(prefix)
+
+
+def _has_toplevel_alternation(pattern: str) -> bool:
+    """
+    [INTERNAL] Checks whether the pattern contains a '|' outside of any group
+    or character class, in which case it has no common literal prefix.
+    """
+
+    depth = 0
+    in_class = False
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            i += 2
+            continue
+        if in_class:
+            in_class = char != "]"
+        elif char == "[":
+            in_class = True
+            if pattern[i + 1 : i + 2] == "]":
+                i += 1  # a leading ']' is literal
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "|" and depth == 0:
+            return True
+        i += 1
+
+    return False
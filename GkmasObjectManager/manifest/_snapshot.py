@@ -0,0 +1,129 @@
+"""
+_snapshot.py
+[CLASS SPLIT] GkmasManifest on-disk snapshot cache.
+"""
+
+from ..utils import Logger
+
+from .table import GkmasObjectTable
+
+import json
+import mmap
+from hashlib import sha256
+from pathlib import Path
+
+
+logger = Logger()
+
+# bump the version byte whenever the layout (or table schema) changes
+SNAPSHOT_MAGIC = b"GKMSNAP\x01"
+SNAPSHOT_ALIGN = 8
+SNAPSHOT_LISTS = ["assetBundleList", "resourceList"]
+
+
+def _snapshot_key(self, src: bytes) -> str:
+    """
+    [INTERNAL] Derives the snapshot key from the raw (usually encrypted) source bytes.
+    """
+    return sha256(src).hexdigest()
+
+
+def _load_snapshot(self, key: str) -> bool:
+    """
+    [INTERNAL] Initializes the manifest from a snapshot, if snapshots are enabled
+    and one exists for the given key. Returns whether this succeeded.
+
+    Snapshot layout (all integers little-endian, buffers 8-byte aligned):
+        SNAPSHOT_MAGIC | header length (8 bytes) | header JSON | padding | buffers...
+    The header records the revision, the JSON skeleton of the manifest
+    (with entry lists left out), and the location of every column buffer
+    relative to the (aligned) end of header.
+    Integer columns are used straight from the memory-mapped file.
+    """
+
+    if not self._snapshot_dir:
+        return False
+
+    path = Path(self._snapshot_dir) / f"{key}.snap"
+    try:
+        with path.open("rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):  # missing, or empty file
+        return False
+
+    view = memoryview(mm)
+    try:
+        if view[: len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            raise ValueError("bad magic")
+        start = len(SNAPSHOT_MAGIC) + 8
+        hlen = int.from_bytes(view[len(SNAPSHOT_MAGIC) : start], "little")
+        header = json.loads(bytes(view[start : start + hlen]))
+        base = _align(start + hlen)
+        tables = {}
+        for lst, spec in header["tables"].items():
+            buffers = {
+                name: (typecode, view[base + offset : base + offset + length])
+                for name, typecode, offset, length in spec["buffers"]
+            }
+            tables[lst] = GkmasObjectTable.from_buffers(spec["nrow"], buffers)
+            if len(tables[lst]) != spec["nrow"]:
+                raise ValueError("truncated")
+    except (ValueError, KeyError, TypeError):
+        logger.warning(f"Snapshot {path} is corrupted, ignored")
+        return False
+
+    self.revision = header["revision"]
+    self.raw = None
+    self._parse_tables(
+        tables["assetBundleList"], tables["resourceList"], header["skeleton"]
+    )
+    return True
+
+
+def _save_snapshot(self, key: str):
+    """
+    [INTERNAL] Writes the parsed manifest into a snapshot for the given key,
+    if snapshots are enabled. Entries are stored sorted, as parsed.
+    The file is written atomically, and failures are non-fatal.
+    """
+
+    if not self._snapshot_dir:
+        return
+
+    header = {"revision": self.revision, "skeleton": self._skeleton, "tables": {}}
+    blobs = []
+    offset = 0  # relative to the aligned end of header
+
+    for lst, table in zip(SNAPSHOT_LISTS, [self._abt, self._rest]):
+        spec = {"nrow": len(table), "buffers": []}
+        for name, typecode, data in table.to_buffers():
+            spec["buffers"].append([name, typecode, offset, len(data)])
+            padding = -len(data) % SNAPSHOT_ALIGN
+            blobs.append(data + b"\0" * padding)
+            offset += len(data) + padding
+        header["tables"][lst] = spec
+
+    hbytes = json.dumps(header).encode("utf-8")
+    start = len(SNAPSHOT_MAGIC) + 8
+    padding = b"\0" * (_align(start + len(hbytes)) - start - len(hbytes))
+
+    path = Path(self._snapshot_dir) / f"{key}.snap"
+    tmp = path.with_name(path.name + ".tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tmp.open("wb") as f:
+            f.write(SNAPSHOT_MAGIC)
+            f.write(len(hbytes).to_bytes(8, "little"))
+            f.write(hbytes)
+            f.write(padding)
+            for blob in blobs:
+                f.write(blob)
+        tmp.replace(path)
+        logger.info(f"Snapshot has been written into {path}")
+    except OSError:
+        tmp.unlink(missing_ok=True)
+        logger.warning(f"Failed to write snapshot into {path}")
+
+
+def _align(n: int) -> int:
+    return n + (-n % SNAPSHOT_ALIGN)
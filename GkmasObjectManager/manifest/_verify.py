@@ -0,0 +1,135 @@
+"""
+_verify.py
+[CLASS SPLIT] GkmasManifest verification of an existing download tree.
+"""
+
+from ..utils import Logger, VerifyResult
+from ..object import GkmasResource
+from ..ledger import DownloadLedger
+from ..const import (
+    PATH_ARGTYPE,
+    IMG_RESIZE_ARGTYPE,
+    DEFAULT_DOWNLOAD_PATH,
+    DEFAULT_VERIFY_NWORKER,
+    LEDGER_FILENAME,
+    ALL_ASSETBUNDLES,
+    ALL_RESOURCES,
+)
+
+from pathlib import Path
+from typing import Union
+from concurrent.futures import ThreadPoolExecutor
+
+
+logger = Logger()
+
+
+def verify(
+    self,
+    path: PATH_ARGTYPE = DEFAULT_DOWNLOAD_PATH,
+    *criteria: Union[str, GkmasResource],
+    categorize: bool = True,
+    extract_img: bool = True,
+    img_format: str = "png",
+    img_resize: IMG_RESIZE_ARGTYPE = None,
+    nworker: int = DEFAULT_VERIFY_NWORKER,
+    ledger: PATH_ARGTYPE = None,
+    redownload: bool = False,
+) -> VerifyResult:
+    """
+    Verifies a download tree against the manifest, without any network access
+    (unless 'redownload' is True). Each object is mapped to its expected path
+    as download() would (with the same 'categorize' and image options),
+    and its file is checked for size and MD5 hash.
+
+    Files are hashed in parallel by 'nworker' threads. Each file is memory-mapped
+    and hashed in a single call, during which hashlib releases the GIL,
+    so that auditing a large tree scales with disk bandwidth rather than one core.
+    Deobfuscated assetbundles are hashed with their header obfuscated again,
+    which restores the bytes in manifest; extracted images can only be checked for existence.
+
+    Args:
+        path (Union[str, Path]) = DEFAULT_DOWNLOAD_PATH: The directory objects were downloaded to.
+        *criteria (Union[str, GkmasResource]): Regex patterns of assetbundle/resource names
+            (or objects) to verify, as in download(). If none are given, all objects are verified.
+        categorize (bool) = True: As passed to download().
+        extract_img (bool) = True: As passed to download().
+        img_format (str) = 'png': As passed to download().
+        img_resize (Union[None, str, Tuple[int, int]]) = None: As passed to download().
+            Only used when downloading again.
+        nworker (int) = DEFAULT_VERIFY_NWORKER: Number of hashing threads.
+            On disks with deep queues (e.g. NVMe or network storage), more threads
+            than CPU cores may help keep the disk busy.
+        ledger (Union[str, Path]) = None: Location of the ledger written by download().
+            Defaults to const.LEDGER_FILENAME inside 'path', if present.
+            With a ledger, files recorded with another MD5 hash are told apart as
+            outdated (rather than corrupt); without one, all mismatches are corrupt.
+        redownload (bool) = False: Whether to download invalid objects again.
+            If True, corrupt and outdated files are removed (and forgotten by the ledger),
+            and all invalid objects are downloaded with the same options.
+
+    Returns a utils.VerifyResult listing valid, missing, corrupt, outdated, and unchecked objects.
+    Invalid objects can also be downloaded again later, i.e. manifest.download(*result.invalid, ...).
+    """
+
+    objects = self._select(*(criteria or (ALL_ASSETBUNDLES, ALL_RESOURCES)))
+
+    ledger = Path(ledger) if ledger else Path(path) / LEDGER_FILENAME
+    recorder = None
+    recorded = {}
+    if ledger.exists():
+        recorder = DownloadLedger(
+            ledger, path, categorize, extract_img, img_format, img_resize
+        )
+        recorded = recorder.recorded()
+
+    def check(obj) -> tuple:
+        return obj._verify(
+            obj._download_path(path, categorize, mkdir=False), extract_img, img_format
+        )
+
+    result = VerifyResult()
+    try:
+        with ThreadPoolExecutor(max_workers=nworker) as executor:
+            for obj, (status, reason) in zip(objects, executor.map(check, objects)):
+                if status == "corrupt" and recorded.get(obj.name, obj.md5) != obj.md5:
+                    status, reason = "outdated", "recorded with another MD5 hash"
+                if status == "ok":
+                    result.valid.append(obj)
+                    continue
+                getattr(result, status).append(obj)
+                if reason and status != "unchecked":
+                    result.reasons[obj.name] = reason
+                    logger.warning(f"{obj._idname} is {status} ({reason})")
+                elif status == "missing":
+                    logger.warning(f"{obj._idname} is missing")
+
+        if redownload:
+            for obj in result.corrupt + result.outdated:
+                obj._download_path(path, categorize, mkdir=False).unlink(
+                    missing_ok=True
+                )
+            if recorder:
+                for obj in result.invalid:
+                    recorder.forget(obj)
+    finally:
+        if recorder:
+            recorder.close()
+
+    if result.invalid:
+        logger.warning(f"Verification finished: {result.summary()}")
+    else:
+        logger.success(f"Verification finished: {result.summary()}")
+
+    if redownload and result.invalid:
+        result.redownloaded = self.download(
+            *result.invalid,
+            path=path,
+            categorize=categorize,
+            extract_img=extract_img,
+            img_format=img_format,
+            img_resize=img_resize,
+            ledger=ledger if recorder else None,
+        )
+
+    return result
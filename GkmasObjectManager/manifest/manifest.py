@@ -3,8 +3,11 @@ manifest.py
 Manifest decryption, exporting, and object downloading.
 """
 
-from ..utils import Logger
+from ..utils import Logger, Diclist
 from ..const import PATH_ARGTYPE, DICLIST_IGNORED_FIELDS
+from ..object import GkmasAssetBundle, GkmasResource
+
+from pathlib import Path
 
 
 # The logger would better be a global variable in the
@@ -17,35 +20,95 @@ class GkmasManifest:
     A GKMAS manifest, containing info about assetbundles and resources.
 
     Attributes:
-        raw (bytes): Raw decrypted protobuf bytes.
+        raw (bytes): Raw decrypted protobuf bytes, or None if not parsed from protobuf
+            (i.e. for manifest from diff or from snapshot).
         revision (str): Manifest revision, a number or a string (for manifest from diff).
-        jdict (dict): JSON-serialized dictionary of the protobuf.
-        abs (list): List of GkmasAssetBundle objects.
-        reses (list): List of GkmasResource objects.
+        jdict (dict): JSON-serialized dictionary of the protobuf, built on first access.
+        abs (list): List of GkmasAssetBundle objects, created on access.
+        reses (list): List of GkmasResource objects, created on access.
 
     Methods:
         download(
-            *criteria: str,
-            nworker: int = DEFAULT_DOWNLOAD_NWORKER,
+            *criteria: Union[str, GkmasResource],
+            nworker: Union[None, int, str, Tuple[int, int]] = None,
+            path: Union[str, Path] = DEFAULT_DOWNLOAD_PATH,
+            categorize: bool = True,
+            extract_img: bool = True,
+            img_format: str = "png",
+            img_resize: Union[None, str, Tuple[int, int]] = None,
+            stream: bool = False,
+            backend: str = "thread",
+            cache: Union[str, Path] = None,
+            nprocess: int = 0,
+            max_bytes: int = DEFAULT_DOWNLOAD_MAX_BYTES,
+            retries: int = DEFAULT_DOWNLOAD_RETRIES,
+            hedge: float = None,
+            incremental: bool = False,
+            ledger: Union[str, Path] = None,
+            metrics: MetricsCollector = None,
+        ) -> DownloadResult:
+            Downloads the regex-specified assetbundles/resources to the specified path,
+            retrying transient failures, and returns succeeded/skipped/failed objects.
+        download_batch(
+            jobs: List[dict],
+            nworker: Union[None, int, str, Tuple[int, int]] = None,
+            stream: bool = False,
+            backend: str = "thread",
+            cache: Union[str, Path] = None,
+            nprocess: int = 0,
+            max_bytes: int = DEFAULT_DOWNLOAD_MAX_BYTES,
+            retries: int = DEFAULT_DOWNLOAD_RETRIES,
+            hedge: float = None,
+            metrics: MetricsCollector = None,
+        ) -> DownloadResult:
+            Downloads objects of several (criteria, path, image options) jobs in a single run
+            on a shared worker pool, routing each object to its job's destination.
+        verify(
             path: Union[str, Path] = DEFAULT_DOWNLOAD_PATH,
+            *criteria: Union[str, GkmasResource],
             categorize: bool = True,
             extract_img: bool = True,
             img_format: str = "png",
             img_resize: Union[None, str, Tuple[int, int]] = None,
-        ) -> None:
-            Downloads the regex-specified assetbundles/resources to the specified path.
+            nworker: int = DEFAULT_VERIFY_NWORKER,
+            ledger: Union[str, Path] = None,
+            redownload: bool = False,
+        ) -> VerifyResult:
+            Verifies downloaded files against the manifest in parallel, reporting
+            missing/corrupt/outdated objects, and optionally downloads them again.
         export(path: Union[str, Path]) -> None:
-            Exports the manifest as ProtoDB, JSON, and/or CSV to the specified path.
+            Exports the manifest as ProtoDB, JSON, CSV, Parquet, and/or Arrow IPC to the specified path.
     """
 
     # It's necessary to import all methods instead of merely interface/dispatcher functions;
     # otherwise, self._helper_method() in these interface functions would encounter name
     # resolution errors. Also, import * is prohibited unless importing from a module.
-    from ._initdb import _online_init, _offline_init, _parse_raw, _parse_jdict
-    from ._download import download
-    from ._export import export, _export_pdb, _export_json, _export_csv
-
-    def __init__(self, src: PATH_ARGTYPE = None):
+    from ._initdb import (
+        _online_init,
+        _offline_init,
+        _columnar_init,
+        _parse_raw,
+        _parse_jdict,
+        _parse_tables,
+        _build_jdict,
+    )
+    from ._download import download, _get_downloader
+    from ._batch import download_batch
+    from ._verify import verify
+    from ._select import _select, _match, _name_index
+    from ._snapshot import _snapshot_key, _load_snapshot, _save_snapshot
+    from ._export import (
+        export,
+        _export_pdb,
+        _write_pdb,
+        _export_json,
+        _export_csv,
+        _export_parquet,
+        _export_arrow,
+        _to_arrow,
+    )
+
+    def __init__(self, src: PATH_ARGTYPE = None, snapshot_dir: PATH_ARGTYPE = None):
         """
         Initializes a manifest from the given source.
         Only performs decryption when necessary, and
@@ -54,34 +117,82 @@ class GkmasManifest:
         Args:
             src (Union[str, Path]): Path to the manifest file.
                 Can be the path to an encrypted octocache
-                (usually named 'octocacheevai') or a decrypted protobuf.
+                (usually named 'octocacheevai') or a decrypted protobuf,
+                or a Parquet (.parquet) or Arrow IPC (.arrow) file written by export().
                 If None, an empty manifest is created (used for manifest from diff;
                 note that _parse_jdict() must be manually called afterwards).
+            snapshot_dir (Union[str, Path]) = None: A directory for parsed manifest snapshots.
+                If given, the parsed manifest is cached there, keyed by a hash of the source,
+                so that loading the same source again skips decryption and protobuf parsing.
         """
 
+        self._snapshot_dir = snapshot_dir
+        self.raw = None
+
         if not src:  # empty constructor
             self.revision = None
             return
 
         if isinstance(src, str) and src.startswith("<") and src.endswith(">"):
             self._online_init(int(src[1:-1]))
+        elif Path(src).suffix in (".parquet", ".arrow"):
+            self._columnar_init(src)
         else:
             self._offline_init(src)
 
     def __repr__(self):
         return f"<GkmasManifest revision {self.revision}>"
 
+    @property
+    def jdict(self) -> dict:
+        if self._jdict is None:
+            self._jdict = self._build_jdict()
+        return self._jdict
+
+    @property
+    def _abl(self) -> Diclist:
+        # [INTERNAL] List of assetbundle *info dictionaries*, see utils.Diclist.
+        # Built from the table without caching, unless jdict is already at hand.
+        if self._jdict is None:
+            return Diclist(self._abt.to_dicts())
+        return Diclist(self._jdict["assetBundleList"])
+
+    @property
+    def _resl(self) -> Diclist:
+        # [INTERNAL] List of resource *info dictionaries*, see utils.Diclist.
+        if self._jdict is None:
+            return Diclist(self._rest.to_dicts())
+        return Diclist(self._jdict["resourceList"])
+
+    @property
+    def abs(self) -> list:
+        return [self._object(r) for r in range(len(self._abt))]
+
+    @property
+    def reses(self) -> list:
+        return [self._object(r) for r in range(len(self._abt), len(self))]
+
+    def _object(self, rank: int):
+        """
+        [INTERNAL] Creates the object handle of the given rank (see _parse_tables()).
+        Handles are cheap and not cached; they share the manifest's column tables.
+        """
+        nab = len(self._abt)
+        if rank < nab:
+            return GkmasAssetBundle._from_table(self._abt, rank)
+        return GkmasResource._from_table(self._rest, rank - nab)
+
     def __getitem__(self, key: str):
-        return self._name2object[key]
+        return self._object(self._name2rank[key])
 
     def __iter__(self):
-        return iter(self._name2object.values())
+        return map(self._object, range(len(self)))
 
     def __len__(self):
-        return len(self._name2object)
+        return len(self._names)
 
     def __contains__(self, key: str):
-        return key in self._name2object
+        return key in self._name2rank
 
     def __sub__(self, other):
         """
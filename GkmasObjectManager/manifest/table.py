@@ -0,0 +1,300 @@
+"""
+table.py
+[INTERNAL] Columnar storage of manifest entries.
+"""
+
+from .octodb_pb2 import Data as ProtoData
+
+from array import array
+from typing import List, Tuple
+
+
+# Field name, kind, and array typecode (if any), in protobuf field number order,
+# which is also the key order of google.protobuf.json_format.MessageToDict().
+TABLE_FIELDS = [
+    ("id", "int", "q"),
+    ("filepath", "str", None),
+    ("name", "str", None),
+    ("size", "int", "q"),
+    ("crc", "int", "q"),
+    ("priority", "int", "q"),
+    ("tagid", "list", "q"),
+    ("dependencies", "list", "q"),
+    ("state", "enum", "b"),
+    ("md5", "str", None),
+    ("objectName", "str", None),
+    ("generation", "int64", "Q"),
+    ("uploadVersionId", "int", "q"),
+]
+
+TABLE_KINDS = {field: kind for field, kind, _ in TABLE_FIELDS}
+
+STATE_NAMES = [ProtoData.State.Name(i) for i in range(len(ProtoData.State.keys()))]
+STATE_VALUES = {name: i for i, name in enumerate(STATE_NAMES)}
+
+# separator for string columns in serialized form; never occurs in manifest strings
+STR_SEPARATOR = "\0"
+
+# Arrow value types of integer fields (and list items) in columnar export,
+# following protobuf, except that uint64 generation is made signed for analytics tools,
+# and size is widened so that summing it up over a manifest does not overflow.
+# Strings are 'string', and state is 'dictionary<int8, string>' (i.e. categorical).
+ARROW_INT_TYPES = {
+    "id": "int32",
+    "size": "int64",
+    "crc": "uint32",
+    "priority": "int32",
+    "tagid": "int32",
+    "dependencies": "int32",
+    "generation": "int64",
+    "uploadVersionId": "int32",
+}
+ARROW_TYPECODES = {"q": "int64", "Q": "uint64", "b": "int8"}
+
+
+class GkmasObjectTable:
+    """
+    A table of manifest entries (assetbundles or resources), stored column-wise.
+    Integer columns are compact arrays (or memoryviews into a snapshot file),
+    string columns are lists, and repeated fields are flattened with row offsets.
+
+    Attributes:
+        columns (dict): Mapping from field name to column.
+            Repeated fields map to a (values, offsets) tuple.
+
+    Methods:
+        from_proto(entries: list) -> GkmasObjectTable:
+            Builds a table from protobuf Data messages, reading fields directly.
+        from_dicts(dicts: list) -> GkmasObjectTable:
+            Builds a table from MessageToDict()-style info dictionaries.
+        value(field: str, i: int) -> Any:
+            Reconstructs a single field of the i-th entry, as in row(); None if default.
+        row(i: int) -> dict:
+            Reconstructs the i-th entry as a MessageToDict()-style dictionary.
+        to_dicts() -> list:
+            Reconstructs all entries.
+        message(i: int) -> octodb_pb2.Data:
+            Reconstructs the i-th entry as a protobuf message.
+        to_buffers() -> list:
+            Serializes all columns into raw buffers.
+        from_buffers(nrow: int, buffers: dict) -> GkmasObjectTable:
+            Restores a table from (possibly memory-mapped) raw buffers.
+        to_arrow() -> pyarrow.Table:
+            Converts all columns into a typed Arrow table.
+        from_arrow(table: pyarrow.Table) -> GkmasObjectTable:
+            Restores a table from an Arrow table with the same columns.
+    """
+
+    def __init__(self, columns: dict):
+        self.columns = columns
+        self.nrow = len(columns["id"])
+
+    def __len__(self):
+        return self.nrow
+
+    @classmethod
+    def from_proto(cls, entries: list) -> "GkmasObjectTable":
+        columns = {}
+        for field, kind, typecode in TABLE_FIELDS:
+            if kind == "str":
+                columns[field] = [getattr(d, field) for d in entries]
+            elif kind == "list":
+                values, offsets = array(typecode), array("q", [0])
+                for d in entries:
+                    values.extend(getattr(d, field))
+                    offsets.append(len(values))
+                columns[field] = (values, offsets)
+            else:
+                columns[field] = array(typecode, [getattr(d, field) for d in entries])
+        return cls(columns)
+
+    @classmethod
+    def from_dicts(cls, dicts: list) -> "GkmasObjectTable":
+        columns = {}
+        for field, kind, typecode in TABLE_FIELDS:
+            if kind == "str":
+                columns[field] = [d.get(field, "") for d in dicts]
+            elif kind == "list":
+                values, offsets = array(typecode), array("q", [0])
+                for d in dicts:
+                    values.extend(d.get(field, ()))
+                    offsets.append(len(values))
+                columns[field] = (values, offsets)
+            elif kind == "enum":
+                columns[field] = array(
+                    typecode, [STATE_VALUES[d.get(field, "NONE")] for d in dicts]
+                )
+            else:  # int64 are strings in JSON
+                columns[field] = array(typecode, [int(d.get(field, 0)) for d in dicts])
+        return cls(columns)
+
+    def value(self, field: str, i: int):
+        kind = TABLE_KINDS[field]
+        if kind == "list":
+            values, offsets = self.columns[field]
+            value = list(values[offsets[i] : offsets[i + 1]])
+        else:
+            value = self.columns[field][i]
+        if not value:
+            return None
+        if kind == "enum":
+            return STATE_NAMES[value]
+        if kind == "int64":
+            return str(value)
+        return value
+
+    def row(self, i: int) -> dict:
+        # default values are omitted, as MessageToDict() does
+        entry = {}
+        for field, kind, _ in TABLE_FIELDS:
+            if kind == "list":
+                values, offsets = self.columns[field]
+                value = list(values[offsets[i] : offsets[i + 1]])
+            else:
+                value = self.columns[field][i]
+            if not value:
+                continue
+            if kind == "enum":
+                value = STATE_NAMES[value]
+            elif kind == "int64":
+                value = str(value)
+            entry[field] = value
+        return entry
+
+    def to_dicts(self) -> list:
+        return [self.row(i) for i in range(self.nrow)]
+
+    def message(self, i: int) -> ProtoData:
+        fields = {}
+        for field, kind, _ in TABLE_FIELDS:
+            if kind == "list":
+                values, offsets = self.columns[field]
+                fields[field] = list(values[offsets[i] : offsets[i + 1]])
+            else:
+                fields[field] = self.columns[field][i]
+        return ProtoData(**fields)
+
+    def to_buffers(self) -> List[Tuple[str, str, bytes]]:
+        """
+        Returns a list of (buffer name, typecode, raw bytes);
+        string columns have typecode None and are separator-joined UTF-8.
+        """
+        buffers = []
+        for field, kind, typecode in TABLE_FIELDS:
+            column = self.columns[field]
+            if kind == "str":
+                data = STR_SEPARATOR.join(column).encode("utf-8")
+                buffers.append((field, None, data))
+            elif kind == "list":
+                buffers.append((field, typecode, column[0].tobytes()))
+                buffers.append((f"{field}.offsets", "q", column[1].tobytes()))
+            else:
+                buffers.append((field, typecode, column.tobytes()))
+        return buffers
+
+    @classmethod
+    def from_buffers(cls, nrow: int, buffers: dict) -> "GkmasObjectTable":
+        """
+        Restores a table from a mapping of buffer name to (typecode, buffer).
+        Integer columns are cast in place (zero-copy) from the given memoryviews;
+        string columns are decoded, since they are needed as Python strings anyway.
+        """
+
+        def restore(name):
+            typecode, buf = buffers[name]
+            if typecode is None:
+                text = bytes(buf).decode("utf-8")
+                return text.split(STR_SEPARATOR) if nrow else []
+            return memoryview(buf).cast(typecode)
+
+        columns = {}
+        for field, kind, _ in TABLE_FIELDS:
+            if kind == "list":
+                columns[field] = (restore(field), restore(f"{field}.offsets"))
+            else:
+                columns[field] = restore(field)
+        return cls(columns)
+
+    def to_arrow(self):
+        """
+        Converts all columns into an Arrow table (requires 'pyarrow').
+        Integer columns are handed over as buffers, without going through Python objects.
+        """
+        import pyarrow as pa
+
+        arrays = []
+        for field, kind, typecode in TABLE_FIELDS:
+            column = self.columns[field]
+            if kind == "str":
+                arrays.append(pa.array(column, pa.string()))
+            elif kind == "enum":
+                indices = _int_array(pa, column, typecode)
+                arrays.append(pa.DictionaryArray.from_arrays(indices, STATE_NAMES))
+            elif kind == "list":
+                values, offsets = column
+                arrays.append(
+                    pa.ListArray.from_arrays(
+                        _int_array(pa, offsets, "q").cast(pa.int32()),
+                        _int_array(pa, values, typecode).cast(
+                            getattr(pa, ARROW_INT_TYPES[field])()
+                        ),
+                    )
+                )
+            else:
+                arrays.append(
+                    _int_array(pa, column, typecode).cast(
+                        getattr(pa, ARROW_INT_TYPES[field])()
+                    )
+                )
+
+        return pa.Table.from_arrays(arrays, names=[f for f, _, _ in TABLE_FIELDS])
+
+    @classmethod
+    def from_arrow(cls, table) -> "GkmasObjectTable":
+        """
+        Restores a table from an Arrow table (requires 'pyarrow').
+        Missing values are read as protobuf defaults, and column types are coerced,
+        so that files rewritten by other tools (e.g. pandas) can also be loaded.
+        """
+        import pyarrow as pa
+
+        columns = {}
+        for field, kind, typecode in TABLE_FIELDS:
+            column = table.column(field).combine_chunks()
+            if kind == "str":
+                columns[field] = column.cast(pa.string()).fill_null("").to_pylist()
+            elif kind == "enum":
+                states = column.cast(pa.string()).fill_null("NONE").to_pylist()
+                columns[field] = array(typecode, [STATE_VALUES[s] for s in states])
+            elif kind == "list":
+                offsets = column.offsets.to_pylist()
+                columns[field] = (
+                    array(typecode, column.flatten().to_pylist()),
+                    array("q", [o - offsets[0] for o in offsets]),
+                )
+            else:
+                itemtype = getattr(pa, ARROW_TYPECODES[typecode])()
+                columns[field] = _int_view(column.cast(itemtype).fill_null(0), typecode)
+
+        return cls(columns)
+
+
+def _int_array(pa, column, typecode: str):
+    """
+    [INTERNAL] Wraps an integer column (array or memoryview) as an Arrow array, zero-copy.
+    """
+    itemtype = getattr(pa, ARROW_TYPECODES[typecode])()
+    return pa.Array.from_buffers(itemtype, len(column), [None, pa.py_buffer(column)])
+
+
+def _int_view(arr, typecode: str) -> memoryview:
+    """
+    [INTERNAL] Views a (null-free) Arrow integer array as a memoryview, zero-copy.
+    """
+    if not len(arr):
+        return memoryview(array(typecode))
+    itemsize = array(typecode).itemsize
+    start = arr.offset * itemsize
+    return memoryview(arr.buffers()[1])[start : start + len(arr) * itemsize].cast(
+        typecode
+    )
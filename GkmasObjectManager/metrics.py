@@ -0,0 +1,289 @@
+"""
+metrics.py
+Download metrics collection and export.
+"""
+
+from .const import PATH_ARGTYPE, METRICS_BUCKETS, METRICS_PREFIX, METRICS_QUANTILES
+
+import json
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import Future
+from pathlib import Path
+
+
+class Histogram:
+    """
+    A cumulative histogram of durations (in seconds) over fixed buckets,
+    in the fashion of Prometheus histograms.
+
+    Attributes:
+        buckets (tuple): Upper bounds of buckets, in ascending order
+            (an implicit '+Inf' bucket follows).
+        counts (list): Number of observations falling into each bucket (non-cumulative).
+        count (int): Total number of observations.
+        sum (float): Sum of all observations.
+        max (float): Largest observation.
+
+    Methods:
+        observe(value: float): Records an observation.
+        merge(other: Histogram): Adds up another histogram with the same buckets.
+        quantile(q: float) -> float: Estimates the q-quantile by linear interpolation
+            within buckets, as Prometheus' histogram_quantile() does.
+    """
+
+    def __init__(self, buckets: tuple = METRICS_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def merge(self, other: "Histogram"):
+        for i, n in enumerate(other.counts):
+            self.counts[i] += n
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / n, self.max)
+            seen += n
+        return self.max
+
+
+class MetricsCollector:
+    """
+    A thread-safe collector of download metrics, i.e. counters (objects by outcome,
+    bytes received and written) and per-stage duration histograms. Stages are:
+    'network' (transfer), 'md5' (verification), 'deobfuscate', 'unitypy' (image extraction),
+    'resize', 'encode' (image encoding), and 'disk_write' (including cache copies).
+    Pass one to GkmasManifest.download(metrics=...) to see which stage limits throughput.
+
+    Attributes:
+        enabled (bool): Whether anything is recorded; a disabled collector is a no-op.
+        path (Union[str, Path]): If given, a snapshot is written here every 'interval' seconds
+            while recording, and at the end of each download() call (see export()).
+        interval (float): Minimum number of seconds between periodic snapshots.
+
+    Methods:
+        count(name: str, value: int = 1): Increments a counter.
+        observe(stage: str, seconds: float): Records a stage duration.
+        time(stage: str) -> ContextManager: Times the enclosed block as a stage.
+        merge(other: MetricsCollector): Adds up another collector, e.g. one returned
+            from a worker process, into this one.
+        collect(future: Future): Merges the collector a future resolves to, once done
+            (or counts an 'extractions_failed' if it raises).
+        counter(name: str) -> int: Returns a counter value.
+        quantile(stage: str, q: float) -> float: Estimates a stage duration quantile.
+        snapshot() -> dict: Returns counters, rates, and stage summaries.
+        export(path: Union[str, Path]): Writes a snapshot as JSON (.json)
+            or in Prometheus text exposition format (any other extension, usually .prom).
+    """
+
+    def __init__(
+        self,
+        path: PATH_ARGTYPE = None,
+        interval: float = 10.0,
+        enabled: bool = True,
+    ):
+        """
+        Initializes an empty collector.
+
+        Args:
+            path (Union[str, Path]) = None: Where to write periodic snapshots, if anywhere.
+                Prometheus node_exporter picks up '*.prom' files from its textfile directory.
+            interval (float) = 10.0: Minimum number of seconds between periodic snapshots.
+            enabled (bool) = True: If False, all methods return immediately.
+        """
+        self.enabled = enabled
+        self.path = path
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._first = None  # monotonic time of first record, for rates
+        self._last = None
+        self._exported = time.monotonic()
+
+    def __getstate__(self):
+        # locks cannot be pickled (i.e. sent to a worker process)
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"<MetricsCollector {self._counters}>"
+
+    def count(self, name: str, value: int = 1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+            due = self._touch()
+        if due:
+            self.export(self.path)
+
+    def observe(self, stage: str, seconds: float):
+        if not self.enabled:
+            return
+        with self._lock:
+            if stage not in self._histograms:
+                self._histograms[stage] = Histogram()
+            self._histograms[stage].observe(seconds)
+            due = self._touch()
+        if due:
+            self.export(self.path)
+
+    def time(self, stage: str):
+        if not self.enabled:
+            return nullcontext()
+        return self._time(stage)
+
+    @contextmanager
+    def _time(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def merge(self, other: "MetricsCollector"):
+        if not (self.enabled and other is not None and other.enabled):
+            return
+        with self._lock:
+            for name, value in other._counters.items():
+                self._counters[name] = self._counters.get(name, 0) + value
+            for stage, histogram in other._histograms.items():
+                if stage not in self._histograms:
+                    self._histograms[stage] = Histogram(histogram.buckets)
+                self._histograms[stage].merge(histogram)
+            self._touch()
+
+    def collect(self, future: Future):
+        if not self.enabled:
+            return
+
+        def merge_result(f: Future):
+            if f.cancelled():
+                return
+            if f.exception():
+                self.count("extractions_failed")
+            else:
+                self.merge(f.result())
+
+        future.add_done_callback(merge_result)
+
+    def counter(self, name: str) -> int:
+        return self._counters.get(name, 0)
+
+    def quantile(self, stage: str, q: float) -> float:
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            return histogram.quantile(q) if histogram else 0.0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            elapsed = (self._last - self._first) if self._first is not None else 0.0
+            counters = dict(self._counters)
+            stages = {}
+            for stage, h in self._histograms.items():
+                stages[stage] = {
+                    "count": h.count,
+                    "sum": h.sum,
+                    "mean": h.sum / h.count if h.count else 0.0,
+                    "max": h.max,
+                    **{f"p{int(q * 100)}": h.quantile(q) for q in METRICS_QUANTILES},
+                }
+        rates = {
+            f"{name}_per_second": (value / elapsed if elapsed else 0.0)
+            for name, value in counters.items()
+        }
+        return {
+            "elapsed": elapsed,
+            "counters": counters,
+            "rates": rates,
+            "stages": stages,
+        }
+
+    def export(self, path: PATH_ARGTYPE):
+        """
+        Writes a snapshot into the specified path, atomically
+        (so that scrapers never see a partial file).
+        """
+        path = Path(path)
+        text = self._to_json() if path.suffix == ".json" else self._to_prometheus()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        tmp.write_text(text)
+        tmp.replace(path)
+
+    def _touch(self) -> bool:
+        """
+        [INTERNAL] Updates record times (with the lock held),
+        and returns whether a periodic snapshot is due.
+        """
+        now = time.monotonic()
+        if self._first is None:
+            self._first = now
+        self._last = now
+        if self.path and now - self._exported >= self.interval:
+            self._exported = now
+            return True
+        return False
+
+    def _to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=4)
+
+    def _to_prometheus(self) -> str:
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {
+                stage: (h.buckets, list(h.counts), h.count, h.sum)
+                for stage, h in self._histograms.items()
+            }
+
+        lines = []
+        for name, value in sorted(counters.items()):
+            metric = f"{METRICS_PREFIX}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+
+        metric = f"{METRICS_PREFIX}_stage_seconds"
+        if histograms:
+            lines.append(f"# TYPE {metric} histogram")
+        for stage, (buckets, counts, count, total) in sorted(histograms.items()):
+            cumulative = 0
+            for upper, n in zip(list(buckets) + ["+Inf"], counts):
+                cumulative += n
+                lines.append(
+                    f'{metric}_bucket{{stage="{stage}",le="{upper}"}} {cumulative}'
+                )
+            lines.append(f'{metric}_sum{{stage="{stage}"}} {total}')
+            lines.append(f'{metric}_count{{stage="{stage}"}} {count}')
+
+        return "\n".join(lines) + "\n"
+
+
+# shared no-op collector, used wherever metrics are not asked for
+NO_METRICS = MetricsCollector(enabled=False)
@@ -3,28 +3,43 @@ _download.py
 [CLASS SPLIT] GkmasAssetBundle and GkmasResource downloading.
 """
 
-from ..utils import Logger
+from ..utils import Logger, DownloadError, HedgePolicy
+from ..metrics import MetricsCollector, NO_METRICS
 from ..const import (
     PATH_ARGTYPE,
+    IMG_RESIZE_ARGTYPE,
+    DEFAULT_DOWNLOAD_PATH,
     GKMAS_OBJECT_SERVER,
+    DOWNLOAD_CHUNK_SIZE,
+    DOWNLOAD_TIMEOUT,
     CHARACTER_ABBREVS,
 )
 
+import os
 import re
+import json
+import time
+import shutil
+import asyncio
 import requests
+import threading
 from hashlib import md5
 from pathlib import Path
 from urllib.parse import urljoin
+from typing import Any, Callable, Tuple, Union
+from concurrent.futures import Executor, as_completed, wait
 
 
 logger = Logger()
 
 
-def _download_path(self, path: PATH_ARGTYPE, categorize: bool) -> Path:
+def _download_path(
+    self, path: PATH_ARGTYPE, categorize: bool, mkdir: bool = True
+) -> Path:
     """
     [INTERNAL] Refines the download path based on user input.
     Appends subdirectories unless a definite file path (with suffix) is given.
-    Delimiter is hardcoded as '_'.
+    Delimiter is hardcoded as '_'. Parent directories are created if 'mkdir' is True.
 
     path is not necessarily of type Path,
     since we don't expect the client to import pathlib in advance.
@@ -43,7 +58,8 @@ def _download_path(self, path: PATH_ARGTYPE, categorize: bool) -> Path:
         else:
             path = path / self.name
 
-    path.parent.mkdir(parents=True, exist_ok=True)
+    if mkdir:
+        path.parent.mkdir(parents=True, exist_ok=True)
     return path
 
 
@@ -67,27 +83,582 @@ def _determine_subdir(self, filename: str) -> Path:
     return Path(*filename.split("_"))
 
 
-def _download_bytes(self) -> bytes:
+def _download_bytes(
+    self,
+    session: requests.Session = None,
+    metrics: MetricsCollector = NO_METRICS,
+    hedge: HedgePolicy = None,
+) -> bytes:
     """
     [INTERNAL] Downloads the resource from the server and performs sanity checks
     on HTTP status code, size, and MD5 hash. Returns the resource as raw bytes.
+    If a session is given, its pooled keep-alive connections are reused.
+    If a hedge policy is given, a late transfer is raced by a duplicate (see _fetch_hedged()).
     """
 
-    url = urljoin(GKMAS_OBJECT_SERVER, self.objectName)
-    response = requests.get(url)
+    with metrics.time("network"):
+        if hedge:
+            content = self._fetch_hedged(session, hedge, metrics)
+        else:
+            content = self._fetch(session)
+    metrics.count("bytes_received", len(content))
 
-    # We're being strict here by aborting the download process
-    # if any of the sanity checks fail, in order to avoid corrupted output.
-    # The client can always retry (just ignore the "file already exists" warnings).
+    # We're being strict here by failing the download if any of the sanity checks fail,
+    # in order to avoid corrupted output. Dispatchers retry such failures with backoff.
     # Note: Returning empty bytes is unnecessary, since logger.error() raises an exception.
 
-    if response.status_code != 200:
-        logger.error(f"{self._idname} download failed")
+    if len(content) != self.size:
+        self._integrity_error("has invalid size")
+
+    with metrics.time("md5"):
+        digest = md5(content).hexdigest()
+    if digest != self.md5:
+        self._integrity_error("has invalid MD5 hash")
+
+    return content
+
+
+def _fetch(
+    self,
+    session: requests.Session = None,
+    cancel: threading.Event = None,
+) -> Union[bytes, None]:
+    """
+    [INTERNAL] Requests the resource from the server within DOWNLOAD_TIMEOUT,
+    and checks the HTTP status code. Returns the response body.
+    If 'cancel' is given, the body is read in chunks, and abandoned
+    (returning None) as soon as the event is set.
+    """
+
+    url = urljoin(GKMAS_OBJECT_SERVER, self.objectName)
+    if cancel is None:
+        response = (session or requests).get(url, timeout=DOWNLOAD_TIMEOUT)
+        if response.status_code != 200:
+            self._status_error(response.status_code)
+        return response.content
+
+    with (session or requests).get(
+        url, timeout=DOWNLOAD_TIMEOUT, stream=True
+    ) as response:
+        if response.status_code != 200:
+            self._status_error(response.status_code)
+        chunks = []
+        for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+            if cancel.is_set():
+                return None
+            chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def _fetch_hedged(
+    self,
+    session: requests.Session,
+    hedge: HedgePolicy,
+    metrics: MetricsCollector = NO_METRICS,
+) -> bytes:
+    """
+    [INTERNAL] Runs _fetch() on the hedge policy's executor; if it is still running
+    after hedge.delay(), fires a duplicate request, and returns the body of whichever
+    succeeds first. The other is abandoned, and errors are raised only if both fail
+    (the primary's first). The winning latency is fed back into the policy.
+    """
+
+    cancel = threading.Event()
+    start = time.perf_counter()
+    futures = [hedge.executor.submit(self._fetch, session, cancel)]
+
+    try:
+        done, _ = wait(futures, timeout=hedge.delay(self.size))
+        if not done:
+            metrics.count("requests_hedged")
+            futures.append(hedge.executor.submit(self._fetch, session, cancel))
+        for future in as_completed(futures):
+            if future.exception() is None:
+                hedge.record(self.size, time.perf_counter() - start)
+                if future is not futures[0]:
+                    metrics.count("hedges_won")
+                return future.result()
+        return futures[0].result()
+    finally:
+        cancel.set()
+
+
+def _status_error(self, status: int):
+    """
+    [INTERNAL] Logs and raises a DownloadError for an unexpected HTTP status,
+    so that dispatchers can tell throttling and server errors apart.
+    """
+    message = f"{self._idname} download failed (HTTP {status})"
+    logger.error(message, DownloadError(message, status))
+
+
+def _integrity_error(self, reason: str):
+    """
+    [INTERNAL] Logs and raises a DownloadError (without status) for a payload
+    that fails a sanity check, e.g. a truncated transfer or a corrupted byte.
+    """
+    message = f"{self._idname} {reason}"
+    logger.error(message, DownloadError(message))
+
+
+async def _download_bytes_async(
+    self,
+    session: "aiohttp.ClientSession",
+    metrics: MetricsCollector = NO_METRICS,
+    hedge: HedgePolicy = None,
+) -> bytes:
+    """
+    [INTERNAL] Coroutine counterpart of _download_bytes(),
+    performing the same sanity checks over an aiohttp session
+    (whose timeouts are set by utils.AsyncDownloader).
+    """
+
+    with metrics.time("network"):  # including time spent waiting for the event loop
+        if hedge:
+            content = await self._fetch_hedged_async(session, hedge, metrics)
+        else:
+            content = await self._fetch_async(session)
+    metrics.count("bytes_received", len(content))
+
+    if len(content) != self.size:
+        self._integrity_error("has invalid size")
+
+    with metrics.time("md5"):
+        digest = md5(content).hexdigest()
+    if digest != self.md5:
+        self._integrity_error("has invalid MD5 hash")
+
+    return content
+
+
+async def _fetch_async(self, session: "aiohttp.ClientSession") -> bytes:
+    """
+    [INTERNAL] Coroutine counterpart of _fetch().
+    Abandoning a transfer is done by cancelling the coroutine.
+    """
+
+    url = urljoin(GKMAS_OBJECT_SERVER, self.objectName)
+    async with session.get(url) as response:
+        if response.status != 200:
+            self._status_error(response.status)
+        return await response.read()
+
+
+async def _fetch_hedged_async(
+    self,
+    session: "aiohttp.ClientSession",
+    hedge: HedgePolicy,
+    metrics: MetricsCollector = NO_METRICS,
+) -> bytes:
+    """
+    [INTERNAL] Coroutine counterpart of _fetch_hedged(),
+    where the losing transfer is cancelled right away.
+    """
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    tasks = [asyncio.ensure_future(self._fetch_async(session))]
+
+    try:
+        done, pending = await asyncio.wait(tasks, timeout=hedge.delay(self.size))
+        if not done:
+            metrics.count("requests_hedged")
+            tasks.append(asyncio.ensure_future(self._fetch_async(session)))
+            pending = set(tasks)
+        while done or pending:
+            for task in done:
+                if task.exception() is None:
+                    hedge.record(self.size, loop.time() - start)
+                    if task is not tasks[0]:
+                        metrics.count("hedges_won")
+                    return task.result()
+            if not pending:
+                break
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+        return tasks[0].result()
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def _download_async(
+    self,
+    session: "aiohttp.ClientSession",
+    executor: Executor = None,
+    extractor: Executor = None,
+    path: PATH_ARGTYPE = DEFAULT_DOWNLOAD_PATH,
+    categorize: bool = True,
+    extract_img: bool = True,
+    img_format: str = "png",
+    img_resize: IMG_RESIZE_ARGTYPE = None,
+    cache: PATH_ARGTYPE = None,
+    hedge: HedgePolicy = None,
+    metrics: MetricsCollector = None,
+    force: bool = False,
+):
+    """
+    [INTERNAL] Coroutine counterpart of download(), used by utils.AsyncDownloader.
+    Network transfer runs on the event loop, while the CPU-bound _save()
+    (deobfuscation, image extraction, and disk write) is sent to 'executor',
+    or to 'extractor' (usually a process pool) if an image is to be extracted.
+    Arguments are the same as download(), except that streaming is not supported.
+    Returns the outcome as download() does.
+    """
+
+    metrics = metrics or NO_METRICS
+    path = self._download_path(path, categorize)
+    if force:
+        path.unlink(missing_ok=True)  # also unshares a hardlinked cache entry
+    elif self._is_complete(path):
+        metrics.count("objects_skipped")
+        return "skipped"
+
+    loop = asyncio.get_running_loop()
+    hit = self._cache_hit(cache)
+    outcome = "cached" if hit else "downloaded"
+    if hit:
+        enc = await loop.run_in_executor(executor, hit.read_bytes)
+        metrics.count("objects_cached")
+    else:
+        enc = await self._download_bytes_async(session, metrics, hedge)
+        if cache:
+            await loop.run_in_executor(
+                executor, self._cache_store, cache, enc, True, metrics
+            )
+        metrics.count("objects_downloaded")
+
+    if extractor and self._will_extract(extract_img):
+        # a worker process records into a collector of its own, merged back here
+        child = MetricsCollector(enabled=metrics.enabled)
+        child = await loop.run_in_executor(
+            extractor, self._save, path, enc, extract_img, img_format, img_resize, child
+        )
+        metrics.merge(child)
+    else:
+        await loop.run_in_executor(
+            executor,
+            self._save,
+            path,
+            enc,
+            extract_img,
+            img_format,
+            img_resize,
+            metrics,
+        )
+    return outcome
+
+
+def _download_stream(
+    self,
+    path: Path,
+    session: requests.Session = None,
+    head_filter: Callable[[bytes], Tuple[bytes, Any]] = None,
+    head_len: int = 0,
+    cache: PATH_ARGTYPE = None,
+    metrics: MetricsCollector = NO_METRICS,
+) -> Any:
+    """
+    [INTERNAL] Streams the resource from the server directly into 'path',
+    reading DOWNLOAD_CHUNK_SIZE bytes at a time, so that memory usage stays bounded
+    regardless of object size. Size and MD5 hash are checked incrementally
+    against the *received* bytes; data is written to a '.part' file,
+    which is atomically renamed to 'path' only if all sanity checks pass.
+
+    The '.part' file is accompanied by a '.part.json' sidecar recording the expected
+    MD5 hash and size. If a transfer is interrupted, the partial file is kept,
+    and the next attempt resumes from where it left off with an HTTP Range request
+    (provided the sidecar still matches); the full hash is verified at the end.
+
+    If 'head_filter' is given, the first 'head_len' bytes (or the entire object,
+    if shorter) are passed through it and rewritten in place after verification,
+    so that the '.part' file always holds raw server bytes.
+    The filter returns the bytes to write (of the same length) and an auxiliary value,
+    the latter of which is returned from this method.
+
+    If 'cache' is given, the verified raw bytes are also stored there (see _cache_store()).
+    Since transfer, hashing, and writing are interleaved, the latter two are timed
+    chunk by chunk, and the rest of the transfer time is recorded as 'network'.
+    """
+
+    url = urljoin(GKMAS_OBJECT_SERVER, self.objectName)
+    part = path.with_name(path.name + ".part")
+    sidecar = path.with_name(path.name + ".part.json")
+    hasher = md5()
+    with metrics.time("md5"):
+        size = self._resume_part(part, sidecar, hasher)
+    aux = None
+
+    if size < self.size:
+        start = time.perf_counter()
+        t_md5 = t_write = 0.0
+        received = 0
+        headers = {"Range": f"bytes={size}-"} if size else {}
+        with (session or requests).get(
+            url, headers=headers, stream=True, timeout=DOWNLOAD_TIMEOUT
+        ) as response:
+            if size and response.status_code == 200:
+                # server ignored the Range header; start over
+                logger.warning(f"{self._idname} cannot be resumed, restarting")
+                hasher = md5()
+                size = 0
+            elif response.status_code not in (200, 206):
+                self._status_error(response.status_code)
 
-    if len(response.content) != self.size:
-        logger.error(f"{self._idname} has invalid size")
+            sidecar.write_text(json.dumps({"md5": self.md5, "size": self.size}))
+            with part.open("ab" if size else "wb") as f:
+                for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                    t0 = time.perf_counter()
+                    hasher.update(chunk)
+                    t1 = time.perf_counter()
+                    size += len(chunk)
+                    received += len(chunk)
+                    if size > self.size:
+                        self._discard_part(part, sidecar)
+                        self._integrity_error("has invalid size")
+                    f.write(chunk)
+                    t_md5 += t1 - t0
+                    t_write += time.perf_counter() - t1
+
+        metrics.observe("network", time.perf_counter() - start - t_md5 - t_write)
+        metrics.observe("md5", t_md5)
+        metrics.observe("disk_write", t_write)
+        metrics.count("bytes_received", received)
+        metrics.count("bytes_written", received)
+
+    if size != self.size:
+        self._integrity_error("has invalid size")  # partial file is kept
+
+    if hasher.hexdigest() != self.md5:
+        self._discard_part(part, sidecar)
+        self._integrity_error("has invalid MD5 hash")
+
+    if cache:
+        # a hardlink would be clobbered by the in-place header rewrite below
+        self._cache_store(cache, part, link=head_filter is None, metrics=metrics)
+
+    if head_filter:
+        with metrics.time("deobfuscate"):
+            aux = _filter_head(part, head_filter, head_len)
+
+    part.replace(path)
+    sidecar.unlink(missing_ok=True)
+    return aux
+
+
+def _resume_part(self, part: Path, sidecar: Path, hasher) -> int:
+    """
+    [INTERNAL] Inspects a '.part' file left over by an interrupted _download_stream().
+    If its sidecar matches the expected MD5 hash and size, feeds the partial bytes
+    into 'hasher' and returns their length; otherwise, discards them and returns 0.
+    """
+
+    try:
+        meta = json.loads(sidecar.read_text())
+        size = part.stat().st_size
+    except (OSError, ValueError):
+        self._discard_part(part, sidecar)
+        return 0
+
+    if meta != {"md5": self.md5, "size": self.size} or size > self.size:
+        self._discard_part(part, sidecar)
+        return 0
+
+    with part.open("rb") as f:
+        while chunk := f.read(DOWNLOAD_CHUNK_SIZE):
+            hasher.update(chunk)
+
+    logger.info(f"{self._idname} resuming from byte {size}")
+    return size
+
+
+def _discard_part(self, part: Path, sidecar: Path):
+    """
+    [INTERNAL] Removes a (possibly nonexistent) '.part' file and its sidecar.
+    """
+    part.unlink(missing_ok=True)
+    sidecar.unlink(missing_ok=True)
+
+
+def _is_complete(self, path: Path) -> bool:
+    """
+    [INTERNAL] Checks whether a previous download into 'path' can be skipped.
+    An existing file is deemed complete if its size matches the manifest,
+    which holds for raw resources and (deobfuscated) assetbundles alike.
+    Content is not read, so that a repeated download stays cheap on large trees;
+    altered files are caught by GkmasManifest.verify() (or the ledger) instead.
+    A truncated file is left in place and replaced once the new download succeeds;
+    only '.part' files (see _download_stream()) are ever discarded automatically.
+    """
+
+    try:
+        size = path.stat().st_size
+    except OSError:
+        return False
+
+    if size == self.size:
+        logger.warning(f"{self._idname} already exists")
+        return True
+
+    reason = "truncated" if size < self.size else "of invalid size"
+    logger.warning(f"{self._idname} exists but is {reason}, redownloading")
+    return False
+
+
+def _cache_path(self, cache: PATH_ARGTYPE) -> Path:
+    """
+    [INTERNAL] Locates the raw (still obfuscated) payload of this object
+    in a content-addressed cache directory, where files are keyed by MD5 hash.
+    """
+    return Path(cache) / self.md5[:2] / self.md5
+
+
+def _cache_hit(self, cache: PATH_ARGTYPE) -> Union[Path, None]:
+    """
+    [INTERNAL] Returns the cached payload of this object if present and intact
+    (judged by size, since only verified payloads are ever stored), or None.
+    """
+
+    if not cache:
+        return None
+
+    hit = self._cache_path(cache)
+    try:
+        if hit.stat().st_size == self.size:
+            return hit
+    except OSError:
+        pass
+    return None
+
+
+def _cache_store(
+    self,
+    cache: PATH_ARGTYPE,
+    src: Union[Path, bytes],
+    link: bool = True,
+    metrics: MetricsCollector = NO_METRICS,
+):
+    """
+    [INTERNAL] Stores the verified raw payload of this object into the cache.
+    'src' can be raw bytes or a file holding them; in the latter case,
+    the file is hardlinked into the cache if 'link' is True (and copied otherwise).
+    The cache entry is created atomically, so concurrent readers never see partial data.
+    """
+
+    dst = self._cache_path(cache)
+    if dst.exists():
+        return
+
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst.with_name(f"{dst.name}.{os.getpid()}.{id(self)}.tmp")
+    try:
+        with metrics.time("disk_write"):
+            if isinstance(src, Path):
+                (_link_or_copy if link else _copy)(src, tmp)
+            else:
+                tmp.write_bytes(src)
+            tmp.replace(dst)
+    except OSError:
+        tmp.unlink(missing_ok=True)
+        logger.warning(f"{self._idname} cannot be cached")
+
+
+def _materialize(
+    self,
+    src: Path,
+    path: Path,
+    head_filter: Callable[[bytes], Tuple[bytes, Any]] = None,
+    head_len: int = 0,
+    metrics: MetricsCollector = NO_METRICS,
+) -> Any:
+    """
+    [INTERNAL] Populates 'path' with a cached payload without any network access.
+    Hardlinks the cache entry if the output is byte-identical to it; otherwise,
+    copies it and rewrites the header with 'head_filter' (as in _download_stream()).
+    """
+
+    if head_filter:
+        with metrics.time("deobfuscate"):
+            with src.open("rb") as f:
+                head = f.read(head_len)
+            new, aux = head_filter(head)
+        if new != head:
+            tmp = path.with_name(path.name + ".tmp")
+            with metrics.time("disk_write"):
+                _copy(src, tmp)
+                _filter_head(tmp, head_filter, head_len)
+                tmp.replace(path)
+            return aux
+    else:
+        aux = None
+
+    with metrics.time("disk_write"):
+        _link_or_copy(src, path)
+    return aux
+
+
+def _filter_head(path: Path, head_filter: Callable, head_len: int) -> Any:
+    """
+    [INTERNAL] Rewrites the first 'head_len' bytes of a file in place
+    with 'head_filter', and returns the filter's auxiliary value.
+    """
+    with path.open("r+b") as f:
+        head, aux = head_filter(f.read(head_len))
+        f.seek(0)
+        f.write(head)
+    return aux
+
+
+def _write(path: Path, data: bytes, metrics: MetricsCollector = NO_METRICS):
+    """
+    [INTERNAL] Writes bytes into the specified path, as a timed 'disk_write' stage.
+    The bytes are written aside and renamed over 'path', so that an existing file there,
+    which may share its inode with a cache entry (see _cache_store()), is replaced
+    rather than truncated, and a partially written file never appears at 'path'.
+    """
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with metrics.time("disk_write"):
+        try:
+            tmp.write_bytes(data)
+            tmp.replace(path)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+    metrics.count("bytes_written", len(data))
+
+
+def _link_or_copy(src: Path, dst: Path):
+    """
+    [INTERNAL] Hardlinks 'src' to 'dst', falling back to a copy
+    (e.g. across filesystems, or where hardlinks are unsupported).
+    """
+    dst.unlink(missing_ok=True)
+    try:
+        os.link(src, dst)
+    except OSError:
+        _copy(src, dst)
+
+
+def _copy(src: Path, dst: Path):
+    """
+    [INTERNAL] Copies 'src' to 'dst'. Where available, copy_file_range()
+    is used, so that copy-on-write filesystems can share extents (reflink)
+    instead of duplicating data.
+    """
 
-    if md5(response.content).hexdigest() != self.md5:
-        logger.error(f"{self._idname} has invalid MD5 hash")
+    if hasattr(os, "copy_file_range"):
+        try:
+            with src.open("rb") as fsrc, dst.open("wb") as fdst:
+                remaining = os.fstat(fsrc.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            if remaining == 0:
+                return
+        except OSError:
+            pass
 
-    return response.content
+    shutil.copyfile(src, dst)
@@ -4,12 +4,13 @@ _export_img.py
 """
 
 from ..utils import Logger
-from ..const import IMG_RESIZE_ARGTYPE
+from ..metrics import MetricsCollector, NO_METRICS
+from ..const import IMG_RESIZE_ARGTYPE, GKMAS_UNITY_VERSION
+from ._download import _write
 
-import UnityPy
+from io import BytesIO
 from pathlib import Path
 from typing import Union, Tuple
-from PIL import Image
 
 
 logger = Logger()
@@ -22,6 +23,7 @@ def _export_img(
     extract_img: bool,
     img_format: str,
     img_resize: IMG_RESIZE_ARGTYPE,
+    metrics: MetricsCollector = NO_METRICS,
 ):
     """
     [INTERNAL] Attempts to extract a single image from the assetbundle's container.
@@ -29,28 +31,45 @@ def _export_img(
     Raises a warning and falls back to raw dump if the bundle contains multiple objects.
     """
 
-    if self.name.split("_")[0] != "img" or not extract_img:
-        path.write_bytes(data)
+    if not self._will_extract(extract_img):
+        _write(path, data, metrics)
         return
 
-    env = UnityPy.load(data)
-    values = list(env.container.values())
-    if len(values) != 1:
+    # UnityPy and PIL take most of the package's import time,
+    # so they are only imported when an image is actually extracted
+    # (which is usually in an extractor process anyway).
+    import UnityPy
+    from PIL import Image
+
+    UnityPy.config.FALLBACK_UNITY_VERSION = GKMAS_UNITY_VERSION
+    if not isinstance(data, bytes):  # UnityPy.load() only takes bytes among buffers
+        data = bytes(data)
+    with metrics.time("unitypy"):
+        env = UnityPy.load(data)
+        values = list(env.container.values())
+        img = values[0].read().image if len(values) == 1 else None
+    if img is None:
         logger.warning(f"{self._idname} contains {len(values)} objects")
-        path.write_bytes(data)
+        _write(path, data, metrics)
         return
 
-    img = values[0].read().image
     if img_resize:
-        if type(img_resize) == str:
-            img_resize = self._determine_new_size(img.size, ratio=img_resize)
-        img = img.resize(img_resize, Image.LANCZOS)
-
-    try:
-        img.save(path.with_suffix(f".{img_format.lower()}"), quality=100)
-    except OSError:  # cannot write mode RGBA as {img_format}
-        img = img.convert("RGB")
-        img.save(path.with_suffix(f".{img_format.lower()}"), quality=100)
+        with metrics.time("resize"):
+            if type(img_resize) == str:
+                img_resize = self._determine_new_size(img.size, ratio=img_resize)
+            img = img.resize(img_resize, Image.LANCZOS)
+
+    # encoded in memory, so that encoding and disk write are timed separately
+    buffer = BytesIO()
+    with metrics.time("encode"):
+        try:
+            img.save(buffer, format=_pil_format(img_format), quality=100)
+        except OSError:  # cannot write mode RGBA as {img_format}
+            buffer = BytesIO()
+            img = img.convert("RGB")
+            img.save(buffer, format=_pil_format(img_format), quality=100)
+    _write(path.with_suffix(f".{img_format.lower()}"), buffer.getbuffer(), metrics)
+    metrics.count("objects_extracted")
     logger.success(f"{self._idname} extracted as {img_format.upper()}")
 
 
@@ -102,3 +121,17 @@ def _determine_new_size(
 
     round = lambda x: int(x + 0.5)  # round to the nearest integer
     return round(w_new), round(h_new)
+
+
+def _pil_format(img_format: str) -> str:
+    """
+    [INTERNAL] Maps a file extension to a PIL format name (e.g. 'jpg' to 'JPEG'),
+    as PIL.Image.save() does when given a file path instead of a buffer.
+    """
+    from PIL import Image
+
+    Image.init()
+    ext = f".{img_format.lower()}"
+    if ext not in Image.EXTENSION:
+        raise ValueError(f"unknown file extension: {ext}")
+    return Image.EXTENSION[ext]
@@ -0,0 +1,75 @@
+"""
+_verify.py
+[CLASS SPLIT] GkmasAssetBundle and GkmasResource verification of downloaded files.
+"""
+
+import mmap
+from hashlib import md5
+from pathlib import Path
+from typing import Tuple, Union
+
+
+def _verify(
+    self,
+    path: Path,
+    extract_img: bool = True,
+    img_format: str = "png",
+) -> Tuple[str, Union[str, None]]:
+    """
+    [INTERNAL] Checks the file downloaded into 'path' (as refined by _download_path())
+    against the manifest. Returns a status, along with the reason if not 'ok':
+    - 'ok': The file matches the size and MD5 hash in manifest;
+    - 'missing': There is no file;
+    - 'corrupt': The file is truncated, fails the MD5 check, or was left obfuscated;
+    - 'unchecked': An image was extracted, which can only be checked for existence.
+    """
+
+    if self._will_extract(extract_img):
+        image = path.with_suffix(f".{img_format.lower()}")
+        try:
+            if image.stat().st_size:
+                return "unchecked", "extracted image"
+        except OSError:
+            pass  # the bundle may have been written as is, if it had no image
+
+    try:
+        size = path.stat().st_size
+    except OSError:
+        return "missing", None
+
+    if size != self.size:
+        return "corrupt", "truncated" if size < self.size else "invalid size"
+
+    return self._check_md5(path)
+
+
+def _check_md5(self, path: Path) -> Tuple[str, Union[str, None]]:
+    """
+    [INTERNAL] Checks a file of the expected size against the MD5 hash in manifest.
+    Returns a status and reason, as _verify() does.
+    """
+    if _file_md5(path) == self.md5:
+        return "ok", None
+    return "corrupt", "invalid MD5 hash"
+
+
+def _file_md5(path: Path, head: bytes = b"") -> str:
+    """
+    [INTERNAL] Computes the MD5 hash of a file, with its leading bytes
+    replaced by 'head' (if given). The file is memory-mapped and hashed
+    in a single call, so that hashlib releases the GIL throughout,
+    and several files can be hashed in parallel by threads.
+    """
+
+    hasher = md5(head)
+    with path.open("rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            return hasher.hexdigest()
+        with mm:
+            if hasattr(mm, "madvise"):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+            with memoryview(mm) as view, view[len(head) :] as rest:
+                hasher.update(rest)
+    return hasher.hexdigest()
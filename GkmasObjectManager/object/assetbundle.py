@@ -3,16 +3,24 @@ assetbundle.py
 Unity asset bundle downloading, deobfuscation, and media extraction.
 """
 
-from ..utils import Logger
+from ..utils import Logger, BoundedProcessPool, HedgePolicy
+from ..metrics import MetricsCollector, NO_METRICS
 from ..const import (
     PATH_ARGTYPE,
     IMG_RESIZE_ARGTYPE,
     DEFAULT_DOWNLOAD_PATH,
     UNITY_SIGNATURE,
+    OBFUSCATE_HEADER_LEN,
 )
 
 from .resource import GkmasResource
 from .obfuscate import GkmasDeobfuscator
+from ._verify import _file_md5
+from ._download import _write
+
+import requests
+from pathlib import Path
+from typing import Union, Tuple
 
 
 logger = Logger()
@@ -34,28 +42,55 @@ class GkmasAssetBundle(GkmasResource):
             extract_img: bool = True,
             img_format: str = "png",
             img_resize: Union[None, str, Tuple[int, int]] = None,
-        ) -> None:
+            session: requests.Session = None,
+            stream: bool = False,
+            cache: Union[str, Path] = None,
+            extractor: BoundedProcessPool = None,
+            hedge: HedgePolicy = None,
+            metrics: MetricsCollector = None,
+            force: bool = False,
+        ) -> str:
             Downloads and deobfuscates the assetbundle to the specified path.
             Also extracts a single image from each bundle with type 'img'.
     """
 
-    from ._download import _download_path, _download_bytes, _determine_subdir
-    from ._export_img import _export_img
+    from ._download import (
+        _download_path,
+        _download_bytes,
+        _fetch,
+        _fetch_hedged,
+        _status_error,
+        _integrity_error,
+        _download_bytes_async,
+        _fetch_async,
+        _fetch_hedged_async,
+        _download_stream,
+        _download_async,
+        _cache_path,
+        _cache_hit,
+        _cache_store,
+        _materialize,
+        _resume_part,
+        _discard_part,
+        _is_complete,
+        _determine_subdir,
+    )
+    from ._export_img import _export_img, _determine_new_size
+    from ._verify import _verify
 
-    def __init__(self, info: dict):
-        """
-        Initializes an assetbundle with the given information.
-        Usually called from GkmasManifest.
+    __slots__ = ()
 
-        Args:
-            info (dict): An info dictionary, extracted from protobuf.
-                Must contain the following keys: id, name, objectName, size, md5, state, crc.
-        """
+    @property
+    def name(self) -> str:
+        return self._table.columns["name"][self._row] + ".unity3d"
+
+    @property
+    def crc(self) -> int:
+        return self._table.columns["crc"][self._row]  # unused (for now)
 
-        super().__init__(info)
-        self.name = info["name"] + ".unity3d"
-        self.crc = info["crc"]  # unused (for now)
-        self._idname = f"AB[{self.id:05}] '{self.name}'"
+    @property
+    def _idname(self) -> str:
+        return f"AB[{self.id:05}] '{self.name}'"
 
     def __repr__(self):
         return f"<GkmasAssetBundle {self._idname}>"
@@ -67,6 +102,13 @@ class GkmasAssetBundle(GkmasResource):
         extract_img: bool = True,
         img_format: str = "png",
         img_resize: IMG_RESIZE_ARGTYPE = None,
+        session: requests.Session = None,
+        stream: bool = False,
+        cache: PATH_ARGTYPE = None,
+        extractor: BoundedProcessPool = None,
+        hedge: HedgePolicy = None,
+        metrics: MetricsCollector = None,
+        force: bool = False,
     ):
         """
         Downloads and deobfuscates the assetbundle to the specified path.
@@ -85,27 +127,163 @@ class GkmasAssetBundle(GkmasResource):
                 If None, image is downloaded as is.
                 If str, string must contain exactly one ':' and image is resized to the specified ratio.
                 If Tuple[int, int], image is resized to the specified exact dimensions.
+            session (requests.Session) = None: HTTP session to download with.
+                If None, a one-off connection is made. Usually supplied by the concurrent downloader.
+            stream (bool) = False: Whether to stream the assetbundle to disk in fixed-size chunks.
+                If True, memory usage is bounded regardless of assetbundle size, and the file
+                only appears at 'path' once it passes all sanity checks. Interrupted transfers
+                are kept as '.part' files and resumed on the next attempt (if False, an interrupted
+                transfer starts over from byte 0). Ignored for bundles of type 'img'
+                when 'extract_img' is True, since extraction needs the whole bundle.
+            cache (Union[str, Path]) = None: A content-addressed cache directory, shared across
+                manifest revisions, which keeps raw payloads keyed by MD5 hash. If given, the assetbundle is
+                served from the cache when present (hardlinked where possible), and stored into it otherwise.
+            extractor (utils.BoundedProcessPool) = None: Process pool for image extraction.
+                If given, extraction is submitted to it and this method returns without waiting.
+                Usually supplied by the concurrent downloader.
+            hedge (utils.HedgePolicy) = None: If given, a transfer running late by its learned
+                latency quantile is raced by a duplicate request. Ignored when streaming.
+                Usually supplied by the concurrent downloader.
+            metrics (metrics.MetricsCollector) = None: Collector to report stage timings
+                and counters into. Usually supplied by the concurrent downloader.
+            force (bool) = False: Whether to discard whatever 'path' already holds and download anyway,
+                e.g. a file known to be of a previous revision. Usually supplied by GkmasManifest.download().
+
+        Returns the outcome: 'downloaded', 'cached' (served from 'cache'),
+        or 'skipped' (already present at 'path', judged by size).
         """
 
+        metrics = metrics or NO_METRICS
         path = self._download_path(path, categorize)
-        if path.exists():
-            logger.warning(f"{self._idname} already exists")
-            return
+        if force:
+            path.unlink(missing_ok=True)  # also unshares a hardlinked cache entry
+        elif self._is_complete(path):
+            metrics.count("objects_skipped")
+            return "skipped"
 
-        enc = self._download_bytes()
+        extracting = self._will_extract(extract_img)
+        hit = self._cache_hit(cache)
 
-        if enc.startswith(UNITY_SIGNATURE):
-            self._export_img(path, enc, extract_img, img_format, img_resize)
-            logger.success(f"{self._idname} downloaded")
-        else:
-            cipher = GkmasDeobfuscator(self.name.replace(".unity3d", ""))
-            dec = cipher.deobfuscate(enc)
-            if dec.startswith(UNITY_SIGNATURE):
-                self._export_img(path, dec, extract_img, img_format, img_resize)
-                logger.success(f"{self._idname} downloaded and deobfuscated")
+        if hit and not extracting:
+            how = self._materialize(
+                hit, path, self._deobfuscate, OBFUSCATE_HEADER_LEN, metrics
+            )
+            metrics.count("objects_cached")
+            if how:
+                logger.success(f"{self._idname} retrieved from cache")
+            else:
+                logger.warning(
+                    f"{self._idname} retrieved from cache but LEFT OBFUSCATED"
+                )
+            return "cached"
+
+        if stream and not extracting:
+            # deobfuscation only touches the header, so the rest can be streamed as is
+            how = self._download_stream(
+                path, session, self._deobfuscate, OBFUSCATE_HEADER_LEN, cache, metrics
+            )
+            metrics.count("objects_downloaded")
+            if how:
+                logger.success(f"{self._idname} {how}")
             else:
-                path.write_bytes(enc)
                 logger.warning(f"{self._idname} downloaded but LEFT OBFUSCATED")
-                # Unexpected things may happen...
-                # So unlike _download_bytes() in the parent class,
-                # here we don't raise an error and abort.
+            return "downloaded"
+
+        if hit:
+            enc = hit.read_bytes()
+            metrics.count("objects_cached")
+        else:
+            enc = self._download_bytes(session, metrics, hedge)
+            if cache:
+                self._cache_store(cache, enc, metrics=metrics)
+            metrics.count("objects_downloaded")
+
+        if extracting and extractor:
+            # leave the CPU-bound part to another process, and move on to the next download;
+            # the worker records into a collector of its own, merged back once done
+            child = MetricsCollector(enabled=metrics.enabled)
+            metrics.collect(
+                extractor.submit(
+                    self._save, path, enc, extract_img, img_format, img_resize, child
+                )
+            )
+        else:
+            self._save(path, enc, extract_img, img_format, img_resize, metrics)
+        return "cached" if hit else "downloaded"
+
+    def _will_extract(self, extract_img: bool) -> bool:
+        """
+        [INTERNAL] Whether _save() would perform (CPU-bound) image extraction.
+        """
+        return extract_img and self.name.split("_")[0] == "img"
+
+    def _save(
+        self,
+        path: Path,
+        enc: bytes,
+        extract_img: bool,
+        img_format: str,
+        img_resize: IMG_RESIZE_ARGTYPE,
+        metrics: MetricsCollector = NO_METRICS,
+    ) -> MetricsCollector:
+        """
+        [INTERNAL] Deobfuscates the downloaded (and verified) bytes, and either
+        extracts an image from them or writes them into the specified path.
+        This is the CPU-bound part of download().
+        Returns 'metrics', so that it can be merged back when run in another process.
+        """
+
+        with metrics.time("deobfuscate"):
+            dec, how = self._deobfuscate(enc)
+
+        if how:
+            self._export_img(path, dec, extract_img, img_format, img_resize, metrics)
+            logger.success(f"{self._idname} {how}")
+        else:
+            _write(path, enc, metrics)
+            logger.warning(f"{self._idname} downloaded but LEFT OBFUSCATED")
+            # Unexpected things may happen...
+            # So unlike _download_bytes() in the parent class,
+            # here we don't raise an error and abort.
+
+        return metrics
+
+    def _deobfuscate(self, enc: bytes) -> Tuple[bytes, Union[str, None]]:
+        """
+        [INTERNAL] Deobfuscates the assetbundle (or its leading bytes) if necessary.
+        Returns the resulting bytes, along with a description of what has been done,
+        or None if the bytes do not become a Unity assetbundle (and are returned as is).
+        """
+
+        if enc.startswith(UNITY_SIGNATURE):
+            return enc, "downloaded"
+
+        cipher = GkmasDeobfuscator(self.name.replace(".unity3d", ""))
+        dec = cipher.deobfuscate(enc)
+        if dec.startswith(UNITY_SIGNATURE):
+            return dec, "downloaded and deobfuscated"
+
+        return enc, None
+
+    def _check_md5(self, path: Path) -> Tuple[str, Union[str, None]]:
+        """
+        [INTERNAL] Checks a file of the expected size against the MD5 hash in manifest.
+        Since obfuscation XORs the header, a deobfuscated bundle is hashed with
+        its header obfuscated again, which restores the bytes served.
+        A bundle that is still obfuscated (i.e. not a Unity assetbundle) is reported
+        as corrupt, even if it matches, as with the 'LEFT OBFUSCATED' warning of _save().
+        """
+
+        with path.open("rb") as f:
+            head = f.read(OBFUSCATE_HEADER_LEN)
+
+        if head.startswith(UNITY_SIGNATURE):
+            cipher = GkmasDeobfuscator(self.name.replace(".unity3d", ""))
+            if _file_md5(path, bytes(cipher.deobfuscate(head))) == self.md5:
+                return "ok", None
+            if _file_md5(path) == self.md5:  # served unobfuscated
+                return "ok", None
+        elif _file_md5(path) == self.md5:
+            return "corrupt", "left obfuscated"
+
+        return "corrupt", "invalid MD5 hash"
@@ -3,6 +3,16 @@ obfuscate.py
 [INTERNAL] GkmasAssetBundle deobfuscator.
 """
 
+from ..const import OBFUSCATE_HEADER_LEN
+
+from functools import lru_cache
+from typing import Union
+
+
+# cache sizes for masks/keystreams, each entry being a few hundred bytes;
+# keys are assetbundle names, so entries are reused on retries and re-exports
+MASK_CACHE_SIZE = 1 << 16
+
 
 class GkmasDeobfuscator:
     """
@@ -17,8 +27,9 @@ class GkmasDeobfuscator:
         header_len (int): Length of the obfuscated header.
 
     Methods:
-        deobfuscate(enc: bytes) -> bytes:
-            Deobfuscates the given obfuscated bytes into plaintext.
+        deobfuscate(enc: Union[bytes, bytearray, memoryview]) -> Union[bytes, bytearray, memoryview]:
+            Deobfuscates the given obfuscated bytes into plaintext,
+            in place if the buffer is writable (and into new bytes otherwise).
     """
 
     def __init__(
@@ -26,7 +37,7 @@ class GkmasDeobfuscator:
         key: str,
         offset: int = 0,
         stream_pos: int = 0,
-        header_len: int = 256,
+        header_len: int = OBFUSCATE_HEADER_LEN,
     ):
         """
         Initializes a deobfuscator with given key and parameters.
@@ -35,7 +46,7 @@ class GkmasDeobfuscator:
             key (str): A string key for making mask.
             offset (int) = 0: Byte write pointer offset.
             stream_pos (int) = 0: Byte read pointer offset.
-            header_len (int) = 256: Length of the obfuscated header.
+            header_len (int) = OBFUSCATE_HEADER_LEN: Length of the obfuscated header.
         """
 
         self.offset = offset
@@ -43,9 +54,12 @@ class GkmasDeobfuscator:
         self.header_len = header_len
         self.mask = self._make_mask(key)
 
-    def _make_mask(self, key: str) -> bytes:
+    @staticmethod
+    @lru_cache(maxsize=MASK_CACHE_SIZE)
+    def _make_mask(key: str) -> bytes:
         """
         [INTERNAL] Generates an obfuscation mask from the given key.
+        Masks are cached per key.
         """
 
         keysize = len(key)
@@ -63,22 +77,58 @@ class GkmasDeobfuscator:
 
         return bytes([b ^ x for b in mask])
 
-    def deobfuscate(self, enc: bytes) -> bytes:
+    @staticmethod
+    @lru_cache(maxsize=MASK_CACHE_SIZE)
+    def _make_keystream(mask: bytes, stream_pos: int, header_len: int) -> bytes:
+        """
+        [INTERNAL] Repeats the mask over the obfuscated header,
+        starting from 'stream_pos', so that the header can be XORed in one go.
+        Keystreams are cached per mask and parameters.
+        """
+
+        length = max(header_len - stream_pos, 0)
+        if not length:
+            return b""
+
+        start = stream_pos % len(mask)
+        nrepeat = (start + length) // len(mask) + 1
+        return (mask * nrepeat)[start : start + length]
+
+    def deobfuscate(
+        self, enc: Union[bytes, bytearray, memoryview]
+    ) -> Union[bytes, bytearray, memoryview]:
         """
         Deobfuscates the given obfuscated bytes into plaintext.
+        Only the header is obfuscated, and it is XORed with the mask in a single
+        big-integer operation. Writable buffers (bytearray, or memoryview thereof)
+        are modified in place and returned as is; immutable input (e.g. bytes)
+        is copied once into new bytes, which is what UnityPy and hashlib expect.
+        Buffers shorter than the header are deobfuscated partially.
 
         Args:
-            enc (bytes): The obfuscated bytes to deobfuscate.
+            enc (Union[bytes, bytearray, memoryview]): The obfuscated bytes to deobfuscate.
         """
 
-        buf = bytearray(enc)
-
-        i = 0
-        masksize = len(self.mask)
-        while self.stream_pos + i < self.header_len:
-            buf[self.offset + i] ^= self.mask[
-                self.stream_pos + i - int((self.stream_pos + i) / masksize) * masksize
-            ]
-            i += 1
-
-        return bytes(buf)
+        buf = enc
+        if isinstance(enc, memoryview) and enc.format != "B":
+            buf = enc.cast("B")
+        writable = isinstance(buf, bytearray) or (
+            isinstance(buf, memoryview) and not buf.readonly
+        )
+
+        keystream = self._make_keystream(self.mask, self.stream_pos, self.header_len)
+        n = max(min(len(keystream), len(buf) - self.offset), 0)
+        if not n:
+            return buf if writable else bytes(buf)
+
+        window = slice(self.offset, self.offset + n)
+        head = int.from_bytes(buf[window], "little")
+        head ^= int.from_bytes(keystream[:n], "little")
+        head = head.to_bytes(n, "little")
+
+        if writable:
+            buf[window] = head
+            return buf
+        # a single copy of the payload, joined around the rewritten header
+        view = memoryview(buf)
+        return b"".join((view[: self.offset], head, view[self.offset + n :]))
@@ -3,12 +3,18 @@ resource.py
 General-purpose resource downloading.
 """
 
-from ..utils import Logger
+from ..utils import Logger, BoundedProcessPool, HedgePolicy
+from ..metrics import MetricsCollector, NO_METRICS
+from ..manifest.table import GkmasObjectTable, STATE_NAMES
 from ..const import (
     PATH_ARGTYPE,
     IMG_RESIZE_ARGTYPE,
     DEFAULT_DOWNLOAD_PATH,
 )
+from ._download import _write
+
+import requests
+from pathlib import Path
 
 
 logger = Logger()
@@ -17,6 +23,8 @@ logger = Logger()
 class GkmasResource:
     """
     A general-purpose binary resource, presumably multimedia instead of an assetbundle.
+    Objects are lightweight handles into a row of a (shared) GkmasObjectTable,
+    so attributes below are read-only and looked up on access.
 
     Attributes:
         id (int): Resource ID, unique across manifests.
@@ -31,11 +39,41 @@ class GkmasResource:
         download(
             path: Union[str, Path] = DEFAULT_DOWNLOAD_PATH,
             categorize: bool = True,
-        ) -> None:
-            Downloads the resource to the specified path.
+            session: requests.Session = None,
+            stream: bool = False,
+            cache: Union[str, Path] = None,
+            extractor: BoundedProcessPool = None,
+            hedge: HedgePolicy = None,
+            metrics: MetricsCollector = None,
+            force: bool = False,
+        ) -> str:
+            Downloads the resource to the specified path, and returns the outcome.
     """
 
-    from ._download import _download_path, _download_bytes, _determine_subdir
+    from ._download import (
+        _download_path,
+        _download_bytes,
+        _fetch,
+        _fetch_hedged,
+        _status_error,
+        _integrity_error,
+        _download_bytes_async,
+        _fetch_async,
+        _fetch_hedged_async,
+        _download_stream,
+        _download_async,
+        _cache_path,
+        _cache_hit,
+        _cache_store,
+        _materialize,
+        _resume_part,
+        _discard_part,
+        _is_complete,
+        _determine_subdir,
+    )
+    from ._verify import _verify, _check_md5
+
+    __slots__ = ("_table", "_row")
 
     def __init__(self, info: dict):
         """
@@ -46,14 +84,52 @@ class GkmasResource:
             info (dict): An info dictionary, extracted from protobuf.
                 Must contain the following keys: id, name, objectName, size, md5, state.
         """
+        self._table = GkmasObjectTable.from_dicts([info])
+        self._row = 0
+
+    @classmethod
+    def _from_table(cls, table: GkmasObjectTable, row: int):
+        """
+        [INTERNAL] Creates a handle into the given row of a manifest table, without copying.
+        Called from GkmasManifest whenever an object is requested.
+        """
+        obj = cls.__new__(cls)
+        obj._table = table
+        obj._row = row
+        return obj
+
+    def __reduce__(self):
+        # Pickled (e.g. for the extractor process) as its own info dictionary,
+        # instead of dragging along the whole (possibly memory-mapped) table.
+        return (type(self), (self._table.row(self._row),))
+
+    @property
+    def id(self) -> int:
+        return self._table.columns["id"][self._row]
+
+    @property
+    def name(self) -> str:
+        return self._table.columns["name"][self._row]
+
+    @property
+    def size(self) -> int:
+        return self._table.columns["size"][self._row]
+
+    @property
+    def state(self) -> str:
+        return STATE_NAMES[self._table.columns["state"][self._row]]  # unused
 
-        self.id = info["id"]
-        self.name = info["name"]
-        self.size = info["size"]
-        self.state = info["state"]  # unused
-        self.md5 = info["md5"]
-        self.objectName = info["objectName"]
-        self._idname = f"RS[{self.id:05}] '{self.name}'"
+    @property
+    def md5(self) -> str:
+        return self._table.columns["md5"][self._row]
+
+    @property
+    def objectName(self) -> str:
+        return self._table.columns["objectName"][self._row]
+
+    @property
+    def _idname(self) -> str:
+        return f"RS[{self.id:05}] '{self.name}'"
 
     def __repr__(self):
         return f"<GkmasResource {self._idname}>"
@@ -65,6 +141,13 @@ class GkmasResource:
         extract_img: bool = True,
         img_format: str = "png",
         img_resize: IMG_RESIZE_ARGTYPE = None,
+        session: requests.Session = None,
+        stream: bool = False,
+        cache: PATH_ARGTYPE = None,
+        extractor: BoundedProcessPool = None,
+        hedge: HedgePolicy = None,
+        metrics: MetricsCollector = None,
+        force: bool = False,
     ):
         """
         Downloads the resource to the specified path.
@@ -80,13 +163,76 @@ class GkmasResource:
                 IGNORED. PRESERVED FOR COMPATIBILITY WITH CONCURRENT DOWNLOADER.
             img_resize (Union[None, str, Tuple[int, int]]) = None:
                 IGNORED. PRESERVED FOR COMPATIBILITY WITH CONCURRENT DOWNLOADER.
+            session (requests.Session) = None: HTTP session to download with.
+                If None, a one-off connection is made. Usually supplied by the concurrent downloader.
+            stream (bool) = False: Whether to stream the resource to disk in fixed-size chunks.
+                If True, memory usage is bounded regardless of resource size,
+                and the file only appears at 'path' once it passes all sanity checks.
+                Interrupted transfers are kept as '.part' files and resumed on the next attempt.
+                If False, an interrupted transfer is not resumable and starts over from byte 0.
+            cache (Union[str, Path]) = None: A content-addressed cache directory, shared across
+                manifest revisions, which keeps raw payloads keyed by MD5 hash. If given, the resource is
+                served from the cache when present (hardlinked where possible), and stored into it otherwise.
+            extractor (utils.BoundedProcessPool) = None:
+                IGNORED. PRESERVED FOR COMPATIBILITY WITH CONCURRENT DOWNLOADER.
+            hedge (utils.HedgePolicy) = None: If given, a transfer running late by its learned
+                latency quantile is raced by a duplicate request. Ignored when streaming.
+                Usually supplied by the concurrent downloader.
+            metrics (metrics.MetricsCollector) = None: Collector to report stage timings
+                and counters into. Usually supplied by the concurrent downloader.
+            force (bool) = False: Whether to discard whatever 'path' already holds and download anyway,
+                e.g. a file known to be of a previous revision. Usually supplied by GkmasManifest.download().
+
+        Returns the outcome: 'downloaded', 'cached' (served from 'cache'),
+        or 'skipped' (already present at 'path', judged by size).
         """
 
+        metrics = metrics or NO_METRICS
         path = self._download_path(path, categorize)
-        if path.exists():
-            logger.warning(f"{self._idname} already exists")
-            return
+        if force:
+            path.unlink(missing_ok=True)  # also unshares a hardlinked cache entry
+        elif self._is_complete(path):
+            metrics.count("objects_skipped")
+            return "skipped"
+
+        hit = self._cache_hit(cache)
+        if hit:
+            self._materialize(hit, path, metrics=metrics)
+            metrics.count("objects_cached")
+            logger.success(f"{self._idname} retrieved from cache")
+            return "cached"
+        elif stream:
+            self._download_stream(path, session, cache=cache, metrics=metrics)
+            metrics.count("objects_downloaded")
+            logger.success(f"{self._idname} downloaded")
+        else:
+            enc = self._download_bytes(session, metrics, hedge)
+            self._save(path, enc, extract_img, img_format, img_resize, metrics)
+            if cache:
+                self._cache_store(cache, path, metrics=metrics)
+            metrics.count("objects_downloaded")
+        return "downloaded"
+
+    def _will_extract(self, extract_img: bool) -> bool:
+        """
+        [INTERNAL] Whether _save() would perform (CPU-bound) image extraction.
+        """
+        return False
 
-        dec = self._download_bytes()
-        path.write_bytes(dec)
+    def _save(
+        self,
+        path: Path,
+        enc: bytes,
+        extract_img: bool,
+        img_format: str,
+        img_resize: IMG_RESIZE_ARGTYPE,
+        metrics: MetricsCollector = NO_METRICS,
+    ) -> MetricsCollector:
+        """
+        [INTERNAL] Writes the downloaded (and verified) bytes into the specified path.
+        Image arguments are ignored, as in download().
+        Returns 'metrics', so that it can be merged back when run in another process.
+        """
+        _write(path, enc, metrics)
         logger.success(f"{self._idname} downloaded")
+        return metrics
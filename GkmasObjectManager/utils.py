@@ -3,9 +3,46 @@ utils.py
 Typing, logging, downloading, and miscellaneous utilities.
 """
 
+from .metrics import MetricsCollector, NO_METRICS
+from .const import (
+    ADAPTIVE_INITIAL_NWORKER,
+    ADAPTIVE_EPOCH_SECONDS,
+    ADAPTIVE_DECREASE,
+    ADAPTIVE_SOFT_DECREASE,
+    ADAPTIVE_GAIN,
+    ADAPTIVE_LATENCY_TOLERANCE,
+    ADAPTIVE_BEST_DECAY,
+    DEFAULT_DOWNLOAD_RETRIES,
+    RETRY_BACKOFF_BASE,
+    RETRY_BACKOFF_MAX,
+    HEDGE_MIN_SAMPLES,
+    HEDGE_WINDOW,
+    HEDGE_MIN_DELAY,
+    DOWNLOAD_TIMEOUT,
+)
+
 import sys
+import math
+import time
+import heapq
+import random
+import itertools
+import asyncio
+import requests
+import threading
+import multiprocessing
+from collections import deque
+from requests.adapters import HTTPAdapter
 from rich.console import Console
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Iterable, Tuple, Union
+from concurrent.futures import (
+    Future,
+    ThreadPoolExecutor,
+    ProcessPoolExecutor,
+    FIRST_COMPLETED,
+    as_completed,
+    wait,
+)
 
 
 class Diclist(list):
@@ -29,7 +66,7 @@ class Diclist(list):
         # are non-destructive to the original list
 
     def __sub__(self, other: "Diclist") -> "Diclist":
-        return Diclist([item for item in self if item not in other])
+        return self.diff(other)
 
     def rip_field(self, targets: list) -> "Diclist":
         return Diclist(
@@ -38,15 +75,45 @@ class Diclist(list):
 
     def diff(self, other: "Diclist", ignored_fields: list = []) -> "Diclist":
 
-        if not ignored_fields:
-            return self - other
+        # Entries are reduced to hashable fingerprints (with ignored fields left out),
+        # so that membership tests are O(1) and the whole diff runs in linear time.
+        ignored_fields = frozenset(ignored_fields)
+        other_fps = {_fingerprint(entry, ignored_fields) for entry in other}
 
-        # rip unused fields for comparison
-        self_rip = self.rip_field(ignored_fields)
-        other_rip = other.rip_field(ignored_fields)
+        # The quadratic predecessor mapped each surviving fingerprint back to
+        # the *first* entry in 'self' that produces it; this is preserved here.
+        first = {}
+        survivors = []
+        for entry in self:
+            fp = _fingerprint(entry, ignored_fields)
+            first.setdefault(fp, entry)
+            if fp not in other_fps:
+                survivors.append(fp)
 
         # retain complete fields for output
-        return Diclist([self[self_rip.index(entry)] for entry in self_rip - other_rip])
+        return Diclist([first[fp] for fp in survivors])
+
+
+def _fingerprint(entry: dict, ignored_fields: frozenset = frozenset()) -> frozenset:
+    """
+    [INTERNAL] Reduces an info dictionary to a hashable fingerprint.
+    Two dictionaries compare equal (with 'ignored_fields' left out)
+    if and only if their fingerprints do.
+    """
+    return frozenset(
+        (k, _freeze(v)) for k, v in entry.items() if k not in ignored_fields
+    )
+
+
+def _freeze(value):
+    """
+    [INTERNAL] Recursively converts lists and dictionaries into hashable equivalents.
+    """
+    if isinstance(value, dict):
+        return _fingerprint(value)
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
 
 
 class Logger(Console):
@@ -57,8 +124,8 @@ class Logger(Console):
         info(message: str): Logs an informational message in white text.
         success(message: str): Logs a success message in green text.
         warning(message: str): Logs a warning message in yellow text.
-        error(message: str): Logs an error message in red text
-            followed by traceback, and raises an error.
+        error(message: str, error: Exception = None): Logs an error message in red text
+            followed by traceback, and raises 'error' if given (or re-raises the active one).
     """
 
     def __init__(self):
@@ -73,32 +140,898 @@ class Logger(Console):
     def warning(self, message: str):
         self.print(f"[bold yellow][Warning][/bold yellow] {message}")
 
-    def error(self, message: str):
+    def error(self, message: str, error: Exception = None):
         self.print(f"[bold red][Error][/bold red] {message}\n{sys.exc_info()}")
+        if error is not None:
+            raise error
         raise
 
 
+logger = Logger()
+
+
+class DownloadError(RuntimeError):
+    """
+    Raised when the object server responds with an unexpected HTTP status,
+    or when a downloaded payload fails a sanity check (size or MD5 hash).
+
+    Attributes:
+        status (int): HTTP status code of the response,
+            or None for a failed sanity check.
+    """
+
+    def __init__(self, message: str, status: int = None):
+        super().__init__(message)
+        self.status = status
+
+
+def is_congestion(error: BaseException) -> bool:
+    """
+    Whether a download failure signals server or network overload, i.e.
+    HTTP 429 (throttled) or 5xx, a connection failure, or a timeout.
+    Integrity failures (size or MD5 mismatch) and other client errors do not.
+    """
+    if isinstance(error, DownloadError):
+        return error.status is not None and (error.status == 429 or error.status >= 500)
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    # aiohttp errors can only come from an already imported aiohttp;
+    # importing it here would undo its lazy loading for the thread backend
+    aiohttp = sys.modules.get("aiohttp")
+    return aiohttp is not None and isinstance(error, aiohttp.ClientConnectionError)
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Whether a download failure is worth retrying, i.e. a congestion signal
+    (see is_congestion()), HTTP 408, a transfer cut short, or a failed sanity check
+    (a DownloadError without status), which usually stems from a broken transfer.
+    Other client errors (e.g. HTTP 404) and local failures (e.g. image extraction) are not.
+    """
+    if is_congestion(error):
+        return True
+    if isinstance(error, DownloadError):
+        return error.status is None or error.status == 408
+    if isinstance(error, requests.exceptions.ChunkedEncodingError):
+        return True
+    aiohttp = sys.modules.get("aiohttp")  # as in is_congestion()
+    return aiohttp is not None and isinstance(error, aiohttp.ClientPayloadError)
+
+
+def make_session(pool_size: int = 1) -> requests.Session:
+    """
+    Creates a keep-alive HTTP session whose connection pool
+    holds up to 'pool_size' connections per host.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class BoundedProcessPool:
+    """
+    A process pool for CPU-bound stages (i.e. image extraction),
+    fed by download threads through a bounded submission queue.
+    Submitters block while 'queue_size' tasks are pending, so that fetched
+    payloads cannot pile up in memory faster than they are consumed.
+    Workers are spawned (rather than forked) to stay safe alongside threads.
+
+    Methods:
+        submit(fn: Callable, *args, **kwargs) -> Future:
+            Schedules fn(*args, **kwargs) in a worker process.
+        join() -> list:
+            Waits for all submitted tasks, shuts the pool down,
+            and returns (fn, error) pairs of the tasks that failed.
+    """
+
+    def __init__(self, nprocess: int, queue_size: int = None):
+        """
+        Initializes a pool with the given number of processes.
+
+        Args:
+            nprocess (int): Number of worker processes.
+            queue_size (int) = None: Maximum number of pending tasks.
+                Defaults to twice the number of processes.
+        """
+        self.executor = ProcessPoolExecutor(
+            max_workers=nprocess, mp_context=multiprocessing.get_context("spawn")
+        )
+        self.slots = threading.BoundedSemaphore(queue_size or 2 * nprocess)
+        self.futures = {}  # future -> fn
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        self.slots.acquire()
+        future = self.executor.submit(fn, *args, **kwargs)
+        future.add_done_callback(lambda _: self.slots.release())
+        self.futures[future] = fn
+        return future
+
+    def join(self) -> list:
+        failures = []
+        try:
+            for future in as_completed(self.futures):
+                if future.exception():
+                    failures.append((self.futures[future], future.exception()))
+        finally:
+            self.executor.shutdown(cancel_futures=True)
+        return failures
+
+
+class AdaptiveConcurrency:
+    """
+    An AIMD (additive-increase/multiplicative-decrease) controller for the number of
+    in-flight download requests, in the spirit of TCP congestion control.
+    The dispatcher holds at most 'limit' requests in flight, and feeds back
+    the outcome of each one through record().
+
+    Time is divided into epochs, each lasting at least ADAPTIVE_EPOCH_SECONDS and
+    'limit' completed requests, at the end of which throughput is measured and:
+    - in 'slow start' (i.e. at first), the limit is doubled as long as throughput
+      grows by at least ADAPTIVE_GAIN without requests queueing (see below),
+      and otherwise set back to the best one seen;
+    - afterwards, the limit is increased by one, unless requests take
+      ADAPTIVE_LATENCY_TOLERANCE times longer than on an idle link *without*
+      a throughput gain (i.e. they are queueing on a saturated link),
+      in which case it is decreased by ADAPTIVE_SOFT_DECREASE.
+    Congestion signals (see is_congestion(), e.g. HTTP 429/5xx) cut the limit by
+    ADAPTIVE_DECREASE right away, at most once per epoch, and end slow start.
+
+    Idle-link latency is modeled as (overhead + size * seconds per byte),
+    both learned as minimums over the run, so that epochs with different
+    mixes of object sizes remain comparable.
+
+    Attributes:
+        min_limit (int): Lower bound of the limit.
+        max_limit (int): Upper bound of the limit.
+        limit (int): Current number of requests allowed in flight.
+
+    Methods:
+        record(nbytes: int, latency: float, congested: bool = False):
+            Records a completed request of 'nbytes' bytes that took 'latency' seconds,
+            or a request that failed with a congestion signal.
+
+    Not thread-safe; meant to be fed by a single dispatcher thread (or event loop).
+    """
+
+    # objects at least this large are used to learn the per-byte latency
+    LARGE_OBJECT = 1 << 20
+
+    def __init__(self, min_limit: int, max_limit: int, limit: int = None):
+        """
+        Initializes a controller with the given bounds.
+
+        Args:
+            min_limit (int): Lower bound of the limit (at least 1).
+            max_limit (int): Upper bound of the limit.
+            limit (int) = None: Initial limit.
+                Defaults to ADAPTIVE_INITIAL_NWORKER (within bounds).
+        """
+        if not 1 <= min_limit <= max_limit:
+            raise ValueError(f"Invalid concurrency bounds ({min_limit}, {max_limit})")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = min(max(limit or ADAPTIVE_INITIAL_NWORKER, min_limit), max_limit)
+        self._slow_start = True
+        self._best_rate = 0.0
+        self._best_limit = self.limit
+        self._overhead = math.inf  # idle-link latency floor, per request
+        self._per_byte = math.inf  # idle-link latency floor, per byte
+        self._decreased = -math.inf  # time of the last congestion decrease
+        self._new_epoch()
+
+    def __repr__(self):
+        return f"<AdaptiveConcurrency {self.limit} in [{self.min_limit}, {self.max_limit}]>"
+
+    def record(self, nbytes: int, latency: float, congested: bool = False):
+        now = time.monotonic()
+        if congested:
+            if now - self._decreased >= ADAPTIVE_EPOCH_SECONDS:
+                self._set(self.limit * ADAPTIVE_DECREASE)
+                self._slow_start = False
+                self._decreased = now
+                self._new_epoch()
+            return
+
+        self._samples.append((nbytes, latency))
+        self._bytes += nbytes
+        if (
+            now - self._start >= ADAPTIVE_EPOCH_SECONDS
+            and len(self._samples) >= self.limit
+        ):
+            self._end_epoch(self._bytes / (now - self._start))
+
+    def _new_epoch(self):
+        self._start = time.monotonic()
+        self._samples = []
+        self._bytes = 0
+
+    def _end_epoch(self, rate: float):
+        """
+        [INTERNAL] Adjusts the limit based on the epoch's throughput (bytes per second)
+        and latency inflation, as described in the class docstring.
+        """
+
+        for nbytes, latency in self._samples:
+            self._overhead = min(self._overhead, latency)
+        for nbytes, latency in self._samples:
+            if nbytes >= self.LARGE_OBJECT:
+                self._per_byte = min(
+                    self._per_byte, max(latency - self._overhead, 0.0) / nbytes
+                )
+        per_byte = 0.0 if math.isinf(self._per_byte) else self._per_byte
+        inflation = sorted(
+            latency / (self._overhead + nbytes * per_byte or 1e-9)
+            for nbytes, latency in self._samples
+        )[len(self._samples) // 2]
+        gained = rate > self._best_rate * (1 + ADAPTIVE_GAIN)
+        queueing = inflation > ADAPTIVE_LATENCY_TOLERANCE
+
+        if self._slow_start:
+            if gained and not queueing:
+                self._best_rate, self._best_limit = rate, self.limit
+                self._set(self.limit * 2)
+            else:
+                self._slow_start = False
+                self._set(self._best_limit)
+        else:
+            if queueing and not gained:
+                self._set(self.limit * ADAPTIVE_SOFT_DECREASE)
+            else:
+                self._set(self.limit + 1)
+            self._best_rate = max(self._best_rate * ADAPTIVE_BEST_DECAY, rate)
+
+        self._new_epoch()
+
+    def _set(self, limit: float):
+        self.limit = min(max(int(limit), self.min_limit), self.max_limit)
+
+
+class HedgePolicy:
+    """
+    Decides when a download is late enough to be hedged, i.e. duplicated with
+    a second request, of which the first to succeed is kept (and the other abandoned).
+    This bounds the long tail of a batch, where a few stalled or slow connections
+    would otherwise hold up its completion.
+
+    Fetch latencies are learned during the run, separately for each size class
+    (powers of 4 in bytes), so that large objects are not judged by small ones.
+    A fetch is hedged once it has run longer than the 'quantile' of the last
+    HEDGE_WINDOW latencies in its class (and at least HEDGE_MIN_DELAY seconds);
+    nothing is hedged in a class until HEDGE_MIN_SAMPLES latencies are known.
+
+    Attributes:
+        quantile (float): Latency quantile beyond which fetches are hedged.
+        executor (ThreadPoolExecutor): Threads for blocking fetches and their duplicates,
+            or None if fetches are coroutines (i.e. for AsyncDownloader).
+
+    Methods:
+        delay(nbytes: int) -> Union[float, None]:
+            Returns seconds after which a fetch of 'nbytes' bytes is to be hedged,
+            or None if too little is known yet.
+        record(nbytes: int, latency: float):
+            Records the latency of a completed fetch of 'nbytes' bytes.
+
+    Thread-safe.
+    """
+
+    def __init__(self, quantile: float, executor: ThreadPoolExecutor = None):
+        """
+        Initializes a policy with the given quantile.
+
+        Args:
+            quantile (float): Latency quantile beyond which fetches are hedged, e.g. 0.95.
+            executor (ThreadPoolExecutor) = None: Threads for blocking fetches.
+        """
+        if not 0 < quantile < 1:
+            raise ValueError(f"Invalid hedging quantile {quantile}")
+        self.quantile = quantile
+        self.executor = executor
+        self._latencies = {}  # size class -> deque of recent latencies
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"<HedgePolicy at quantile {self.quantile}>"
+
+    def delay(self, nbytes: int) -> Union[float, None]:
+        with self._lock:
+            latencies = self._latencies.get(nbytes.bit_length() // 2)
+            if not latencies or len(latencies) < HEDGE_MIN_SAMPLES:
+                return None
+            latencies = sorted(latencies)
+        return max(latencies[int(self.quantile * len(latencies))], HEDGE_MIN_DELAY)
+
+    def record(self, nbytes: int, latency: float):
+        with self._lock:
+            self._latencies.setdefault(
+                nbytes.bit_length() // 2, deque(maxlen=HEDGE_WINDOW)
+            ).append(latency)
+
+
+class DownloadResult:
+    """
+    The outcome of a batch download, as returned by dispatchers
+    (and by GkmasManifest.download()).
+
+    Attributes:
+        succeeded (list): Objects downloaded, or served from cache.
+        skipped (list): Objects already present at their destination.
+        failed (list): Objects that failed for good, i.e. after all retries.
+            They can be fed straight back as criteria, i.e. manifest.download(*result.failed).
+        errors (dict): The last error of each failed object, keyed by object name.
+        retries (int): Number of retried attempts.
+        ok (bool): Whether no object has failed.
+
+    Methods:
+        summary() -> str: Summarizes the above in one line.
+    """
+
+    def __init__(self):
+        self.succeeded = []
+        self.skipped = []
+        self.failed = []
+        self.errors = {}
+        self.retries = 0
+
+    def __repr__(self):
+        return f"<DownloadResult {self.summary()}>"
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
+    def summary(self) -> str:
+        return (
+            f"{len(self.succeeded)} succeeded, {len(self.skipped)} skipped, "
+            f"{len(self.failed)} failed ({self.retries} retries)"
+        )
+
+
+class VerifyResult:
+    """
+    The outcome of GkmasManifest.verify() over a download tree.
+
+    Attributes:
+        valid (list): Objects whose files match the manifest.
+        missing (list): Objects without a file.
+        corrupt (list): Objects whose files are truncated, fail the MD5 check,
+            or were left obfuscated.
+        outdated (list): Objects whose files were recorded (in a ledger)
+            as downloaded from another revision, i.e. with another MD5 hash.
+        unchecked (list): Objects extracted into images, which are only checked for existence.
+        reasons (dict): Why each corrupt or outdated object is so, keyed by object name.
+        invalid (list): Missing, corrupt, and outdated objects, i.e. those to download again.
+            They can be fed straight back as criteria, i.e. manifest.download(*result.invalid).
+        redownloaded (DownloadResult): Outcome of downloading invalid objects again,
+            if requested, or None.
+
+    Methods:
+        summary() -> str: Summarizes the above in one line.
+    """
+
+    def __init__(self):
+        self.valid = []
+        self.missing = []
+        self.corrupt = []
+        self.outdated = []
+        self.unchecked = []
+        self.reasons = {}
+        self.redownloaded = None
+
+    def __repr__(self):
+        return f"<VerifyResult {self.summary()}>"
+
+    @property
+    def invalid(self) -> list:
+        return self.missing + self.corrupt + self.outdated
+
+    def summary(self) -> str:
+        return (
+            f"{len(self.valid)} valid, {len(self.missing)} missing, "
+            f"{len(self.corrupt)} corrupt, {len(self.outdated)} outdated, "
+            f"{len(self.unchecked)} unchecked"
+        )
+
+
+class DownloadSchedule:
+    """
+    Decides what a dispatcher downloads next, and settles what it has downloaded.
+    Fresh objects are consumed lazily from an iterable, interleaved with failed ones
+    that are due for a retry. Outcomes are collected into a DownloadResult, fed
+    into an AdaptiveConcurrency controller (if any), so that it sees every attempt,
+    and completed objects are recorded into a ledger.DownloadLedger (if any).
+
+    Failures deemed transient (see is_retryable()) are retried up to 'retries' times
+    per object, after a jittered exponential backoff: the n-th retry waits between half
+    and all of min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * 2 ** (n - 1)) seconds,
+    so that objects failing together (e.g. on a burst of HTTP 503) do not retry in lockstep.
+    Other failures mark the object as failed right away.
+
+    Attributes:
+        result (DownloadResult): Outcomes so far.
+        retries (int): Maximum number of retries per object.
+
+    Methods:
+        pop() -> Union[Tuple[GkmasResource, int], None]:
+            Returns the next object to download and its attempt number (0 for the first),
+            preferring retries that are due, or None if nothing is due right now.
+        delay() -> Union[float, None]:
+            Returns seconds until the next retry is due, or None if none is scheduled.
+        exhausted() -> bool:
+            Whether there are neither fresh objects nor retries left to dispatch.
+        settle(obj, attempt: int, latency: float, outcome: str = None, error: BaseException = None):
+            Records the outcome of an attempt (as returned by download()) or its error,
+            scheduling a retry if applicable.
+        fail(obj, error: BaseException):
+            Marks an object as failed for good, even if it has been settled as succeeded
+            (e.g. on a failed image extraction in another process).
+
+    Not thread-safe; meant to be used by a single dispatcher thread (or event loop).
+    """
+
+    def __init__(
+        self,
+        objects: Iterable,
+        retries: int = DEFAULT_DOWNLOAD_RETRIES,
+        controller: AdaptiveConcurrency = None,
+        metrics: MetricsCollector = NO_METRICS,
+        ledger: "DownloadLedger" = None,
+    ):
+        """
+        Initializes a schedule over the given objects.
+
+        Args:
+            objects (Iterable): Objects to download, consumed lazily.
+            retries (int) = DEFAULT_DOWNLOAD_RETRIES: Maximum number of retries per object.
+            controller (AdaptiveConcurrency) = None: A controller to feed with outcomes.
+            metrics (MetricsCollector) = NO_METRICS: A collector counting
+                'retries' and 'objects_failed'.
+            ledger (ledger.DownloadLedger) = None: A ledger to record completed objects into.
+        """
+        self.result = DownloadResult()
+        self.retries = retries
+        self._fresh = iter(objects)
+        self._due = []  # heap of (due time, sequence number, object, attempt)
+        self._sequence = itertools.count()  # tie-breaker, since objects don't compare
+        self._controller = controller
+        self._metrics = metrics
+        self._ledger = ledger
+
+    def pop(self) -> Union[Tuple[object, int], None]:
+        if self._due and self._due[0][0] <= time.monotonic():
+            _, _, obj, attempt = heapq.heappop(self._due)
+            return obj, attempt
+        if self._fresh is not None:
+            obj = next(self._fresh, None)
+            if obj is not None:
+                return obj, 0
+            self._fresh = None
+        return None
+
+    def delay(self) -> Union[float, None]:
+        if not self._due:
+            return None
+        return max(self._due[0][0] - time.monotonic(), 0.0)
+
+    def exhausted(self) -> bool:
+        return self._fresh is None and not self._due
+
+    def settle(
+        self,
+        obj,
+        attempt: int,
+        latency: float,
+        outcome: str = None,
+        error: BaseException = None,
+    ):
+        controller = self._controller
+
+        if error is None:
+            if outcome == "skipped":
+                self.result.skipped.append(obj)
+            else:
+                self.result.succeeded.append(obj)
+            # a skip only vouches for the file on disk, not for the ledger's belief;
+            # it may refresh a record of the same MD5 hash, but never introduce one
+            if self._ledger and (outcome != "skipped" or self._ledger.has(obj)):
+                self._ledger.record(obj)
+            if controller and outcome == "downloaded":
+                controller.record(obj.size, latency)
+            return
+
+        if controller and is_congestion(error):
+            controller.record(obj.size, latency, congested=True)
+
+        if attempt < self.retries and is_retryable(error):
+            backoff = min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * 2**attempt)
+            backoff *= random.uniform(0.5, 1.0)
+            heapq.heappush(
+                self._due,
+                (time.monotonic() + backoff, next(self._sequence), obj, attempt + 1),
+            )
+            self.result.retries += 1
+            self._metrics.count("retries")
+            logger.warning(
+                f"{obj._idname} failed ({type(error).__name__}), "
+                f"retry {attempt + 1}/{self.retries} in {backoff:.1f}s"
+            )
+            return
+
+        self.fail(obj, error)
+
+    def fail(self, obj, error: BaseException):
+        succeeded = self.result.succeeded
+        if any(o.name == obj.name for o in succeeded):
+            self.result.succeeded = [o for o in succeeded if o.name != obj.name]
+        self.result.failed.append(obj)
+        self.result.errors[obj.name] = error
+        self._metrics.count("objects_failed")
+        if self._ledger:
+            self._ledger.forget(obj)
+
+
 class ConcurrentDownloader:
     """
     A multithreaded downloader for objects on server.
+    Owns a pooled keep-alive HTTP session, which is shared by all workers
+    and reused across all dispatch() calls, so that connections to the
+    object server are established once rather than once per object.
+
+    In adaptive mode, the worker threads and the connection pool are sized to the
+    upper bound ('nworker'), but both are filled lazily: a thread or connection is only
+    created when the controller's limit calls for one more in flight. Their number thus
+    follows the highest limit reached, not the bound; when the limit falls back,
+    surplus threads end with the dispatch, while surplus idle connections are kept
+    in the pool (until the server closes them, or close() is called).
+
+    Attributes:
+        nworker (int): Number of concurrent download workers
+            (the upper bound, in adaptive mode).
+        min_nworker (int): Lower bound of concurrency in adaptive mode, or None.
+        controller (AdaptiveConcurrency): Concurrency controller in adaptive mode, or None.
+            It is kept across dispatch() calls, so that later batches start off
+            with what earlier ones have learned about the link.
+        session (requests.Session): Shared HTTP session.
 
     Methods:
-        dispatch(objects: list, **kwargs):
-            Downloads a list of objects to a specified path.
+        dispatch(
+            objects: Iterable,
+            nprocess: int = 0,
+            window: int = None,
+            max_bytes: int = None,
+            retries: int = DEFAULT_DOWNLOAD_RETRIES,
+            hedge: float = None,
+            ledger: DownloadLedger = None,
+            metrics: MetricsCollector = None,
+            route: Callable = None,
+            **kwargs,
+        ) -> DownloadResult:
+            Downloads objects to a specified path, and returns their outcomes.
             Executor implicitly calls object.GkmasResource.download() with **kwargs.
+            If 'route' is given, route(obj) returns keyword arguments overriding
+            **kwargs for that object (e.g. its own 'path' or image options),
+            so that a single dispatch can serve objects with different destinations.
+            If 'hedge' is given, fetches running beyond that latency quantile
+            are duplicated (see HedgePolicy); streamed ones are not.
+            If 'ledger' is given, completed objects are recorded into it, and so are skipped ones
+            already recorded with the same MD5 hash.
+            Objects report into 'metrics' if given, and failed ones are counted there.
+            A failed object doesn't abort the batch; it is retried up to 'retries' times
+            if the failure is transient, and reported as failed otherwise (see DownloadSchedule).
+            Objects are consumed lazily, keeping at most 'window' tasks (default 2 * nworker;
+            the controller's limit in adaptive mode) and 'max_bytes' bytes
+            (judged by object size in manifest) in flight.
+            If nprocess > 0, image extraction is offloaded to a BoundedProcessPool,
+            so that download threads only fetch and verify.
+        close():
+            Releases all pooled connections.
     """
 
-    def __init__(self, nworker: int):
+    def __init__(self, nworker: int, pool_size: int = None, min_nworker: int = None):
+        """
+        Initializes a downloader with the given number of workers.
+
+        Args:
+            nworker (int): Number of concurrent download workers.
+            pool_size (int) = None: Maximum number of pooled connections.
+                Defaults to 'nworker', i.e. one keep-alive connection per worker.
+            min_nworker (int) = None: If given, the number of in-flight downloads
+                adapts between 'min_nworker' and 'nworker' (see AdaptiveConcurrency).
+        """
         self.nworker = nworker
+        self.min_nworker = min_nworker
+        self.controller = None
+        if min_nworker:
+            self.controller = AdaptiveConcurrency(min_nworker, nworker)
+        self.session = make_session(pool_size or nworker)
 
-    def dispatch(self, objects: list, **kwargs):
+    def dispatch(
+        self,
+        objects: Iterable,
+        nprocess: int = 0,
+        window: int = None,
+        max_bytes: int = None,
+        retries: int = DEFAULT_DOWNLOAD_RETRIES,
+        hedge: float = None,
+        ledger: "DownloadLedger" = None,
+        metrics: MetricsCollector = None,
+        route: Callable = None,
+        **kwargs,
+    ) -> DownloadResult:
         # don't use *args here to avoid fixed order
+        metrics = metrics or NO_METRICS
 
         # not initialized in __init__ to avoid memory leak
         self.executor = ThreadPoolExecutor(max_workers=self.nworker)
+        extractor = BoundedProcessPool(nprocess) if nprocess else None
+        if hedge:
+            # a primary fetch and its duplicate for each worker
+            hedge = HedgePolicy(hedge, ThreadPoolExecutor(max_workers=2 * self.nworker))
+        window = window or 2 * self.nworker
+        controller = self.controller
+        schedule = DownloadSchedule(objects, retries, controller, metrics, ledger)
+
+        pending = {}  # future -> (object, attempt, submission time)
+        inflight = 0  # bytes
+
+        def reap(timeout: float = None):
+            nonlocal inflight
+            if not pending:
+                time.sleep(timeout or 0)  # nothing to wait for but a retry
+                return
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                obj, attempt, started = pending.pop(future)
+                inflight -= obj.size
+                error = future.exception()
+                outcome, finished = (None, time.perf_counter())
+                if not error:
+                    outcome, finished = future.result()
+                schedule.settle(obj, attempt, finished - started, outcome, error)
+
+        try:
+            while pending or not schedule.exhausted():
+                item = schedule.pop()
+                if item is None:
+                    # wait for a download to finish, or for a retry to fall due
+                    reap(schedule.delay())
+                    continue
+                obj, attempt = item
+                # An object larger than the whole budget is still let through,
+                # but only once everything else has drained.
+                while pending and (
+                    len(pending) >= (controller.limit if controller else window)
+                    or (max_bytes and inflight + obj.size > max_bytes)
+                ):
+                    reap()
+                started = time.perf_counter()
+                future = self.executor.submit(
+                    _timed,
+                    obj.download,
+                    session=self.session,
+                    extractor=extractor,
+                    hedge=hedge,
+                    metrics=metrics,
+                    **({**kwargs, **route(obj)} if route else kwargs),
+                )
+                pending[future] = (obj, attempt, started)
+                inflight += obj.size
+        finally:
+            self.executor.shutdown(cancel_futures=True)
+            if hedge:
+                # abandoned fetches end on their own (by DOWNLOAD_TIMEOUT at the latest)
+                hedge.executor.shutdown(wait=False)
+            if extractor:
+                for fn, error in extractor.join():
+                    schedule.fail(fn.__self__, error)  # i.e. obj._save()
+
+        return schedule.result
+
+    def close(self):
+        self.session.close()
+
+
+def _timed(fn: Callable, *args, **kwargs) -> Tuple[object, float]:
+    """
+    [INTERNAL] Calls fn(*args, **kwargs) and returns its result along with its
+    completion time (by time.perf_counter()), as stamped by the worker itself,
+    so that latency excludes time spent waiting for the dispatcher to reap it.
+    """
+    return fn(*args, **kwargs), time.perf_counter()
+
+
+async def _timed_async(coro) -> Tuple[object, float]:
+    """
+    [INTERNAL] Coroutine counterpart of _timed(), stamping the event loop time.
+    """
+    return await coro, asyncio.get_running_loop().time()
+
+
+class AsyncDownloader:
+    """
+    An asyncio-based downloader for objects on server, serving as an alternative
+    to ConcurrentDownloader. All transfers share a single event loop and a single
+    aiohttp connection pool, so that hundreds of them can be in flight at once
+    without one OS thread each; CPU-bound steps are sent to a thread pool.
+    Requires the optional 'aiohttp' dependency.
+
+    Attributes:
+        nworker (int): Maximum number of in-flight transfers.
+        nexecutor (int): Number of threads for CPU-bound steps.
+        min_nworker (int): Lower bound of concurrency in adaptive mode, or None.
+        controller (AdaptiveConcurrency): Concurrency controller in adaptive mode, or None.
+
+    Methods:
+        dispatch(
+            objects: Iterable,
+            nprocess: int = 0,
+            max_bytes: int = None,
+            retries: int = DEFAULT_DOWNLOAD_RETRIES,
+            hedge: float = None,
+            ledger: DownloadLedger = None,
+            metrics: MetricsCollector = None,
+            route: Callable = None,
+            **kwargs,
+        ) -> DownloadResult:
+            Downloads objects to a specified path, and returns their outcomes.
+            Event loop implicitly awaits object.GkmasResource._download_async() with **kwargs.
+            Hedging, ledger recording, and per-object 'route' apply as with ConcurrentDownloader.
+            Objects report into 'metrics' if given, and failed ones are counted there.
+            Failures are retried or collected as with ConcurrentDownloader.
+            Objects are consumed lazily, keeping at most nworker transfers (the controller's
+            limit in adaptive mode) and 'max_bytes' bytes (judged by object size in manifest) in flight.
+            If nprocess > 0, image extraction is sent to a process pool of that size.
+        close():
+            Does nothing; sessions are scoped to a single dispatch() call,
+            since they cannot outlive the event loop.
+    """
+
+    def __init__(self, nworker: int, nexecutor: int = None, min_nworker: int = None):
+        """
+        Initializes a downloader with the given concurrency.
+
+        Args:
+            nworker (int): Maximum number of in-flight transfers.
+            nexecutor (int) = None: Number of threads for CPU-bound steps.
+                Defaults to the number of CPUs, as chosen by ThreadPoolExecutor.
+            min_nworker (int) = None: If given, the number of in-flight transfers
+                adapts between 'min_nworker' and 'nworker' (see AdaptiveConcurrency).
+        """
+        self.nworker = nworker
+        self.nexecutor = nexecutor
+        self.min_nworker = min_nworker
+        self.controller = None
+        if min_nworker:
+            self.controller = AdaptiveConcurrency(min_nworker, nworker)
+
+    def dispatch(
+        self,
+        objects: Iterable,
+        nprocess: int = 0,
+        max_bytes: int = None,
+        window: int = None,
+        stream: bool = False,
+        retries: int = DEFAULT_DOWNLOAD_RETRIES,
+        hedge: float = None,
+        ledger: "DownloadLedger" = None,
+        metrics: MetricsCollector = None,
+        route: Callable = None,
+        **kwargs,
+    ) -> DownloadResult:
+        # the window is always nworker here, since tasks are cheap to keep around;
+        # streaming is a thread-backend feature; always buffered here
+        return asyncio.run(
+            self._dispatch(
+                objects,
+                nprocess,
+                max_bytes,
+                retries,
+                HedgePolicy(hedge) if hedge else None,
+                ledger,
+                metrics or NO_METRICS,
+                route,
+                **kwargs,
+            )
+        )
+
+    async def _dispatch(
+        self,
+        objects: Iterable,
+        nprocess: int,
+        max_bytes: int,
+        retries: int,
+        hedge: HedgePolicy,
+        ledger: "DownloadLedger",
+        metrics: MetricsCollector,
+        route: Callable,
+        **kwargs,
+    ) -> DownloadResult:
+
+        try:
+            import aiohttp
+        except ImportError:
+            raise ImportError("Async backend requires 'aiohttp' to be installed")
+
+        executor = ThreadPoolExecutor(max_workers=self.nexecutor)
+        extractor = None
+        if nprocess:
+            # in-flight transfers are already bounded by the window below
+            extractor = ProcessPoolExecutor(
+                max_workers=nprocess, mp_context=multiprocessing.get_context("spawn")
+            )
+        connector = aiohttp.TCPConnector(limit=self.nworker)
+        # no total timeout, which would cut off large objects on slow links
+        connect, read = DOWNLOAD_TIMEOUT
+        timeout = aiohttp.ClientTimeout(
+            total=None, sock_connect=connect, sock_read=read
+        )
+        controller = self.controller
+        loop = asyncio.get_running_loop()
+        schedule = DownloadSchedule(objects, retries, controller, metrics, ledger)
+
+        pending = {}  # task -> (object, attempt, creation time)
+        inflight = 0  # bytes
+
+        async def reap(timeout: float = None):
+            nonlocal inflight
+            if not pending:
+                await asyncio.sleep(timeout or 0)  # nothing to wait for but a retry
+                return
+            done, _ = await asyncio.wait(
+                pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                obj, attempt, started = pending.pop(task)
+                inflight -= obj.size
+                error = task.exception()
+                outcome, finished = (None, loop.time())
+                if not error:
+                    outcome, finished = task.result()
+                schedule.settle(obj, attempt, finished - started, outcome, error)
+
+        try:
+            async with aiohttp.ClientSession(
+                connector=connector, timeout=timeout
+            ) as session:
+                try:
+                    while pending or not schedule.exhausted():
+                        item = schedule.pop()
+                        if item is None:
+                            await reap(schedule.delay())
+                            continue
+                        obj, attempt = item
+                        while pending and (
+                            len(pending)
+                            >= (controller.limit if controller else self.nworker)
+                            or (max_bytes and inflight + obj.size > max_bytes)
+                        ):
+                            await reap()
+                        task = asyncio.ensure_future(
+                            _timed_async(
+                                obj._download_async(
+                                    session,
+                                    executor,
+                                    extractor,
+                                    hedge=hedge,
+                                    metrics=metrics,
+                                    **({**kwargs, **route(obj)} if route else kwargs),
+                                )
+                            )
+                        )
+                        pending[task] = (obj, attempt, loop.time())
+                        inflight += obj.size
+                finally:
+                    for task in pending:
+                        task.cancel()
+        finally:
+            executor.shutdown()
+            if extractor:
+                extractor.shutdown()
 
-        futures = [self.executor.submit(obj.download, **kwargs) for obj in objects]
-        for future in as_completed(futures):
-            future.result()
+        return schedule.result
 
-        self.executor.shutdown()
+    def close(self):
+        pass
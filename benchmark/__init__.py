@@ -0,0 +1,29 @@
+"""
+benchmark
+=========
+Offline performance harness for GkmasObjectManager.
+
+Everything runs against synthetic data, so no network access
+(nor a real octocache) is needed, which makes it suitable for CI.
+
+Modules
+-------
+- synthetic: Synthetic manifests and (obfuscated) object payloads
+- server: Local mock object server with latency, bandwidth, error, and stall injection
+- e2e: End-to-end download throughput across worker counts, backends, and size mixes,
+  optionally with image extraction (in-worker or in a process pool)
+- micro: Microbenchmarks of manifest and object hot paths, compared against stored baselines
+  (baselines.json, fastest of several passes, re-recorded per machine);
+  exits with status 1 on regressions beyond a threshold
+
+Example Usage
+-------------
+```
+python -m benchmark.e2e --mix small large --backend thread async --nworker 8 64
+python -m benchmark.e2e --latency 0.05 --bandwidth 4M --error-rate 0.01
+python -m benchmark.e2e --nworker 8 64 auto --link-bandwidth 20M --capacity 32
+python -m benchmark.e2e --nworker 16 --stall-rate 0.02 --stall 2 --hedge 0.95
+python -m benchmark.e2e --mix images --extract-img --nprocess 0 4
+python -m benchmark.micro --sizes 1k 10k 100k 500k --threshold 0.2
+```
+"""
@@ -0,0 +1,257 @@
+"""
+e2e.py
+End-to-end download throughput benchmark against a local mock object server.
+
+Usage:
+    python -m benchmark.e2e --mix small mixed --backend thread async --nworker 4 16 64
+    python -m benchmark.e2e --latency 0.05 --bandwidth 8M --json results.json
+    python -m benchmark.e2e --mix images --extract-img --nprocess 0 4
+"""
+
+from GkmasObjectManager import MetricsCollector, ALL_ASSETBUNDLES, ALL_RESOURCES
+from GkmasObjectManager.const import ADAPTIVE_NWORKER
+
+from .synthetic import SIZE_MIXES, make_objects
+from .server import MockObjectServer
+from .utils import quiet
+
+import sys
+import json
+import time
+import argparse
+import tempfile
+import itertools
+
+
+def run(
+    manifest,
+    server: MockObjectServer,
+    backend: str,
+    nworker: int,
+    stream: bool = False,
+    hedge: float = None,
+    extract_img: bool = False,
+    nprocess: int = 0,
+) -> dict:
+    """
+    Downloads every object in the manifest from the given (started) server
+    into a scratch directory, and returns throughput figures.
+    With 'extract_img', images are extracted from 'img_' assetbundles
+    (in a pool of 'nprocess' processes, if positive), as download() does.
+    Objects still failing after retries are counted, and a run aborted
+    by an unexpected error is reported rather than raised.
+    """
+
+    metrics = MetricsCollector()
+    nbyte = sum(obj.size for obj in manifest)
+    error = None
+    result = None
+
+    with tempfile.TemporaryDirectory() as path, server.install():
+        start = time.perf_counter()
+        try:
+            result = manifest.download(
+                ALL_ASSETBUNDLES,
+                ALL_RESOURCES,
+                nworker=nworker,
+                path=path,
+                extract_img=extract_img,
+                stream=stream,
+                nprocess=nprocess,
+                backend=backend,
+                hedge=hedge,
+                metrics=metrics,
+            )
+        except Exception as e:
+            error = repr(e)
+        elapsed = time.perf_counter() - start
+        controller = manifest._downloader.controller
+        # start every run afresh, without pooled connections or learned concurrency
+        manifest._downloader.close()
+        del manifest._downloader
+
+    counters = metrics.snapshot()["counters"]
+    return {
+        "backend": backend,
+        "nworker": nworker,
+        "adapted_nworker": controller.limit if controller else None,
+        "stream": stream,
+        "hedge": hedge,
+        "extract_img": extract_img,
+        "nprocess": nprocess,
+        "objects": len(manifest),
+        "bytes": nbyte,
+        "elapsed": elapsed,
+        "mib_per_second": nbyte / elapsed / (1 << 20),
+        "objects_per_second": len(manifest) / elapsed,
+        "downloaded": counters.get("objects_downloaded", 0),
+        "extracted": counters.get("objects_extracted", 0),
+        "failed": counters.get("objects_failed", 0),
+        "retries": result.retries if result else 0,
+        "requests": server.requests,
+        "errors_injected": server.errors,
+        "throttled": server.throttled,
+        "stalled": server.stalled,
+        "hedged": counters.get("requests_hedged", 0),
+        "error": error,
+    }
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmark.e2e",
+        description="Measures end-to-end download throughput against a local mock object server.",
+    )
+    parser.add_argument("--mix", nargs="+", default=["mixed"], choices=SIZE_MIXES)
+    parser.add_argument(
+        "--backend", nargs="+", default=["thread", "async"], choices=["thread", "async"]
+    )
+    parser.add_argument(
+        "--nworker",
+        nargs="+",
+        type=_parse_nworker,
+        default=[4, 16, 64, "auto"],
+        help="numbers of workers, 'auto', or 'min-max' for adaptive concurrency",
+    )
+    parser.add_argument("--stream", action="store_true", help="stream objects to disk")
+    parser.add_argument(
+        "--extract-img",
+        action="store_true",
+        help="extract images from 'img_' assetbundles (see the 'images' mix)",
+    )
+    parser.add_argument(
+        "--nprocess",
+        nargs="+",
+        type=int,
+        default=[0],
+        help="numbers of image extraction processes (0: in download workers)",
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="seconds per request"
+    )
+    parser.add_argument(
+        "--bandwidth",
+        type=_parse_size,
+        default=None,
+        help="per-connection bytes per second, e.g. 8M",
+    )
+    parser.add_argument(
+        "--link-bandwidth",
+        type=_parse_size,
+        default=None,
+        help="bytes per second shared by all connections, e.g. 20M",
+    )
+    parser.add_argument(
+        "--capacity",
+        type=int,
+        default=None,
+        help="concurrent requests served before HTTP 429",
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="fraction of failed requests"
+    )
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument(
+        "--stall-rate", type=float, default=0.0, help="fraction of stalled requests"
+    )
+    parser.add_argument(
+        "--stall", type=float, default=2.0, help="seconds that a stalled request waits"
+    )
+    parser.add_argument(
+        "--hedge",
+        type=float,
+        default=None,
+        help="latency quantile beyond which downloads are hedged, e.g. 0.95",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write results to this path")
+    parser.add_argument("--verbose", action="store_true", help="show download logs")
+    args = parser.parse_args(argv)
+
+    results = []
+    print(
+        f"{'mix':<8}{'backend':<9}{'nworker':>12}{'nproc':>7}{'objects':>9}{'MiB':>9}"
+        f"{'seconds':>9}{'MiB/s':>9}{'obj/s':>9}{'retries':>9}{'failed':>8}{'429s':>7}"
+        f"{'hedged':>8}{'extracted':>11}"
+    )
+
+    for mix in args.mix:
+        with quiet(not args.verbose):
+            manifest, payloads = make_objects(mix, seed=args.seed)
+        for backend, nworker, nprocess in itertools.product(
+            args.backend, args.nworker, args.nprocess
+        ):
+            server = MockObjectServer(
+                payloads,
+                latency=args.latency,
+                bandwidth=args.bandwidth,
+                link_bandwidth=args.link_bandwidth,
+                capacity=args.capacity,
+                error_rate=args.error_rate,
+                error_status=args.error_status,
+                stall_rate=args.stall_rate,
+                stall=args.stall,
+                seed=args.seed,
+            )
+            with server, quiet(not args.verbose):
+                result = run(
+                    manifest,
+                    server,
+                    backend,
+                    nworker,
+                    args.stream,
+                    args.hedge,
+                    args.extract_img,
+                    nprocess,
+                )
+            result["mix"] = mix
+            results.append(result)
+            label = _format_nworker(nworker)
+            if result["adapted_nworker"]:
+                label += f">{result['adapted_nworker']}"
+            print(
+                f"{mix:<8}{backend:<9}{label:>12}{nprocess:>7}{result['objects']:>9}"
+                f"{result['bytes'] / (1 << 20):>9.1f}{result['elapsed']:>9.2f}"
+                f"{result['mib_per_second']:>9.1f}{result['objects_per_second']:>9.1f}"
+                f"{result['retries']:>9}{result['failed']:>8}{result['throttled']:>7}"
+                f"{result['hedged']:>8}{result['extracted']:>11}"
+                + (" (aborted)" if result["error"] else "")
+            )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=4)
+
+    return results
+
+
+def _parse_nworker(nworker: str):
+    """
+    [INTERNAL] Parses a number of workers, 'auto', or 'min-max' bounds.
+    """
+    if nworker == ADAPTIVE_NWORKER:
+        return nworker
+    if "-" in nworker:
+        return tuple(int(n) for n in nworker.split("-"))
+    return int(nworker)
+
+
+def _format_nworker(nworker) -> str:
+    if isinstance(nworker, tuple):
+        return "-".join(map(str, nworker))
+    return str(nworker)
+
+
+def _parse_size(size: str) -> int:
+    """
+    [INTERNAL] Parses a byte count with an optional K/M/G suffix (powers of 1024).
+    """
+    size = size.strip().upper()
+    for shift, suffix in ((10, "K"), (20, "M"), (30, "G")):
+        if size.endswith(suffix):
+            return int(float(size[:-1]) * (1 << shift))
+    return int(size)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
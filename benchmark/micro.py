@@ -0,0 +1,470 @@
+"""
+micro.py
+Microbenchmarks of manifest and object hot paths, with stored baselines.
+
+Usage:
+    python -m benchmark.micro                        # compare against baselines
+    python -m benchmark.micro --sizes 1k 10k 100k 500k --save
+    python -m benchmark.micro --case parse_raw diclist_diff --threshold 0.1
+
+Baselines are machine-specific; record them with --save on the machine
+(or CI runner class) that runs the comparison. Since shared runners switch
+between faster and slower phases lasting seconds, every timing is the fastest of
+several passes spread over time: baselines are recorded that way, and a case is
+flagged only if it stays beyond the threshold in every pass (suspects alone are
+measured again, PASS_INTERVAL seconds apart). The spread between passes while
+recording (slowest over fastest) is stored too, and a case is never flagged
+within that noise, even if it exceeds the threshold; on a quiet machine,
+the threshold alone applies.
+"""
+
+from GkmasObjectManager import GkmasManifest, GkmasAssetBundle
+from GkmasObjectManager.const import (
+    DICLIST_IGNORED_FIELDS,
+    GKMAS_OCTOCACHE_KEY,
+    GKMAS_OCTOCACHE_IV,
+)
+from GkmasObjectManager.manifest.crypt import AESCBCDecryptor
+from GkmasObjectManager.ledger import DownloadLedger
+from GkmasObjectManager.object.obfuscate import GkmasDeobfuscator
+
+from .utils import quiet
+from .synthetic import (
+    make_jdict,
+    make_manifest,
+    make_octocache,
+    make_image_bundle,
+    _object_name,
+)
+
+import sys
+import json
+import random
+import argparse
+import platform
+import tempfile
+import time
+import timeit
+from pathlib import Path
+from functools import lru_cache
+from typing import Callable, Dict
+
+
+DEFAULT_BASELINE_PATH = Path(__file__).parent / "baselines.json"
+DEFAULT_SIZES = ["1k", "10k", "100k"]
+DEFAULT_THRESHOLD = 0.25  # relative slowdown flagged as a regression
+DEFAULT_REPEAT = 5
+DEFAULT_PASSES = 5
+PASS_INTERVAL = 2.0  # seconds between passes over suspected regressions
+
+BASELINE_NOTE = (
+    "Timings are machine-specific: re-record them with "
+    "'python -m benchmark.micro --save' on the machine (or CI runner class) "
+    "that runs the comparison."
+)
+
+# inputs of unscaled (per-call) cases
+BATCH_SIZE = 1000
+DEOBFUSCATE_SIZE = 1 << 20
+IMAGE_SIZES = [(256, 256), (1024, 1024)]
+
+# diff of a manifest against a copy with this fraction of entries updated
+DIFF_CHANGED_RATIO = 0.1
+
+
+# name -> (setup, scaled); setup(n, scratch) returns a zero-argument callable
+# to be timed, where n is the manifest size for scaled cases (None otherwise),
+# and scratch is a temporary directory for output files
+CASES: Dict[str, tuple] = {}
+
+
+def case(name: str, scaled: bool = True) -> Callable:
+    """
+    Registers a benchmark case under the given name.
+    """
+
+    def register(setup: Callable) -> Callable:
+        CASES[name] = (setup, scaled)
+        return setup
+
+    return register
+
+
+# ----------------------------------------------------------------------------
+# fixtures (cached, since several cases share them)
+
+
+@lru_cache(maxsize=None)
+def _jdict(n: int) -> dict:
+    return make_jdict(n)
+
+
+@lru_cache(maxsize=None)
+def _octocache(n: int) -> tuple:
+    return make_octocache(_jdict(n))
+
+
+@lru_cache(maxsize=None)
+def _manifest(n: int) -> GkmasManifest:
+    with quiet():
+        return make_manifest(_jdict(n))
+
+
+@lru_cache(maxsize=None)
+def _updated_manifest(n: int) -> GkmasManifest:
+    rng = random.Random(n)
+    jdict = json.loads(json.dumps(_jdict(n)))  # deep copy
+    for entries in (jdict["assetBundleList"], jdict["resourceList"]):
+        for entry in rng.sample(entries, int(len(entries) * DIFF_CHANGED_RATIO)):
+            entry["md5"] = "%032x" % rng.getrandbits(128)
+    with quiet():
+        return make_manifest(jdict, revision="synthetic-updated")
+
+
+# ----------------------------------------------------------------------------
+# manifest cases
+
+
+@case("decrypt")
+def _(n, scratch):
+    enc = _octocache(n)[1]
+    return lambda: AESCBCDecryptor(GKMAS_OCTOCACHE_KEY, GKMAS_OCTOCACHE_IV).decrypt(enc)
+
+
+@case("parse_raw")
+def _(n, scratch):
+    raw = _octocache(n)[0]
+    return lambda: GkmasManifest()._parse_raw(raw)
+
+
+@case("parse_jdict")
+def _(n, scratch):
+    jdict = _jdict(n)
+    return lambda: GkmasManifest()._parse_jdict(dict(jdict))
+
+
+@case("diclist_diff")
+def _(n, scratch):
+    new, old = _updated_manifest(n), _manifest(n)
+    abl, resl = new._abl, new._resl  # built outside the timed region
+    abl_old, resl_old = old._abl, old._resl
+
+    def diff():
+        abl.diff(abl_old, DICLIST_IGNORED_FIELDS)
+        resl.diff(resl_old, DICLIST_IGNORED_FIELDS)
+
+    return diff
+
+
+def _exporter(fmt: str) -> Callable:
+    def setup(n, scratch):
+        manifest = _manifest(n)
+        path = scratch / f"manifest.{fmt}"
+        return lambda: manifest.export(path)
+
+    return setup
+
+
+for _fmt in ["pdb", "json", "csv", "parquet", "arrow"]:
+    case(f"export_{_fmt}")(_exporter(_fmt))
+
+
+@case("ledger_partition")
+def _(n, scratch):
+    objects = list(_manifest(n))
+    ledger = DownloadLedger(scratch / "ledger.sqlite3", scratch)
+    for obj in objects:
+        ledger.record(obj)
+    ledger.commit()
+    return lambda: ledger.partition(objects)
+
+
+# ----------------------------------------------------------------------------
+# object cases (per call, independent of manifest size)
+
+
+@case("make_mask", scaled=False)
+def _(n, scratch):
+    make_mask = GkmasDeobfuscator._make_mask.__wrapped__  # bypass the cache
+    keys = [f"mdl_chr_bench-{i:06}" for i in range(BATCH_SIZE)]
+    return lambda: [make_mask(key) for key in keys]
+
+
+@case("deobfuscate", scaled=False)
+def _(n, scratch):
+    cipher = GkmasDeobfuscator("mdl_chr_bench-000000")
+    data = random.Random(0).randbytes(DEOBFUSCATE_SIZE)
+    return lambda: cipher.deobfuscate(data)
+
+
+@case("determine_subdir", scaled=False)
+def _(n, scratch):
+    obj = next(iter(_manifest(BATCH_SIZE)))
+    names = [o.name for o in _manifest(BATCH_SIZE)]
+    return lambda: [obj._determine_subdir(name) for name in names]
+
+
+@case("determine_new_size", scaled=False)
+def _(n, scratch):
+    obj = next(iter(_manifest(BATCH_SIZE)))
+    rng = random.Random(0)
+    sizes = [
+        (rng.randrange(64, 4096), rng.randrange(64, 4096)) for _ in range(BATCH_SIZE)
+    ]
+    modes = ["maximize", "ensure_fit", "preserve_npixel"]
+    return lambda: [
+        obj._determine_new_size(size, "16:9", modes[i % 3])
+        for i, size in enumerate(sizes)
+    ]
+
+
+def _image_exporter(width: int, height: int, img_format: str) -> Callable:
+    def setup(n, scratch):
+        name = "img_general_bench_000000"
+        obj = GkmasAssetBundle({"id": 1, "name": name, "objectName": _object_name(0)})
+        data = make_image_bundle(name, width, height)
+        path = scratch / f"{name}.unity3d"
+        return lambda: obj._export_img(path, data, True, img_format, None)
+
+    return setup
+
+
+def _obfuscated_image_saver(width: int, height: int, img_format: str) -> Callable:
+    def setup(n, scratch):
+        name = "img_general_bench_000000"
+        obj = GkmasAssetBundle({"id": 1, "name": name, "objectName": _object_name(0)})
+        data = make_image_bundle(name, width, height)
+        enc = bytes(GkmasDeobfuscator(name).deobfuscate(data))  # an involution
+        path = scratch / f"{name}.unity3d"
+        return lambda: obj._save(path, enc, True, img_format, None)
+
+    return setup
+
+
+for _width, _height in IMAGE_SIZES:
+    for _format in ["png", "jpg"]:
+        case(f"export_img_{_width}x{_height}_{_format}", scaled=False)(
+            _image_exporter(_width, _height, _format)
+        )
+    # deobfuscation followed by extraction, as _save() does for obfuscated bundles
+    case(f"save_obfuscated_img_{_width}x{_height}_png", scaled=False)(
+        _obfuscated_image_saver(_width, _height, "png")
+    )
+
+
+# ----------------------------------------------------------------------------
+# runner
+
+
+def measure(fn: Callable, repeat: int) -> float:
+    """
+    Returns the best per-call time (in seconds) over 'repeat' rounds, each round
+    running as many calls as fit into about 0.2 seconds (at least one).
+    """
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def run(cases: list, sizes: list, repeat: int) -> Dict[str, float]:
+    """
+    Measures the given cases, with scaled cases at each of the given sizes.
+    Returns per-call seconds keyed by '<case>' or '<case>@<size>'.
+    """
+
+    results = {}
+    for name in cases:
+        setup, scaled = CASES[name]
+        for n in sizes if scaled else [None]:
+            key = f"{name}@{_format_count(n)}" if scaled else name
+            with tempfile.TemporaryDirectory() as scratch, quiet():
+                results[key] = measure(setup(n, Path(scratch)), repeat)
+            print(f"{key:<40}{_format_time(results[key]):>12}", flush=True)
+    return results
+
+
+def remeasure(keys: list, repeat: int) -> Dict[str, float]:
+    """
+    Measures the given result keys (as returned by run()) once more, quietly.
+    """
+
+    results = {}
+    for key in keys:
+        name, _, size = key.partition("@")
+        setup, _ = CASES[name]
+        with tempfile.TemporaryDirectory() as scratch, quiet():
+            n = _parse_count(size) if size else None
+            results[key] = measure(setup(n, Path(scratch)), repeat)
+    return results
+
+
+def tolerance(key: str, threshold: float, spreads: Dict[str, float]) -> float:
+    """
+    Returns the relative slowdown tolerated for a case: 'threshold', or the noise
+    seen while recording its baseline (slowest over fastest pass), if larger.
+    """
+    return max(threshold, spreads.get(key, 1.0) - 1)
+
+
+def regressed(
+    results: Dict[str, float],
+    baselines: Dict[str, float],
+    threshold: float,
+    spreads: Dict[str, float] = {},
+) -> list:
+    """
+    Returns keys of cases slower than their baseline beyond their tolerance().
+    """
+    return [
+        key
+        for key, seconds in results.items()
+        if key in baselines
+        and seconds / baselines[key] - 1 > tolerance(key, threshold, spreads)
+    ]
+
+
+def compare(
+    results: Dict[str, float],
+    baselines: Dict[str, float],
+    threshold: float,
+    spreads: Dict[str, float] = {},
+):
+    """
+    Prints results relative to baselines, and returns keys of regressions,
+    i.e. cases slower than their baseline beyond their tolerance().
+    """
+
+    regressions = regressed(results, baselines, threshold, spreads)
+    print(
+        f"\n{'case':<40}{'baseline':>12}{'current':>12}{'change':>10}{'tolerance':>11}"
+    )
+    for key, seconds in results.items():
+        if key not in baselines:
+            print(f"{key:<40}{'-':>12}{_format_time(seconds):>12}{'new':>10}")
+            continue
+        flag = "  REGRESSION" if key in regressions else ""
+        print(
+            f"{key:<40}{_format_time(baselines[key]):>12}"
+            f"{_format_time(seconds):>12}{seconds / baselines[key] - 1:>+10.1%}"
+            f"{tolerance(key, threshold, spreads):>+11.0%}{flag}"
+        )
+    return regressions
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmark.micro",
+        description="Microbenchmarks of manifest and object hot paths.",
+    )
+    parser.add_argument("--case", nargs="+", default=list(CASES), choices=CASES)
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        default=DEFAULT_SIZES,
+        help="manifest sizes (number of entries) for scaled cases, e.g. 1k 500k",
+    )
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument(
+        "--passes",
+        type=int,
+        default=DEFAULT_PASSES,
+        help="passes per case when saving baselines, and at most per suspected "
+        "regression; the fastest counts (default: %(default)s)",
+    )
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE_PATH)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="relative slowdown flagged as a regression, unless within the noise "
+        "recorded with the baseline (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--save",
+        action="store_true",
+        help="record results as baselines (merged into existing ones)",
+    )
+    args = parser.parse_args(argv)
+
+    sizes = [_parse_count(size) for size in args.sizes]
+    results = run(args.case, sizes, args.repeat)
+
+    stored = {}
+    if args.baseline.exists():
+        stored = json.loads(args.baseline.read_text())
+
+    if args.save:
+        passes = [results] + [
+            remeasure(list(results), args.repeat) for _ in range(args.passes - 1)
+        ]
+        results = {key: min(p[key] for p in passes) for key in results}
+        spreads = {key: max(p[key] for p in passes) / results[key] for key in results}
+        stored = {
+            "note": BASELINE_NOTE,
+            "machine": _machine(),
+            "results": {**stored.get("results", {}), **results},
+            "spreads": {**stored.get("spreads", {}), **spreads},
+        }
+        args.baseline.write_text(json.dumps(stored, indent=4) + "\n")
+        print(f"\nBaselines saved to {args.baseline}")
+        return 0
+
+    if not stored:
+        print(f"\nNo baselines at {args.baseline}; record them with --save")
+        return 0
+    if stored.get("machine") != _machine():
+        print(f"\nNote: baselines were recorded on {stored.get('machine')}")
+
+    # a slow burst on a shared runner shouldn't fail the comparison,
+    # so suspects are measured again, keeping their fastest pass
+    baselines, spreads = stored["results"], stored.get("spreads", {})
+    for _ in range(args.passes - 1):
+        suspects = regressed(results, baselines, args.threshold, spreads)
+        if not suspects:
+            break
+        time.sleep(PASS_INTERVAL)
+        for key, seconds in remeasure(suspects, args.repeat).items():
+            results[key] = min(results[key], seconds)
+
+    regressions = compare(results, baselines, args.threshold, spreads)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+def _machine() -> str:
+    """
+    [INTERNAL] Describes the machine, to tell whether baselines are comparable.
+    """
+    return f"{platform.machine()} {platform.processor() or platform.system()}, Python {platform.python_version()}"
+
+
+def _parse_count(count: str) -> int:
+    """
+    [INTERNAL] Parses an entry count with an optional k/m suffix (powers of 1000).
+    """
+    count = count.strip().lower()
+    for scale, suffix in ((10**3, "k"), (10**6, "m")):
+        if count.endswith(suffix):
+            return int(float(count[:-1]) * scale)
+    return int(count)
+
+
+def _format_count(n: int) -> str:
+    if n % 10**6 == 0:
+        return f"{n // 10**6}m"
+    if n % 10**3 == 0:
+        return f"{n // 10**3}k"
+    return str(n)
+
+
+def _format_time(seconds: float) -> str:
+    for scale, unit in ((1, "s"), (1e-3, "ms"), (1e-6, "us")):
+        if seconds >= scale:
+            return f"{seconds / scale:.3f} {unit}"
+    return f"{seconds / 1e-9:.1f} ns"
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,266 @@
+"""
+server.py
+Local mock object server for benchmarking without network access.
+"""
+
+import GkmasObjectManager.object._download as object_download
+
+import re
+import time
+import random
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+
+# write granularity when throttling bandwidth; small enough for smooth pacing
+THROTTLE_CHUNK_SIZE = 16 << 10
+
+
+class MockObjectServer:
+    """
+    A threaded HTTP server that serves object payloads at GKMAS_OBJECT_SERVER-style
+    paths (i.e. '/<objectName>'), with keep-alive, 'Range: bytes=N-' support,
+    and configurable latency, bandwidth, capacity, and error and stall injection.
+
+    Attributes:
+        objects (dict): Payloads keyed by object name.
+        latency (float): Seconds to wait before responding to each request.
+        bandwidth (int): Per-connection bandwidth limit in bytes per second, if any.
+        link_bandwidth (int): Bandwidth limit shared by all connections
+            (as with a home connection), in bytes per second, if any.
+        capacity (int): Number of requests served concurrently, beyond which
+            requests are throttled with HTTP 429, if any.
+        error_rate (float): Probability of responding with 'error_status' instead.
+        error_status (int): HTTP status code of injected errors.
+        stall_rate (float): Probability of stalling a request before responding,
+            as with a congested CDN edge (i.e. the long tail of latency).
+        stall (float): Seconds that a stalled request waits on top of 'latency'.
+        url (str): Base URL of the server, once started.
+        requests (int): Number of requests served so far.
+        errors (int): Number of errors injected so far.
+        throttled (int): Number of requests throttled so far.
+        stalled (int): Number of requests stalled so far.
+
+    Methods:
+        start() -> MockObjectServer: Starts serving in a background thread.
+        stop(): Shuts down the server.
+        install() -> ContextManager: Points GkmasObjectManager at this server
+            for the duration of the block.
+
+    Example:
+        with MockObjectServer(payloads, latency=0.05) as server, server.install():
+            manifest.download(ALL_ASSETBUNDLES, nworker=16)
+    """
+
+    def __init__(
+        self,
+        objects: Dict[str, bytes],
+        latency: float = 0.0,
+        bandwidth: Optional[int] = None,
+        link_bandwidth: Optional[int] = None,
+        capacity: Optional[int] = None,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        stall_rate: float = 0.0,
+        stall: float = 0.0,
+        seed: int = 0,
+    ):
+        """
+        Initializes a server (not yet started) over the given payloads.
+
+        Args:
+            objects (Dict[str, bytes]): Payloads keyed by object name.
+            latency (float) = 0.0: Seconds to wait before responding to each request.
+            bandwidth (int) = None: Per-connection bandwidth limit in bytes per second.
+            link_bandwidth (int) = None: Shared bandwidth limit in bytes per second.
+            capacity (int) = None: Number of concurrent requests before HTTP 429.
+            error_rate (float) = 0.0: Probability of injecting an error response.
+            error_status (int) = 503: HTTP status code of injected errors.
+            stall_rate (float) = 0.0: Probability of stalling a request.
+            stall (float) = 0.0: Seconds that a stalled request waits.
+            seed (int) = 0: Random seed for error injection.
+        """
+        self.objects = objects
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.link_bandwidth = link_bandwidth
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.stall_rate = stall_rate
+        self.stall = stall
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+        self.stalled = 0
+        self._active = 0
+        self._link_free = 0.0  # time at which the shared link is next idle
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = None
+        self._thread = None
+
+    def __enter__(self) -> "MockObjectServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self) -> "MockObjectServer":
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    @contextmanager
+    def install(self):
+        """
+        Temporarily replaces the object server URL used by GkmasObjectManager
+        in this process (extractor processes never access the network).
+        """
+        original = object_download.GKMAS_OBJECT_SERVER
+        object_download.GKMAS_OBJECT_SERVER = self.url
+        try:
+            yield self
+        finally:
+            object_download.GKMAS_OBJECT_SERVER = original
+
+    def _inject_error(self) -> bool:
+        """
+        [INTERNAL] Counts a request and decides whether it fails.
+        """
+        with self._lock:
+            self.requests += 1
+            if self.error_rate and self._rng.random() < self.error_rate:
+                self.errors += 1
+                return True
+            return False
+
+    def _inject_stall(self) -> float:
+        """
+        [INTERNAL] Decides how long a request stalls, if at all.
+        """
+        with self._lock:
+            if self.stall_rate and self._rng.random() < self.stall_rate:
+                self.stalled += 1
+                return self.stall
+            return 0.0
+
+    def _admit(self) -> bool:
+        """
+        [INTERNAL] Takes a capacity slot for a request, unless all are taken.
+        """
+        with self._lock:
+            if self.capacity and self._active >= self.capacity:
+                self.throttled += 1
+                return False
+            self._active += 1
+            return True
+
+    def _release(self):
+        with self._lock:
+            self._active -= 1
+
+    def _reserve_link(self, nbytes: int) -> float:
+        """
+        [INTERNAL] Reserves the shared link for 'nbytes' bytes, first come first served,
+        and returns the time at which they are through.
+        """
+        with self._lock:
+            self._link_free = max(self._link_free, time.monotonic())
+            self._link_free += nbytes / self.link_bandwidth
+            return self._link_free
+
+    def _make_handler(self) -> type:
+        """
+        [INTERNAL] Binds a request handler class to this server.
+        """
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, as with the real CDN
+            disable_nagle_algorithm = True  # headers and body are written separately
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if not server._admit():
+                    self._send_empty(429)
+                    return
+                try:
+                    self._serve()
+                finally:
+                    server._release()
+
+            def _serve(self):
+                delay = server.latency + server._inject_stall()
+                if delay:
+                    time.sleep(delay)
+
+                if server._inject_error():
+                    self._send_empty(server.error_status)
+                    return
+
+                data = server.objects.get(self.path.lstrip("/"))
+                if data is None:
+                    self._send_empty(404)
+                    return
+
+                status, start = 200, 0
+                match = re.fullmatch(r"bytes=(\d+)-", self.headers.get("Range", ""))
+                if match and int(match.group(1)) < len(data):
+                    status, start = 206, int(match.group(1))
+                    self.send_response(status)
+                    self.send_header(
+                        "Content-Range", f"bytes {start}-{len(data) - 1}/{len(data)}"
+                    )
+                else:
+                    self.send_response(status)
+
+                body = memoryview(data)[start:]
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Content-Type", "application/octet-stream")
+                self.end_headers()
+                try:
+                    self._write(body)
+                except ConnectionError:
+                    pass  # client gave up (e.g. aborted run); nothing to clean up
+
+            def _send_empty(self, status: int):
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def _write(self, body: memoryview):
+                if not (server.bandwidth or server.link_bandwidth):
+                    self.wfile.write(body)
+                    return
+                start = time.monotonic()
+                for i in range(0, len(body), THROTTLE_CHUNK_SIZE):
+                    chunk = body[i : i + THROTTLE_CHUNK_SIZE]
+                    due = start
+                    if server.bandwidth:
+                        due += (i + len(chunk)) / server.bandwidth
+                    if server.link_bandwidth:
+                        due = max(due, server._reserve_link(len(chunk)))
+                    self.wfile.write(chunk)
+                    ahead = due - time.monotonic()
+                    if ahead > 0:
+                        time.sleep(ahead)
+
+        return Handler
@@ -0,0 +1,348 @@
+"""
+synthetic.py
+Synthetic manifests and object payloads for benchmarking.
+"""
+
+from GkmasObjectManager import GkmasManifest
+from GkmasObjectManager.const import (
+    UNITY_SIGNATURE,
+    GKMAS_UNITY_VERSION,
+    GKMAS_OCTOCACHE_KEY,
+    GKMAS_OCTOCACHE_IV,
+)
+from GkmasObjectManager.manifest.octodb_pb2 import Database as ProtoDB
+from GkmasObjectManager.object.obfuscate import GkmasDeobfuscator
+
+import math
+import random
+import string
+import struct
+from hashlib import md5
+from typing import Dict, List, Tuple
+
+
+# Object size mixes for end-to-end benchmarks. Each group is
+# (name template, is assetbundle, count, minimum size, maximum size);
+# sizes are drawn log-uniformly, which is roughly how real manifests look.
+# 'img_' assetbundles hold a real texture of about that size (in RGBA32 pixels),
+# so that they can be extracted; the 'images' mix requires 'UnityPy'.
+SIZE_MIXES = {
+    "small": [
+        ("sud_vo_bench_{:06}.awb", False, 400, 4 << 10, 64 << 10),
+        ("mot_bench_{:06}", True, 200, 4 << 10, 64 << 10),
+    ],
+    "large": [
+        ("mdl_chr_bench-{:06}", True, 24, 2 << 20, 8 << 20),
+        ("mov_bench_{:06}.usm", False, 8, 8 << 20, 16 << 20),
+    ],
+    "mixed": [
+        ("sud_vo_bench_{:06}.awb", False, 200, 4 << 10, 256 << 10),
+        ("mot_bench_{:06}", True, 150, 4 << 10, 64 << 10),
+        ("mdl_chr_bench-{:06}", True, 40, 256 << 10, 4 << 20),
+        ("mov_bench_{:06}.usm", False, 4, 8 << 20, 16 << 20),
+    ],
+    "images": [
+        ("img_general_bench_{:06}", True, 32, 64 << 10, 4 << 20),
+    ],
+}
+
+# name templates for metadata-only manifests (no payloads)
+ENTRY_TEMPLATES = [
+    ("img_general_bench_{:06}", True),
+    ("mdl_chr_bench-{:06}", True),
+    ("mot_all_bench_{:06}", True),
+    ("sud_vo_bench_{:06}.awb", False),
+    ("adv_bench_{:06}.txt", False),
+]
+
+# fraction of synthetic assetbundles that are obfuscated, as on the real server
+OBFUSCATED_RATIO = 0.5
+
+OBJECT_NAME_CHARS = string.ascii_letters + string.digits
+
+# SerializedFile header length for format version 22+
+SERIALIZED_HEADER_LEN = 48
+
+
+def make_jdict(nentry: int, seed: int = 0) -> dict:
+    """
+    Generates a MessageToDict()-style manifest dictionary with 'nentry' entries
+    (split between assetbundles and resources as in ENTRY_TEMPLATES), without payloads.
+    All Data fields are populated with plausible values, so that parsing,
+    diffing, and exporting exercise the same paths as a real manifest.
+
+    Args:
+        nentry (int): Total number of entries.
+        seed (int) = 0: Random seed; the same seed yields the same manifest.
+    """
+
+    rng = random.Random(seed)
+    abl, resl = [], []
+    for i in range(nentry):
+        template, is_ab = ENTRY_TEMPLATES[i % len(ENTRY_TEMPLATES)]
+        entries = abl if is_ab else resl
+        name = template.format(i)
+        # fields in protobuf field order, as MessageToDict() emits them
+        entry = {"id": len(entries) + 1}
+        if not is_ab:
+            entry["filepath"] = f"bench/{name}"
+        entry["name"] = name
+        entry["size"] = int(2 ** rng.uniform(12, 22))
+        if is_ab:
+            entry["crc"] = rng.getrandbits(32)
+        entry["tagid"] = [rng.randrange(1, 64)]
+        if is_ab:
+            entry["dependencies"] = [rng.randrange(1, nentry + 1) for _ in range(2)]
+        entry["state"] = rng.choice(["ADD", "UPDATE"])
+        entry["md5"] = "%032x" % rng.getrandbits(128)
+        entry["objectName"] = _object_name(i)
+        entry["generation"] = str(rng.getrandbits(60))
+        entry["uploadVersionId"] = rng.randrange(1, 100)
+        entries.append(entry)
+
+    return {
+        "revision": 1,
+        "assetBundleList": abl,
+        "resourceList": resl,
+        "urlFormat": "{o}",
+    }
+
+
+def make_octocache(jdict: dict) -> Tuple[bytes, bytes]:
+    """
+    Serializes a manifest dictionary into ProtoDB, and encrypts it as an octocache
+    (MD5-prefixed, AES-CBC with the octocache key). Returns (raw ProtoDB, octocache).
+    """
+    from Crypto.Cipher import AES
+    from Crypto.Util.Padding import pad
+    from google.protobuf.json_format import ParseDict
+
+    raw = ParseDict(jdict, ProtoDB()).SerializeToString()
+    cipher = AES.new(GKMAS_OCTOCACHE_KEY, AES.MODE_CBC, GKMAS_OCTOCACHE_IV)
+    return raw, cipher.encrypt(pad(md5(raw).digest() + raw, 16, style="pkcs7"))
+
+
+def make_manifest(jdict: dict, revision: str = "synthetic") -> GkmasManifest:
+    """
+    Creates a manifest from a dictionary made by make_jdict() or make_objects(),
+    the same way GkmasManifest.__sub__() creates one from a diff.
+    """
+    manifest = GkmasManifest()
+    manifest.revision = revision
+    manifest._parse_jdict(jdict)
+    return manifest
+
+
+def make_objects(mix: str, seed: int = 0) -> Tuple[GkmasManifest, Dict[str, bytes]]:
+    """
+    Generates a manifest along with the server-side payloads of its objects,
+    keyed by object name (i.e. the path under GKMAS_OBJECT_SERVER).
+
+    Assetbundles are Unity-signed random bytes, and OBFUSCATED_RATIO of them are
+    obfuscated by running GkmasDeobfuscator in reverse (the XOR is an involution),
+    so that the client goes through the same deobfuscation as with the real server.
+    Image assetbundles hold a texture built by make_image_bundle(), so that
+    they go through deobfuscation and extraction alike.
+
+    Args:
+        mix (str): One of SIZE_MIXES.
+        seed (int) = 0: Random seed; the same seed yields the same objects.
+    """
+
+    rng = random.Random(seed)
+    abl, resl = [], []
+    payloads = {}
+    i = 0
+
+    for template, is_ab, count, lo, hi in SIZE_MIXES[mix]:
+        for _ in range(count):
+            name = template.format(i)
+            size = int(2 ** rng.uniform(lo.bit_length() - 1, hi.bit_length() - 1))
+            if is_ab:
+                if name.startswith("img_"):
+                    side = 1 << round(math.log2(size / 4) / 2)  # square, RGBA32
+                    data = make_image_bundle(name, side, side, seed=rng.getrandbits(32))
+                else:
+                    data = UNITY_SIGNATURE + rng.randbytes(size - len(UNITY_SIGNATURE))
+                if rng.random() < OBFUSCATED_RATIO:
+                    data = bytes(GkmasDeobfuscator(name).deobfuscate(data))
+            else:
+                data = rng.randbytes(size)
+
+            entries = abl if is_ab else resl
+            entries.append(
+                {
+                    "id": len(entries) + 1,
+                    "name": name,
+                    "size": len(data),
+                    "state": "ADD",
+                    "md5": md5(data).hexdigest(),
+                    "objectName": _object_name(i),
+                }
+            )
+            payloads[_object_name(i)] = data
+            i += 1
+
+    jdict = {"assetBundleList": abl, "resourceList": resl}
+    return make_manifest(jdict, revision=f"synthetic-{mix}"), payloads
+
+
+def _object_name(i: int) -> str:
+    """
+    [INTERNAL] Encodes an index as a unique 6-character alphanumeric object name.
+    """
+    chars = []
+    for _ in range(6):
+        i, r = divmod(i, len(OBJECT_NAME_CHARS))
+        chars.append(OBJECT_NAME_CHARS[r])
+    return "".join(chars)
+
+
+def make_image_bundle(name: str, width: int, height: int, seed: int = 0) -> bytes:
+    """
+    Builds a minimal uncompressed UnityFS assetbundle holding a single RGBA32
+    Texture2D (with random pixels) in its container, as found in 'img_.*' bundles.
+    Objects are serialized without type trees, so UnityPy reads them through its
+    bundled type information for GKMAS_UNITY_VERSION, as it does for real bundles.
+    Requires 'UnityPy'.
+
+    Args:
+        name (str): Assetbundle name, used as the texture and container name.
+        width (int): Texture width in pixels.
+        height (int): Texture height in pixels.
+        seed (int) = 0: Random seed for pixel data.
+    """
+
+    from UnityPy.enums import ClassIDType
+    from UnityPy.helpers.Tpk import get_typetree_node
+    from UnityPy.helpers.TypeTreeHelper import write_typetree
+    from UnityPy.helpers.UnityVersion import UnityVersion
+    from UnityPy.streams import EndianBinaryWriter
+
+    version = UnityVersion.from_str(GKMAS_UNITY_VERSION)
+    pixels = random.Random(seed).randbytes(width * height * 4)
+    texture_id, bundle_id = 2, 1
+
+    texture = {
+        "m_Name": name,
+        "m_ForcedFallbackFormat": 4,
+        "m_DownscaleFallback": False,
+        "m_IsAlphaChannelOptional": False,
+        "m_Width": width,
+        "m_Height": height,
+        "m_CompleteImageSize": len(pixels),
+        "m_MipsStripped": 0,
+        "m_TextureFormat": 4,  # RGBA32
+        "m_MipCount": 1,
+        "m_IsReadable": False,
+        "m_IsPreProcessed": False,
+        "m_IgnoreMipmapLimit": False,
+        "m_MipmapLimitGroupName": "",
+        "m_StreamingMipmaps": False,
+        "m_StreamingMipmapsPriority": 0,
+        "m_ImageCount": 1,
+        "m_TextureDimension": 2,
+        "m_TextureSettings": {
+            "m_FilterMode": 1,
+            "m_Aniso": 1,
+            "m_MipBias": 0.0,
+            "m_WrapU": 1,
+            "m_WrapV": 1,
+            "m_WrapW": 1,
+        },
+        "m_LightmapFormat": 0,
+        "m_ColorSpace": 1,
+        "m_PlatformBlob": [],
+        "image data": pixels,
+        "m_StreamData": {"offset": 0, "size": 0, "path": ""},
+    }
+    pptr = {"m_FileID": 0, "m_PathID": texture_id}
+    asset_info = {"preloadIndex": 0, "preloadSize": 1, "asset": pptr}
+    bundle = {
+        "m_Name": name,
+        "m_PreloadTable": [pptr],
+        "m_Container": [(f"assets/{name}.png", asset_info)],
+        "m_MainAsset": {"preloadIndex": 0, "preloadSize": 0, "asset": pptr},
+        "m_RuntimeCompatibility": 1,
+        "m_AssetBundleName": name,
+        "m_Dependencies": [],
+        "m_IsStreamedSceneAssetBundle": False,
+        "m_ExplicitDataLayout": 0,
+        "m_PathFlags": 7,
+        "m_SceneHashes": [],
+    }
+
+    objects = []  # (path ID, type index, serialized data)
+    for type_index, (path_id, class_id, value) in enumerate(
+        [
+            (bundle_id, ClassIDType.AssetBundle, bundle),
+            (texture_id, ClassIDType.Texture2D, texture),
+        ]
+    ):
+        writer = EndianBinaryWriter(endian="<")
+        write_typetree(value, get_typetree_node(class_id, version), writer)
+        objects.append((path_id, int(class_id), writer.bytes))
+
+    cab = _serialized_file(objects)
+    return _unityfs(f"CAB-{md5(name.encode()).hexdigest()}", cab)
+
+
+def _serialized_file(objects: List[Tuple[int, int, bytes]]) -> bytes:
+    """
+    [INTERNAL] Serializes objects of distinct classes, given as
+    (path ID, class ID, data), into a SerializedFile (format version 22)
+    without type trees.
+    """
+
+    # metadata, in little endian
+    meta = bytearray(GKMAS_UNITY_VERSION.encode() + b"\0")
+    meta += struct.pack("<i?i", 13, False, len(objects))  # Android; no type trees
+    for _, class_id, _ in objects:
+        meta += struct.pack("<i?h16x", class_id, False, -1)
+    meta += struct.pack("<i", len(objects))
+
+    data = bytearray()
+    for type_index, (path_id, _, payload) in enumerate(objects):
+        meta += bytes(-(SERIALIZED_HEADER_LEN + len(meta)) % 4)  # aligned path ID
+        meta += struct.pack("<qqIi", path_id, len(data), len(payload), type_index)
+        data += payload + bytes(-len(payload) % 8)
+    meta += struct.pack("<iii", 0, 0, 0)  # scripts, externals, ref types
+    meta += b"\0"  # user information
+
+    data_offset = SERIALIZED_HEADER_LEN + len(meta)
+    data_offset += -data_offset % 16
+    # header, in big endian (legacy fields zeroed as Unity does for version 22+)
+    header = struct.pack(
+        ">IIII?3xIqqq",
+        0,
+        0,
+        22,
+        0,
+        False,
+        len(meta),
+        data_offset + len(data),
+        data_offset,
+        0,
+    )
+    padding = bytes(data_offset - SERIALIZED_HEADER_LEN - len(meta))
+    return header + meta + padding + data
+
+
+def _unityfs(name: str, data: bytes) -> bytes:
+    """
+    [INTERNAL] Wraps a single file into an uncompressed UnityFS bundle (format version 8).
+    """
+
+    blocks_info = bytes(16)  # uncompressed data hash
+    blocks_info += struct.pack(">iIIH", 1, len(data), len(data), 0)
+    blocks_info += struct.pack(">iqqI", 1, 0, len(data), 4) + name.encode() + b"\0"
+
+    header = UNITY_SIGNATURE + b"\0" + struct.pack(">I", 8)
+    header += b"5.x.x\0" + GKMAS_UNITY_VERSION.encode() + b"\0"
+    size_pos = len(header)
+    header += struct.pack(">qIII", 0, len(blocks_info), len(blocks_info), 0x40)
+    header += bytes(-len(header) % 16)
+
+    bundle = bytearray(header + blocks_info + data)
+    bundle[size_pos : size_pos + 8] = struct.pack(">q", len(bundle))
+    return bytes(bundle)
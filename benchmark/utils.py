@@ -0,0 +1,30 @@
+"""
+utils.py
+Utility functions for benchmarks.
+"""
+
+import os
+import sys
+from contextlib import contextmanager, redirect_stdout
+
+
+@contextmanager
+def quiet(enabled: bool = True):
+    """
+    Silences library logs (printed to stdout) for the duration of the block,
+    which would otherwise dominate both the output and, for fast paths, the measurement.
+    The stdout file descriptor is redirected too, so that processes spawned
+    within the block (e.g. image extractors) inherit the silence.
+    """
+    if not enabled:
+        yield
+        return
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        sys.__stdout__.flush()
+        saved = os.dup(1)
+        os.dup2(devnull.fileno(), 1)
+        try:
+            yield
+        finally:
+            os.dup2(saved, 1)
+            os.close(saved)
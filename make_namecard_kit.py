@@ -54,29 +54,29 @@ if __name__ == "__main__":
     manifest = GkmasManifest(argv[1])
     target = f"gkmas_namecard_kit_v{manifest.revision}/"  # output directory
 
+    packers = dict(instructions_pack)
+    jobs = []
     for pattern, subdir, *config in instructions_dl:
-        logger.info(f"Populating '{subdir}'")
-
         ratio = config[0] if config else None
         fmt = config[1] if len(config) > 1 else "png"
         # In this case, all JPGs must be resized, but this remains unfixed
         # since this instruction-based coding style can hardly be generalized
-
-        manifest.download(
-            pattern,
-            path=target + subdir,
-            categorize=False,
-            extract_img=True,
-            img_format=fmt,
-            img_resize=ratio,
+        jobs.append(
+            {
+                "criteria": pattern,
+                "path": target + subdir,
+                "categorize": False,
+                "extract_img": True,
+                "img_format": fmt,
+                "img_resize": ratio,
+                "subdir": packers.get(subdir),  # post-categorized at write time
+            }
         )
 
-    for subdir, cat_func in instructions_pack:
-        logger.info(f"Post-categorizing '{subdir}'")
-        parent = target + subdir
-        for f in os.listdir(parent):
-            cat = cat_func(f)
-            os.makedirs(os.path.join(parent, cat), exist_ok=True)
-            os.rename(os.path.join(parent, f), os.path.join(parent, cat, f))
+    # All instructions run as a single batch on one shared pool
+    manifest.download_batch(
+        jobs,
+        nprocess=os.cpu_count(),  # extraction is the bottleneck here
+    )
 
     logger.info(f"Namecard kit ready at '{target}'")
@@ -0,0 +1,47 @@
+"""
+conftest.py
+Shared fixtures: synthetic manifests with their payloads, as used by the benchmarks.
+"""
+
+import pytest
+from hashlib import md5
+
+from benchmark.synthetic import make_objects, make_manifest
+from benchmark.utils import quiet
+
+
+@pytest.fixture(scope="session")
+def small() -> tuple:
+    """
+    A synthetic manifest of 400 resources and 200 (half obfuscated) assetbundles,
+    along with its server-side payloads keyed by object name.
+    """
+    with quiet():
+        return make_objects("small", seed=1)
+
+
+@pytest.fixture
+def revise():
+    """
+    Returns a function making the next revision of a manifest, in which the given
+    resources have changed content (of the same size). Returns the new manifest
+    and payloads; the original ones are left untouched.
+    """
+
+    def revise(manifest, payloads: dict, names: list) -> tuple:
+        jdict = manifest.jdict
+        resources = []
+        payloads = dict(payloads)
+        for entry in jdict["resourceList"]:
+            entry = dict(entry)
+            if entry["name"] in names:
+                data = bytearray(payloads[entry["objectName"]])
+                data[0] ^= 0xFF
+                payloads[entry["objectName"]] = bytes(data)
+                entry["md5"] = md5(data).hexdigest()
+            resources.append(entry)
+        jdict = {**jdict, "resourceList": resources}
+        with quiet():
+            return make_manifest(jdict, revision="synthetic-revised"), payloads
+
+    return revise
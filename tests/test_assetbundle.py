@@ -0,0 +1,62 @@
+"""
+test_assetbundle.py
+Tests of GkmasAssetBundle deobfuscation and image extraction.
+"""
+
+import pytest
+from hashlib import md5
+
+from benchmark.server import MockObjectServer
+from benchmark.synthetic import make_image_bundle, make_manifest, _object_name
+from benchmark.utils import quiet
+from GkmasObjectManager.object.obfuscate import GkmasDeobfuscator
+
+
+NAME = "img_general_test_000000"
+WIDTH, HEIGHT = 64, 32
+
+
+def _obfuscated_image_bundle() -> tuple:
+    """
+    Returns a manifest holding a single obfuscated image bundle,
+    along with its server-side payloads.
+    """
+    data = make_image_bundle(NAME, WIDTH, HEIGHT)
+    data = bytes(GkmasDeobfuscator(NAME).deobfuscate(data))  # an involution
+    entry = {
+        "id": 1,
+        "name": NAME,
+        "size": len(data),
+        "state": "ADD",
+        "md5": md5(data).hexdigest(),
+        "objectName": _object_name(0),
+    }
+    with quiet():
+        manifest = make_manifest({"assetBundleList": [entry], "resourceList": []})
+    return manifest, {entry["objectName"]: data}
+
+
+def test_deobfuscate_keeps_buffer_type():
+    cipher = GkmasDeobfuscator(NAME)
+    data = make_image_bundle(NAME, WIDTH, HEIGHT)
+    enc = bytes(cipher.deobfuscate(data))
+
+    dec = cipher.deobfuscate(enc)
+    assert type(dec) is bytes and dec == data
+
+    buf = bytearray(enc)
+    assert cipher.deobfuscate(buf) is buf and buf == data
+
+
+@pytest.mark.parametrize("nprocess", [0, 2])
+def test_obfuscated_image_is_extracted(tmp_path, nprocess):
+    from PIL import Image
+
+    manifest, payloads = _obfuscated_image_bundle()
+    with MockObjectServer(payloads) as server, server.install(), quiet():
+        result = manifest.download(NAME, path=tmp_path, nprocess=nprocess)
+
+    assert not result.failed
+    (image,) = tmp_path.rglob(f"{NAME}.png")
+    with Image.open(image) as img:
+        assert img.size == (WIDTH, HEIGHT)
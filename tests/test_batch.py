@@ -0,0 +1,38 @@
+"""
+test_batch.py
+Tests of GkmasManifest.download_batch().
+"""
+
+import pytest
+from hashlib import md5
+
+from benchmark.server import MockObjectServer
+from benchmark.utils import quiet
+
+
+@pytest.mark.parametrize("backend", ["thread", "async"])
+def test_shared_objects_reach_every_job(tmp_path, small, backend):
+    manifest, payloads = small
+    jobs = [
+        {"criteria": r"mot_bench_00040[0-4].*", "path": tmp_path / "a"},
+        {
+            "criteria": [r"mot_bench_00040[3-9].*", r"sud_vo_bench_00000[0-2].*"],
+            "path": tmp_path / "b",
+            "categorize": False,
+        },
+        {"criteria": r"mot_bench_000404.*", "path": tmp_path / "c"},
+    ]
+    with MockObjectServer(payloads) as server, server.install(), quiet():
+        result = manifest.download_batch(jobs, backend=backend)
+
+    assert result.ok and server.requests == 13  # unique objects
+    assert len(result.succeeded) == 5 + 10 + 1  # placements
+    for job in jobs:
+        criteria = job["criteria"]
+        for obj in manifest._select(
+            *([criteria] if isinstance(criteria, str) else criteria)
+        ):
+            path = obj._download_path(
+                job["path"], job.get("categorize", True), mkdir=False
+            )
+            assert obj._verify(path, True, "png")[0] == "ok", path
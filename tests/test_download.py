@@ -0,0 +1,123 @@
+"""
+test_download.py
+Tests of object downloading, against a local mock object server.
+"""
+
+import json
+import pytest
+from hashlib import md5
+
+from benchmark.server import MockObjectServer
+from benchmark.utils import quiet
+
+
+RESOURCES = "sud_vo_bench_00000[0-4]"
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"backend": "thread"},
+        {"backend": "thread", "stream": True},
+        {"backend": "async"},
+    ],
+)
+def test_cache_survives_next_revision(tmp_path, small, revise, options):
+    manifest, payloads = small
+    objects = manifest._select(RESOURCES)
+    revised, revised_payloads = revise(manifest, payloads, [o.name for o in objects])
+    cache = tmp_path / "cache"
+
+    for m, p in [(manifest, payloads), (revised, revised_payloads)]:
+        with MockObjectServer(p) as server, server.install(), quiet():
+            m.download(RESOURCES, path=tmp_path / "out", cache=cache, **options)
+
+    for obj in objects:  # entries of the first revision were not overwritten
+        assert md5(obj._cache_path(cache).read_bytes()).hexdigest() == obj.md5
+
+    with MockObjectServer(payloads) as server, server.install(), quiet():
+        result = manifest.download(
+            RESOURCES, path=tmp_path / "again", cache=cache, **options
+        )
+    assert len(result.succeeded) == len(objects) and server.requests == 0
+
+
+def test_rerun_skips_by_size(tmp_path, small):
+    manifest, payloads = small
+    altered, truncated, *_ = objects = manifest._select(RESOURCES)
+    with MockObjectServer(payloads) as server, server.install(), quiet():
+        manifest.download(RESOURCES, path=tmp_path)
+
+        path = altered._download_path(tmp_path, True, mkdir=False)
+        path.write_bytes(bytes(altered.size))  # same size; left to verify()
+        path = truncated._download_path(tmp_path, True, mkdir=False)
+        path.write_bytes(path.read_bytes()[:-1])
+
+        before = server.requests
+        result = manifest.download(RESOURCES, path=tmp_path)
+
+    assert server.requests - before == 1
+    assert [obj.name for obj in result.succeeded] == [truncated.name]
+    assert len(result.skipped) == len(objects) - 1
+    assert md5(path.read_bytes()).hexdigest() == truncated.md5
+
+
+def _leave_part(obj, path, data: bytes, meta: dict):
+    """
+    Leaves behind the '.part' file and sidecar of an interrupted streamed download.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.with_name(path.name + ".part").write_bytes(data)
+    path.with_name(path.name + ".part.json").write_text(json.dumps(meta))
+
+
+def test_stream_resumes_part(tmp_path, small):
+    manifest, payloads = small
+    obj = manifest._select(RESOURCES)[0]
+    data = payloads[obj.objectName]
+    half = len(data) // 2
+    path = obj._download_path(tmp_path, True, mkdir=False)
+    _leave_part(obj, path, data[:half], {"md5": obj.md5, "size": obj.size})
+
+    # only a request for the remaining bytes gets the right ones
+    garbled = {obj.objectName: bytes(half) + data[half:]}
+    with MockObjectServer(garbled) as server, server.install(), quiet():
+        result = manifest.download(obj, path=tmp_path, stream=True, retries=0)
+
+    assert [o.name for o in result.succeeded] == [obj.name]
+    assert server.requests == 1
+    assert path.read_bytes() == data
+    assert not path.with_name(path.name + ".part").exists()
+    assert not path.with_name(path.name + ".part.json").exists()
+
+
+def test_stream_discards_mismatched_part(tmp_path, small):
+    manifest, payloads = small
+    obj = manifest._select(RESOURCES)[0]
+    data = payloads[obj.objectName]
+    path = obj._download_path(tmp_path, True, mkdir=False)
+    # left over from another revision, so the prefix cannot be trusted
+    _leave_part(obj, path, bytes(len(data) // 2), {"md5": "0" * 32, "size": obj.size})
+
+    with MockObjectServer(payloads) as server, server.install(), quiet():
+        result = manifest.download(obj, path=tmp_path, stream=True, retries=0)
+
+    assert [o.name for o in result.succeeded] == [obj.name]
+    assert path.read_bytes() == data
+
+
+def test_cache_hit_needs_no_request(tmp_path, small):
+    manifest, payloads = small
+    objects = manifest._select(RESOURCES)
+    cache = tmp_path / "cache"
+    with MockObjectServer(payloads) as server, server.install(), quiet():
+        manifest.download(RESOURCES, path=tmp_path / "first", cache=cache)
+        before = server.requests
+        result = manifest.download(RESOURCES, path=tmp_path / "second", cache=cache)
+
+    assert server.requests == before
+    assert len(result.succeeded) == len(objects)
+    for obj in objects:  # content-addressed, i.e. keyed by MD5 hash
+        assert obj.md5 in obj._cache_path(cache).as_posix()
+        path = obj._download_path(tmp_path / "second", True, mkdir=False)
+        assert path.read_bytes() == payloads[obj.objectName]
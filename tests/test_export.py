@@ -0,0 +1,76 @@
+"""
+test_export.py
+Tests of GkmasManifest exporting, against the whole-document serialization
+that the streaming exporters replace.
+"""
+
+import json
+import pytest
+
+from benchmark.synthetic import make_jdict, make_manifest
+from benchmark.utils import quiet
+from GkmasObjectManager import GkmasManifest
+from GkmasObjectManager.const import CSV_COLUMNS
+from GkmasObjectManager.manifest import _export
+from GkmasObjectManager.manifest.octodb_pb2 import Database as ProtoDB
+from google.protobuf.json_format import ParseDict
+
+
+@pytest.fixture(scope="module")
+def manifest():
+    with quiet():
+        return make_manifest(make_jdict(500))
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    # more than one chunk per table, with a partial last one
+    monkeypatch.setattr(_export, "JSON_CHUNK_ROWS", 64)
+
+
+def test_json_matches_dumps(tmp_path, manifest, small_chunks):
+    path = tmp_path / "manifest.json"
+    with quiet():
+        manifest.export(path)
+    assert path.read_text() == json.dumps(manifest.jdict, indent=4)
+
+
+def test_json_of_empty_manifest(tmp_path):
+    with quiet():
+        manifest = make_manifest({"assetBundleList": [], "resourceList": []})
+        manifest.export(tmp_path / "manifest.json")
+    text = (tmp_path / "manifest.json").read_text()
+    assert text == json.dumps(manifest.jdict, indent=4)
+
+
+def test_csv_matches_pandas(tmp_path, manifest):
+    pd = pytest.importorskip("pandas")
+    path = tmp_path / "manifest.csv"
+    with quiet():
+        manifest.export(path)
+
+    jdict = manifest.jdict
+    dfa = pd.DataFrame(jdict["assetBundleList"], columns=CSV_COLUMNS)
+    dfa["name"] = dfa["name"].apply(lambda x: x + ".unity3d")
+    dfr = pd.DataFrame(jdict["resourceList"], columns=CSV_COLUMNS)
+    df = pd.concat([dfa, dfr], ignore_index=True)
+    df.sort_values("name", inplace=True)
+    assert path.read_text() == df.to_csv(index=False)
+
+
+def test_pdb_matches_protobuf(tmp_path, manifest):
+    path = tmp_path / "manifest.pdb"
+    with quiet():
+        manifest.export(path)
+    expected = ParseDict(manifest.jdict, ProtoDB()).SerializeToString()
+    assert path.read_bytes() == expected
+
+
+@pytest.mark.parametrize("suffix", [".parquet", ".arrow"])
+def test_columnar_round_trip(tmp_path, manifest, suffix):
+    pytest.importorskip("pyarrow")
+    path = tmp_path / f"manifest{suffix}"
+    with quiet():
+        manifest.export(path)
+        loaded = GkmasManifest(path)
+    assert loaded.jdict == manifest.jdict
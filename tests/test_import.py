@@ -0,0 +1,53 @@
+"""
+test_import.py
+Import-time checks for GkmasObjectManager, which must stay cheap to import.
+Heavy dependencies are loaded lazily, only when a feature needing them runs.
+"""
+
+import sys
+import json
+import subprocess
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# dependencies that must not be loaded by a bare 'import GkmasObjectManager'
+LAZY_MODULES = ["UnityPy", "PIL", "pandas", "pyarrow", "aiohttp"]
+
+# cumulative import time budget in seconds, generous enough for slow CI runners
+IMPORT_TIME_BUDGET = 1.5
+
+
+def _import_package(*flags: str) -> subprocess.CompletedProcess:
+    """
+    Imports the package in a fresh interpreter (so that nothing imported by pytest
+    leaks in), printing the loaded top-level module names as JSON to stdout.
+    """
+    code = (
+        "import sys, json; import GkmasObjectManager; "
+        "print(json.dumps(sorted({m.split('.')[0] for m in sys.modules})))"
+    )
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def test_heavy_dependencies_not_imported():
+    loaded = set(json.loads(_import_package().stdout))
+    assert not loaded & set(LAZY_MODULES), sorted(loaded & set(LAZY_MODULES))
+
+
+def test_import_time_within_budget():
+    # lines look like 'import time:   self [us] | cumulative | imported package'
+    cumulative = None
+    for line in _import_package("-X", "importtime").stderr.splitlines():
+        fields = [field.strip() for field in line.split("|")]
+        if len(fields) == 3 and fields[2] == "GkmasObjectManager":
+            cumulative = int(fields[1]) / 1e6
+    assert cumulative is not None, "no import time reported for GkmasObjectManager"
+    assert cumulative < IMPORT_TIME_BUDGET, f"import took {cumulative:.3f}s"
@@ -0,0 +1,92 @@
+"""
+test_ledger.py
+Tests of the download ledger, and of incremental downloading with it.
+"""
+
+import pytest
+
+from benchmark.server import MockObjectServer
+from benchmark.synthetic import make_jdict, make_manifest
+from benchmark.utils import quiet
+from GkmasObjectManager.const import ALL_ASSETBUNDLES, ALL_RESOURCES
+from GkmasObjectManager.ledger import DownloadLedger
+
+
+SELECTION = ["sud_vo_bench_00000[0-9].*", "mot_bench_00040[0-4]"]
+
+
+def _names(objects) -> list:
+    return sorted(obj.name for obj in objects)
+
+
+@pytest.fixture(scope="module")
+def manifest():
+    with quiet():
+        return make_manifest(make_jdict(50))
+
+
+def test_partition(tmp_path, manifest, revise):
+    objects = manifest._select(ALL_ASSETBUNDLES, ALL_RESOURCES)
+    recorded, unrecorded = objects[::2], objects[1::2]
+    with DownloadLedger(tmp_path / "ledger.db", tmp_path) as ledger:
+        for obj in recorded:
+            ledger.record(obj)
+        assert ledger.has(recorded[0]) and not ledger.has(unrecorded[0])
+        assert ledger.recorded() == {obj.name: obj.md5 for obj in recorded}
+        missing, stale, uptodate = ledger.partition(objects)
+    assert _names(missing) == _names(unrecorded)
+    assert stale == [] and _names(uptodate) == _names(recorded)
+
+    # another revision of a recorded resource is stale
+    changed = next(obj for obj in recorded if obj.name.startswith("sud_"))
+    revised, _ = revise(
+        manifest, {o.objectName: bytes(1) for o in objects}, [changed.name]
+    )
+    with DownloadLedger(tmp_path / "ledger.db", tmp_path) as ledger:
+        assert not ledger.has(revised[changed.name])
+        missing, stale, uptodate = ledger.partition(revised._select(ALL_RESOURCES))
+    assert _names(stale) == [changed.name]
+
+
+def test_partition_by_options(tmp_path, manifest):
+    objects = manifest._select(ALL_ASSETBUNDLES, ALL_RESOURCES)
+    with DownloadLedger(tmp_path / "ledger.db", tmp_path) as ledger:
+        for obj in objects:
+            ledger.record(obj)
+
+    # the image format only matters to assetbundles extracted into images
+    with DownloadLedger(tmp_path / "ledger.db", tmp_path, img_format="jpg") as ledger:
+        missing, stale, uptodate = ledger.partition(objects)
+    assert missing == []
+    assert _names(stale) == _names(manifest._select("img_.*"))
+    assert len(uptodate) == len(objects) - len(stale)
+
+    # records are scoped to the download directory
+    with DownloadLedger(tmp_path / "ledger.db", tmp_path / "other") as ledger:
+        missing, stale, uptodate = ledger.partition(objects)
+    assert len(missing) == len(objects)
+
+
+def test_incremental_rerun(tmp_path, small, revise):
+    manifest, payloads = small
+    objects = manifest._select(*SELECTION)
+    with MockObjectServer(payloads) as server, server.install(), quiet():
+        first = manifest.download(*SELECTION, path=tmp_path, incremental=True)
+        before = server.requests
+        again = manifest.download(*SELECTION, path=tmp_path, incremental=True)
+
+    assert len(first.succeeded) == len(objects)
+    assert server.requests == before  # not a single object fetched
+    assert again.succeeded == [] and len(again.skipped) == len(objects)
+
+    # the next revision fetches only what has changed, though sizes are the same
+    changed = [obj.name for obj in objects if obj.name.startswith("sud_")][:3]
+    revised, revised_payloads = revise(manifest, payloads, changed)
+    with MockObjectServer(revised_payloads) as server, server.install(), quiet():
+        result = revised.download(*SELECTION, path=tmp_path, incremental=True)
+    assert server.requests == len(changed)
+    assert _names(result.succeeded) == sorted(changed)
+    for name in changed:
+        obj = revised[name]
+        path = obj._download_path(tmp_path, True, mkdir=False)
+        assert path.read_bytes() == revised_payloads[obj.objectName]
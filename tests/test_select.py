@@ -0,0 +1,72 @@
+"""
+test_select.py
+Tests of GkmasManifest object selection by criteria.
+"""
+
+import re
+import pytest
+
+from benchmark.synthetic import make_jdict, make_manifest
+from benchmark.utils import quiet
+from GkmasObjectManager.const import ALL_ASSETBUNDLES, ALL_RESOURCES
+
+
+PATTERNS = [
+    "img_general_.*",
+    "img_general_bench_00001[0-9]",
+    "sud_vo.*",
+    r"sud_vo_bench_\d+\.awb",
+    r"adv_bench_0000[0-4]\d\.txt",
+    "adv_?bench.*",
+    "mdl_chr_bench-0001.*",
+    "mot_all_bench_0000(1|2).*",
+    "(img|mot)_.*",
+    "img.*|adv.*",
+    "[ms].*_bench_00002.*",
+    ".*bench_0001.*",
+    "a*dv.*",
+    r"mdl_chr_bench\-.*",
+    "nonexistent.*",
+    "",
+]
+
+
+@pytest.fixture(scope="module")
+def manifest():
+    with quiet():
+        return make_manifest(make_jdict(2000))
+
+
+def _reference(manifest, *criteria) -> list:
+    """
+    Selection by plain re.match() over all names, deduplicated
+    in order of the first criterion that matches.
+    """
+    names = [obj.name for obj in manifest]
+    selected = []
+    for criterion in criteria:
+        selected.extend(name for name in names if re.match(criterion, name))
+    return list(dict.fromkeys(selected))
+
+
+@pytest.mark.parametrize("pattern", PATTERNS)
+def test_select_matches_re(manifest, pattern):
+    assert [obj.name for obj in manifest._select(pattern)] == _reference(
+        manifest, pattern
+    )
+
+
+def test_select_combines_criteria(manifest):
+    criteria = ["sud_vo.*", "img_general_bench_00001[0-9]", ".*bench_0001.*"]
+    assert [obj.name for obj in manifest._select(*criteria)] == _reference(
+        manifest, *criteria
+    )
+
+    objects = manifest._select(ALL_ASSETBUNDLES, ALL_RESOURCES)
+    assert [obj.name for obj in objects] == [obj.name for obj in manifest]
+
+    # objects are resolved by name, and deduplicated against patterns
+    picked = objects[::97]
+    names = [obj.name for obj in manifest._select(*picked, ".*")]
+    assert names[: len(picked)] == [obj.name for obj in picked]
+    assert sorted(names) == sorted(obj.name for obj in manifest)
@@ -0,0 +1,189 @@
+"""
+test_utils.py
+Tests of GkmasObjectManager.utils: manifest diffing and download scheduling.
+"""
+
+import json
+import random
+import pytest
+from types import SimpleNamespace
+
+import GkmasObjectManager.utils as utils
+from GkmasObjectManager.utils import AdaptiveConcurrency, Diclist
+from GkmasObjectManager.const import (
+    ADAPTIVE_EPOCH_SECONDS,
+    ADAPTIVE_DECREASE,
+    DICLIST_IGNORED_FIELDS,
+    ALL_RESOURCES,
+)
+
+from benchmark.server import MockObjectServer
+from benchmark.synthetic import make_jdict
+from benchmark.utils import quiet
+
+
+SIZE = 64 << 10
+LATENCY = 0.1
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    A manual clock standing in for time.monotonic() in utils.
+    """
+    clock = SimpleNamespace(now=0.0)
+    monkeypatch.setattr(utils, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+def _epoch(controller: AdaptiveConcurrency, clock, latency: float = LATENCY):
+    """
+    Feeds one epoch of 'limit' requests, all of the same size and latency,
+    so that throughput grows in proportion to the limit.
+    """
+    clock.now += ADAPTIVE_EPOCH_SECONDS
+    for _ in range(controller.limit):
+        controller.record(SIZE, latency)
+
+
+def test_slow_start_doubles_then_adds(clock):
+    controller = AdaptiveConcurrency(2, 64, limit=8)
+    limits = []
+    for _ in range(4):
+        _epoch(controller, clock)
+        limits.append(controller.limit)
+    assert limits == [16, 32, 64, 64]  # doubled while throughput grew, up to max
+
+    controller = AdaptiveConcurrency(2, 64, limit=8)
+    _epoch(controller, clock)
+    controller.record(SIZE, LATENCY, congested=True)  # ends slow start
+    assert controller.limit == 8
+    for expected in [9, 10, 11]:
+        _epoch(controller, clock)
+        assert controller.limit == expected
+
+
+def test_congestion_halves_once_per_epoch(clock):
+    controller = AdaptiveConcurrency(2, 64, limit=32)
+    controller.record(SIZE, LATENCY, congested=True)
+    assert controller.limit == int(32 * ADAPTIVE_DECREASE)
+    controller.record(SIZE, LATENCY, congested=True)  # same epoch
+    assert controller.limit == int(32 * ADAPTIVE_DECREASE)
+
+    clock.now += ADAPTIVE_EPOCH_SECONDS
+    controller.record(SIZE, LATENCY, congested=True)
+    assert controller.limit == int(32 * ADAPTIVE_DECREASE**2)
+
+
+def test_limit_stays_within_bounds(clock):
+    controller = AdaptiveConcurrency(4, 16)
+    for _ in range(10):
+        clock.now += ADAPTIVE_EPOCH_SECONDS
+        controller.record(SIZE, LATENCY, congested=True)
+        assert 4 <= controller.limit <= 16
+    assert controller.limit == 4
+
+    for _ in range(20):
+        _epoch(controller, clock)
+        assert 4 <= controller.limit <= 16
+    assert controller.limit == 16
+
+    with pytest.raises(ValueError):
+        AdaptiveConcurrency(0, 16)
+
+
+# ----------------------------------------------------------------------------
+# Diclist
+
+
+def _quadratic_diff(self: list, other: list, ignored_fields: list = []) -> list:
+    """
+    The original quadratic Diclist.diff(), as a reference.
+    """
+    if not ignored_fields:
+        return [item for item in self if item not in other]
+    rip = lambda entries: [
+        {k: v for k, v in entry.items() if k not in ignored_fields} for entry in entries
+    ]
+    self_rip, other_rip = rip(self), rip(other)
+    return [self[self_rip.index(entry)] for entry in self_rip if entry not in other_rip]
+
+
+@pytest.mark.parametrize("ignored_fields", [[], DICLIST_IGNORED_FIELDS])
+def test_diff_matches_quadratic(ignored_fields):
+    rng = random.Random(0)
+    new = make_jdict(300, seed=1)["assetBundleList"]
+    old = json.loads(json.dumps(new))  # deep copy
+    for entry in rng.sample(old, 30):
+        entry["md5"] = "%032x" % rng.getrandbits(128)
+    for entry in rng.sample(old, 30):
+        entry[rng.choice(DICLIST_IGNORED_FIELDS)] = None  # ignorable changes
+    for entry in rng.sample(old, 10):
+        entry["dependencies"] = entry["dependencies"][::-1]  # nested list
+    old = old[10:] + [dict(old[0], id=9999)]  # removed, and duplicated with a new id
+    new = new + new[:5]  # duplicates
+
+    expected = _quadratic_diff(new, old, ignored_fields)
+    assert 40 <= len(expected) < len(new)
+    assert Diclist(new).diff(Diclist(old), ignored_fields) == expected
+    assert Diclist(old).diff(Diclist(new), ignored_fields) == _quadratic_diff(
+        old, new, ignored_fields
+    )
+    if not ignored_fields:
+        assert Diclist(new) - Diclist(old) == expected
+
+
+# ----------------------------------------------------------------------------
+# DownloadSchedule and DownloadResult
+
+
+@pytest.fixture
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(utils, "RETRY_BACKOFF_BASE", 0.01)
+
+
+RESOURCES = "sud_vo_bench_00000[0-3].*"
+
+
+@pytest.mark.parametrize("backend", ["thread", "async"])
+def test_transient_errors_are_retried(tmp_path, small, fast_backoff, backend):
+    manifest, payloads = small
+    with MockObjectServer(payloads, error_rate=1.0) as server, server.install():
+        with quiet():
+            result = manifest.download(
+                RESOURCES, path=tmp_path, retries=2, backend=backend
+            )
+
+    assert len(result.failed) == 4 and result.retries == 4 * 2
+    assert server.requests == 4 * 3
+    assert all(error.status == 503 for error in result.errors.values())
+
+
+@pytest.mark.parametrize("backend", ["thread", "async"])
+def test_client_errors_are_not_retried(tmp_path, small, fast_backoff, backend):
+    manifest, payloads = small
+    missing = manifest._select(RESOURCES)[0]
+    served = {k: v for k, v in payloads.items() if k != missing.objectName}
+    with MockObjectServer(served) as server, server.install(), quiet():
+        result = manifest.download(RESOURCES, path=tmp_path, retries=2, backend=backend)
+
+    assert [obj.name for obj in result.failed] == [missing.name]
+    assert result.errors[missing.name].status == 404
+    assert result.retries == 0 and server.requests == 4
+    assert len(result.succeeded) == 3
+
+
+def test_failed_objects_round_trip(tmp_path, small, fast_backoff):
+    manifest, payloads = small
+    objects = manifest._select(ALL_RESOURCES)[:50]
+    flaky = {obj.objectName for obj in objects[::7]}
+    served = {k: v for k, v in payloads.items() if k not in flaky}
+    with MockObjectServer(served) as server, server.install(), quiet():
+        result = manifest.download(*objects, path=tmp_path, retries=0)
+    assert {obj.objectName for obj in result.failed} == flaky
+
+    # failed objects are fed straight back as criteria
+    with MockObjectServer(payloads) as server, server.install(), quiet():
+        retried = manifest.download(*result.failed, path=tmp_path)
+    assert retried.ok and server.requests == len(flaky)
+    assert {obj.objectName for obj in retried.succeeded} == flaky
@@ -0,0 +1,72 @@
+"""
+test_verify.py
+Tests of download tree verification, and of downloading invalid objects again.
+"""
+
+from benchmark.server import MockObjectServer
+from benchmark.utils import quiet
+
+
+SELECTION = ["sud_vo_bench_00000[0-9].*", "mot_bench_00040[0-9]"]
+
+
+def _names(objects) -> list:
+    return sorted(obj.name for obj in objects)
+
+
+def _damage(objects, root) -> tuple:
+    """
+    Removes the file of one object, truncates another, and flips a byte of a third
+    (an assetbundle, whose check may re-obfuscate its header). Returns the three.
+    """
+    resources = [obj for obj in objects if obj.name.startswith("sud_")]
+    bundles = [obj for obj in objects if obj.name.startswith("mot_")]
+    missing, truncated, flipped = resources[0], resources[1], bundles[-1]
+
+    missing._download_path(root, True, mkdir=False).unlink()
+    path = truncated._download_path(root, True, mkdir=False)
+    path.write_bytes(path.read_bytes()[:-1])
+    path = flipped._download_path(root, True, mkdir=False)
+    data = bytearray(path.read_bytes())
+    data[-1] ^= 0xFF
+    path.write_bytes(data)
+    return missing, truncated, flipped
+
+
+def test_verify_reports(tmp_path, small):
+    manifest, payloads = small
+    objects = manifest._select(*SELECTION)
+    with MockObjectServer(payloads) as server, server.install(), quiet():
+        manifest.download(*SELECTION, path=tmp_path)
+        assert len(manifest.verify(tmp_path, *SELECTION).valid) == len(objects)
+
+        missing, truncated, flipped = _damage(objects, tmp_path)
+        before = server.requests
+        result = manifest.verify(tmp_path, *SELECTION)
+
+    assert server.requests == before
+    assert _names(result.missing) == [missing.name]
+    assert _names(result.corrupt) == sorted([truncated.name, flipped.name])
+    assert result.reasons == {
+        truncated.name: "truncated",
+        flipped.name: "invalid MD5 hash",
+    }
+    assert result.outdated == [] and result.redownloaded is None
+    assert len(result.valid) == len(objects) - 3
+
+
+def test_verify_redownloads(tmp_path, small):
+    manifest, payloads = small
+    objects = manifest._select(*SELECTION)
+    with MockObjectServer(payloads) as server, server.install(), quiet():
+        manifest.download(*SELECTION, path=tmp_path)
+        damaged = _damage(objects, tmp_path)
+        before = server.requests
+        result = manifest.verify(tmp_path, *SELECTION, redownload=True)
+        fetched = server.requests - before
+        after = manifest.verify(tmp_path, *SELECTION)
+
+    # exactly the invalid ones are fetched, including the one of the right size
+    assert fetched == len(damaged)
+    assert _names(result.redownloaded.succeeded) == _names(damaged)
+    assert len(after.valid) == len(objects) and after.invalid == []